@@ -0,0 +1,65 @@
+"""
+Custo por requisição da autenticação JWT, com e sem o cache de tokens validados.
+
+Mede obter_usuario_atual (a dependência usada por todos os endpoints autenticados)
+repetidamente sobre um conjunto de tokens ativos, como em tráfego real.
+
+Uso (a partir de cyberpunk-eventos-backend/):
+    python -m benchmarks.autenticacao_token --chamadas 200000 --tokens 1000
+"""
+import argparse
+import asyncio
+import time
+
+from benchmarks.comum import percentil
+
+
+async def medir(tokens, chamadas: int) -> dict:
+    from fastapi.security import HTTPAuthorizationCredentials
+    from utils.auth import obter_usuario_atual
+
+    credenciais = [HTTPAuthorizationCredentials(scheme="Bearer", credentials=token) for token in tokens]
+    amostras = []
+    inicio_total = time.perf_counter()
+    for i in range(chamadas):
+        inicio = time.perf_counter()
+        await obter_usuario_atual(credenciais[i % len(credenciais)])
+        amostras.append(time.perf_counter() - inicio)
+    total = time.perf_counter() - inicio_total
+
+    return {
+        "media_us": total / chamadas * 1e6,
+        "p50_us": percentil(amostras, 50) * 1e6,
+        "p99_us": percentil(amostras, 99) * 1e6,
+        "chamadas_por_s": chamadas / total,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chamadas", type=int, default=200_000, help="Requisições autenticadas simuladas")
+    parser.add_argument("--tokens", type=int, default=1000, help="Tokens distintos em circulação")
+    args = parser.parse_args()
+
+    from utils import auth
+
+    tokens = [
+        auth.criar_token_acesso({"sub": str(i), "tipo_usuario": "cliente"})
+        for i in range(args.tokens)
+    ]
+    tamanho_original = auth.TOKEN_CACHE_TAMANHO
+
+    auth.TOKEN_CACHE_TAMANHO = 0
+    auth.limpar_cache_tokens()
+    sem_cache = asyncio.run(medir(tokens, args.chamadas))
+
+    auth.TOKEN_CACHE_TAMANHO = max(tamanho_original, args.tokens)
+    com_cache = asyncio.run(medir(tokens, args.chamadas))
+
+    print(f"{'métrica':<16}{'sem cache':>14}{'com cache':>14}")
+    for coluna in sem_cache:
+        print(f"{coluna:<16}{sem_cache[coluna]:>14.1f}{com_cache[coluna]:>14.1f}")
+
+
+if __name__ == "__main__":
+    main()
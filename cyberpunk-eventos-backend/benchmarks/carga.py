@@ -0,0 +1,281 @@
+"""
+Benchmark de carga e latência de todos os routers, em processo (transporte ASGI, sem rede).
+
+Usuários virtuais executam uma mistura ponderada de operações por um tempo fixo:
+navegação no catálogo e busca, login, dashboard do organizador, rajadas de compra
+e verificação de ingressos. O resultado (vazão e p50/p95/p99 por endpoint) é
+gravado em JSON; o subcomando comparar aponta regressões contra uma linha de base.
+
+Uso (a partir de cyberpunk-eventos-backend/):
+    python -m benchmarks.carga executar --duracao 20 --usuarios 16 --saida resultado.json
+    python -m benchmarks.carga comparar base.json resultado.json --tolerancia 0.25
+"""
+import argparse
+import asyncio
+import json
+import platform
+import random
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+
+from benchmarks.comum import configurar_banco_temporario, remover_banco_temporario, criar_esquema, cliente_http, percentil
+
+SENHA = "senha-bench"
+
+# Peso de cada operação na mistura (proporção de escolhas por usuário virtual)
+MISTURA = {
+    "catalogo": 40,
+    "busca": 10,
+    "perfil_empresa": 8,
+    "ingressos_cliente": 10,
+    "verificacao": 15,
+    "compra": 8,
+    "dashboard": 6,
+    "login": 3,
+}
+TAMANHO_RAJADA_COMPRA = 4
+TERMOS_BUSCA = ["neon", "chrome", "night", "synth", "rave", "net"]
+
+
+async def semear(eventos: int, clientes: int) -> dict:
+    """Popular o banco direto pelo ORM (o hash da senha é calculado uma única vez)"""
+    from database.database import AsyncSessionLocal
+    from database.models import Empresa, Cliente, Evento
+    from utils.auth import hash_senha
+
+    await criar_esquema()
+    senha_hash = hash_senha.hash(SENHA)
+    gerador = random.Random(42)
+    palavras = ["Neon", "Chrome", "Night", "Synth", "Rave", "Net", "Cyber", "Grid"]
+
+    async with AsyncSessionLocal() as sessao:
+        empresas = [Empresa(nome=f"Organizadora {i}", email=f"org{i}@bench.dev", senha=senha_hash) for i in range(3)]
+        sessao.add_all(empresas)
+        sessao.add_all([Cliente(nome=f"Cliente {i}", email=f"cliente{i}@bench.dev", senha=senha_hash) for i in range(clientes)])
+        await sessao.flush()
+        data_fim = datetime.utcnow() + timedelta(days=60)
+        sessao.add_all([
+            Evento(
+                nome=f"{gerador.choice(palavras)} {gerador.choice(palavras)} {i}",
+                localizacao=gerador.choice(["Night City", "Watson", "Pacifica"]),
+                descricao="Evento gerado para benchmark",
+                data_fim=data_fim,
+                preco_ingresso=gerador.randrange(1000, 20000, 500),
+                total_ingressos=1_000_000,
+                organizador_id=empresas[i % len(empresas)].id
+            )
+            for i in range(eventos)
+        ])
+        await sessao.commit()
+        return {"empresas": [e.id for e in empresas]}
+
+
+class Coletor:
+    """Latências por endpoint, registradas apenas após o aquecimento"""
+
+    def __init__(self, inicio_medicao: float):
+        self.inicio_medicao = inicio_medicao
+        self.latencias = defaultdict(list)
+        self.erros = defaultdict(int)
+
+    async def requisitar(self, cliente, rotulo: str, metodo: str, url: str, **kwargs):
+        inicio = time.perf_counter()
+        resposta = await cliente.request(metodo, url, **kwargs)
+        if inicio >= self.inicio_medicao:
+            self.latencias[rotulo].append(time.perf_counter() - inicio)
+            if resposta.status_code >= 400:
+                self.erros[rotulo] += 1
+        return resposta
+
+
+async def executar_carga(args) -> dict:
+    ids = await semear(args.eventos, args.clientes)
+    gerador = random.Random(args.semente)
+    operacoes, pesos = zip(*MISTURA.items())
+    codigos = []
+
+    async with cliente_http() as cliente:
+        async def logar(email: str, tipo: str) -> dict:
+            resposta = await cliente.post("/auth/login", json={"email": email, "senha": SENHA, "tipo_usuario": tipo})
+            return {"Authorization": f"Bearer {resposta.json()['token_acesso']}"}
+
+        tokens_empresa = [await logar(f"org{i}@bench.dev", "empresa") for i in range(len(ids["empresas"]))]
+        tokens_cliente = [await logar(f"cliente{i}@bench.dev", "cliente") for i in range(args.clientes)]
+
+        inicio = time.perf_counter()
+        coletor = Coletor(inicio + args.aquecimento)
+        fim = inicio + args.aquecimento + args.duracao
+
+        async def usuario_virtual(numero: int):
+            aleatorio = random.Random(gerador.random())
+            cliente_auth = tokens_cliente[numero % len(tokens_cliente)]
+            empresa_auth = tokens_empresa[numero % len(tokens_empresa)]
+            while time.perf_counter() < fim:
+                operacao = aleatorio.choices(operacoes, pesos)[0]
+                if operacao == "catalogo":
+                    resposta = await coletor.requisitar(cliente, "GET /eventos", "GET", "/eventos?limite=20")
+                    cursor = resposta.headers.get("x-proximo-cursor")
+                    if cursor and aleatorio.random() < 0.5:
+                        await coletor.requisitar(cliente, "GET /eventos?cursor", "GET", "/eventos", params={"limite": 20, "cursor": cursor})
+                elif operacao == "busca":
+                    termo = aleatorio.choice(TERMOS_BUSCA)[:aleatorio.randint(3, 5)]
+                    await coletor.requisitar(cliente, "GET /eventos/busca", "GET", "/eventos/busca", params={"q": termo})
+                elif operacao == "perfil_empresa":
+                    empresa_id = aleatorio.choice(ids["empresas"])
+                    await coletor.requisitar(cliente, "GET /empresas/{id}", "GET", f"/empresas/{empresa_id}")
+                    await coletor.requisitar(cliente, "GET /empresas/{id}/eventos", "GET", f"/empresas/{empresa_id}/eventos")
+                elif operacao == "ingressos_cliente":
+                    await coletor.requisitar(cliente, "GET /ingressos/meus-ingressos", "GET", "/ingressos/meus-ingressos", headers=cliente_auth)
+                    await coletor.requisitar(cliente, "GET /ingressos/meus-pagamentos", "GET", "/ingressos/meus-pagamentos", headers=cliente_auth)
+                elif operacao == "verificacao":
+                    if codigos:
+                        codigo = aleatorio.choice(codigos)
+                        await coletor.requisitar(cliente, "GET /ingressos/verificar/{codigo}", "GET", f"/ingressos/verificar/{codigo}")
+                elif operacao == "compra":
+                    evento_id = aleatorio.randint(1, min(args.eventos, 20))  # Concentrada em poucos eventos
+                    corpo = {
+                        "evento_id": evento_id,
+                        "quantidade": aleatorio.randint(1, 3),
+                        "metodo_pagamento": aleatorio.choice(["pix", "cartao"]),
+                        "nome_comprador": "Cliente",
+                        "email_comprador": "cliente@bench.dev",
+                        "cpf_comprador": "00000000000"
+                    }
+                    respostas = await asyncio.gather(*(
+                        coletor.requisitar(cliente, "POST /ingressos", "POST", "/ingressos", headers=cliente_auth, json=corpo)
+                        for _ in range(TAMANHO_RAJADA_COMPRA)
+                    ))
+                    for resposta in respostas:
+                        if resposta.status_code == 201:
+                            codigos.extend(ingresso["codigo_hash"] for ingresso in resposta.json()["ingressos"])
+                elif operacao == "dashboard":
+                    await coletor.requisitar(cliente, "GET /eventos/dashboard/estatisticas", "GET", "/eventos/dashboard/estatisticas", headers=empresa_auth)
+                    await coletor.requisitar(cliente, "GET /eventos/meus-eventos", "GET", "/eventos/meus-eventos", headers=empresa_auth)
+                elif operacao == "login":
+                    email = f"cliente{aleatorio.randrange(args.clientes)}@bench.dev"
+                    await coletor.requisitar(cliente, "POST /auth/login", "POST", "/auth/login", json={"email": email, "senha": SENHA, "tipo_usuario": "cliente"})
+
+        await asyncio.gather(*(usuario_virtual(i) for i in range(args.usuarios)))
+
+    from database.database import encerrar_engines
+    await encerrar_engines()
+
+    endpoints = {}
+    for rotulo, latencias in sorted(coletor.latencias.items()):
+        endpoints[rotulo] = {
+            "requisicoes": len(latencias),
+            "vazao_rps": len(latencias) / args.duracao,
+            "p50_ms": percentil(latencias, 50) * 1000,
+            "p95_ms": percentil(latencias, 95) * 1000,
+            "p99_ms": percentil(latencias, 99) * 1000,
+            "erros": coletor.erros[rotulo],
+        }
+    total = sum(dados["requisicoes"] for dados in endpoints.values())
+    return {
+        "meta": {
+            "data": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "commit": _commit_atual(),
+            "python": platform.python_version(),
+            "plataforma": platform.platform(),
+            "parametros": {chave: valor for chave, valor in vars(args).items() if chave != "comando"},
+        },
+        "total": {"requisicoes": total, "vazao_rps": total / args.duracao},
+        "endpoints": endpoints,
+    }
+
+
+def _commit_atual() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True).stdout.strip()
+    except OSError:
+        return ""
+
+
+def imprimir_resultado(resultado: dict) -> None:
+    print(f"{'endpoint':<38}{'req':>7}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'erros':>7}")
+    for rotulo, dados in resultado["endpoints"].items():
+        print(
+            f"{rotulo:<38}{dados['requisicoes']:>7}{dados['vazao_rps']:>9.1f}"
+            f"{dados['p50_ms']:>9.1f}{dados['p95_ms']:>9.1f}{dados['p99_ms']:>9.1f}{dados['erros']:>7}"
+        )
+    print(f"{'total':<38}{resultado['total']['requisicoes']:>7}{resultado['total']['vazao_rps']:>9.1f}")
+
+
+def comparar(base: dict, atual: dict, tolerancia: float, piso_ms: float, amostras_minimas: int) -> list:
+    """Regressões além da tolerância relativa: latência por endpoint, vazão total e erros novos"""
+    regressoes = []
+    for rotulo, dados_base in base["endpoints"].items():
+        dados_atual = atual["endpoints"].get(rotulo)
+        if dados_atual is None:
+            continue
+        amostras = min(dados_base["requisicoes"], dados_atual["requisicoes"])
+        if amostras < amostras_minimas:
+            continue
+        # p99 só é estável com centenas de amostras
+        metricas = ("p50_ms", "p95_ms", "p99_ms") if amostras >= 200 else ("p50_ms", "p95_ms")
+        for metrica in metricas:
+            antes, depois = dados_base[metrica], dados_atual[metrica]
+            # O piso absoluto evita acusar ruído em endpoints de poucos milissegundos
+            if depois > antes * (1 + tolerancia) and depois - antes > piso_ms:
+                regressoes.append((rotulo, metrica, antes, depois))
+        if dados_atual["erros"] > dados_base["erros"]:
+            regressoes.append((rotulo, "erros", dados_base["erros"], dados_atual["erros"]))
+
+    # A mistura é aleatória, então a vazão só é comparável no total
+    antes, depois = base["total"]["vazao_rps"], atual["total"]["vazao_rps"]
+    if depois < antes * (1 - tolerancia):
+        regressoes.append(("total", "vazao_rps", antes, depois))
+    return regressoes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subcomandos = parser.add_subparsers(dest="comando", required=True)
+
+    executar = subcomandos.add_parser("executar", help="Rodar a carga e gravar o resultado")
+    executar.add_argument("--duracao", type=float, default=20.0, help="Segundos medidos")
+    executar.add_argument("--aquecimento", type=float, default=3.0, help="Segundos iniciais descartados")
+    executar.add_argument("--usuarios", type=int, default=16, help="Usuários virtuais concorrentes")
+    executar.add_argument("--eventos", type=int, default=300, help="Eventos no catálogo")
+    executar.add_argument("--clientes", type=int, default=10, help="Clientes com login")
+    executar.add_argument("--semente", type=int, default=1, help="Semente da mistura de operações")
+    executar.add_argument("--saida", help="Arquivo JSON do resultado")
+
+    comparar_parser = subcomandos.add_parser("comparar", help="Comparar um resultado com a linha de base")
+    comparar_parser.add_argument("base", help="JSON da linha de base")
+    comparar_parser.add_argument("atual", help="JSON do resultado atual")
+    comparar_parser.add_argument("--tolerancia", type=float, default=0.25, help="Piora relativa aceita (0.25 = 25%%)")
+    comparar_parser.add_argument("--piso-ms", type=float, default=5.0, help="Piora absoluta mínima para acusar latência")
+    comparar_parser.add_argument("--amostras-minimas", type=int, default=50, help="Requisições mínimas para comparar um endpoint")
+
+    args = parser.parse_args()
+
+    if args.comando == "executar":
+        pasta = configurar_banco_temporario()
+        try:
+            resultado = asyncio.run(executar_carga(args))
+        finally:
+            remover_banco_temporario(pasta)
+        imprimir_resultado(resultado)
+        if args.saida:
+            with open(args.saida, "w", encoding="utf-8") as arquivo:
+                json.dump(resultado, arquivo, indent=2, ensure_ascii=False)
+        return
+
+    with open(args.base, encoding="utf-8") as arquivo:
+        base = json.load(arquivo)
+    with open(args.atual, encoding="utf-8") as arquivo:
+        atual = json.load(arquivo)
+    regressoes = comparar(base, atual, args.tolerancia, args.piso_ms, args.amostras_minimas)
+    for rotulo, metrica, antes, depois in regressoes:
+        print(f"REGRESSÃO {rotulo} {metrica}: {antes:.1f} -> {depois:.1f}")
+    if not regressoes:
+        print("Sem regressões além da tolerância")
+    sys.exit(1 if regressoes else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Vazão do check-in na entrada: códigos por segundo por tamanho de lote.
+
+Vende --ingressos ingressos de um evento e dá entrada em todos via
+POST /ingressos/checkin, com lotes de tamanhos diferentes (cada tamanho usa uma
+fatia nova de códigos). Depois reescaneia os mesmos códigos, que devem ser
+recusados pelo índice em memória sem escrita no banco. Para referência, mede
+também GET /ingressos/verificar/{codigo} (uma requisição por código, sem dar entrada).
+
+Uso (a partir de cyberpunk-eventos-backend/):
+    python -m benchmarks.checkin --ingressos 6000 --lotes 1 50 500
+"""
+import argparse
+import asyncio
+import time
+from datetime import datetime, timedelta, timezone
+
+from benchmarks.comum import configurar_banco_temporario, remover_banco_temporario, criar_esquema, cliente_http, registrar_e_logar
+
+COMPRA_MAXIMA = 500  # Ingressos por compra ao preparar o evento
+
+
+async def executar(total: int, lotes: list) -> None:
+    await criar_esquema()
+    async with cliente_http() as cliente:
+        empresa = await registrar_e_logar(cliente, "empresa", "org@bench.dev")
+        comprador = await registrar_e_logar(cliente, "cliente", "cliente@bench.dev")
+        data_fim = (datetime.now(timezone.utc) + timedelta(days=1)).isoformat()
+        evento = (await cliente.post("/eventos", headers=empresa, json={
+            "nome": "Gate Test", "localizacao": "Arena", "data_fim": data_fim,
+            "preco_ingresso": 1000, "total_ingressos": total
+        })).json()
+
+        codigos = []
+        while len(codigos) < total:
+            resposta = await cliente.post("/ingressos", headers=comprador, json={
+                "evento_id": evento["id"], "quantidade": min(COMPRA_MAXIMA, total - len(codigos)),
+                "metodo_pagamento": "pix", "nome_comprador": "Cliente",
+                "email_comprador": "cliente@bench.dev", "cpf_comprador": "00000000000"
+            })
+            resposta.raise_for_status()
+            codigos += [ingresso["codigo_hash"] for ingresso in resposta.json()["ingressos"]]
+
+        async def dar_entrada(fatia: list, lote: int) -> tuple:
+            confirmados = 0
+            inicio = time.perf_counter()
+            for i in range(0, len(fatia), lote):
+                resposta = await cliente.post("/ingressos/checkin", headers=empresa, json={
+                    "evento_id": evento["id"], "codigos": fatia[i:i + lote]
+                })
+                resposta.raise_for_status()
+                confirmados += resposta.json()["confirmados"]
+            return len(fatia) / (time.perf_counter() - inicio), confirmados
+
+        print(f"{'cenário':<34}{'códigos/s':>12}{'confirmados':>14}")
+
+        quantidade_verificar = min(500, len(codigos))
+        inicio = time.perf_counter()
+        for codigo in codigos[:quantidade_verificar]:
+            (await cliente.get(f"/ingressos/verificar/{codigo}")).raise_for_status()
+        print(f"{'GET verificar (sem entrada)':<34}{quantidade_verificar / (time.perf_counter() - inicio):>12.0f}{'-':>14}")
+
+        fatia = len(codigos) // len(lotes)
+        for indice, lote in enumerate(lotes):
+            vazao, confirmados = await dar_entrada(codigos[indice * fatia:(indice + 1) * fatia], lote)
+            print(f"{f'check-in, lote de {lote}':<34}{vazao:>12.0f}{confirmados:>14}")
+
+        maior = max(lotes)
+        vazao, confirmados = await dar_entrada(codigos[:fatia * len(lotes)], maior)
+        print(f"{f'reescaneamento, lote de {maior}':<34}{vazao:>12.0f}{confirmados:>14}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--ingressos", type=int, default=6000, help="Ingressos vendidos para o evento")
+    parser.add_argument("--lotes", type=int, nargs="+", default=[1, 50, 500], help="Tamanhos de lote a comparar")
+    args = parser.parse_args()
+
+    pasta = configurar_banco_temporario()
+    try:
+        asyncio.run(executar(args.ingressos, args.lotes))
+    finally:
+        remover_banco_temporario(pasta)
+
+
+if __name__ == "__main__":
+    main()
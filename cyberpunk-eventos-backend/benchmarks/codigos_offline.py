@@ -0,0 +1,116 @@
+"""
+Snapshot offline dos códigos de ingresso: tamanho, tempo de geração e conferência.
+
+Vende --ingressos ingressos de um evento, baixa o snapshot completo e confere
+que todo código vendido é encontrado e que códigos aleatórios são recusados
+(falsos positivos do Bloom ficam com a busca binária). Em seguida vende mais
+alguns ingressos e baixa só o delta a partir da versão anterior; por fim repete
+o completo com If-None-Match: 200 para a versão antiga e 304 para a atual.
+
+Uso (a partir de cyberpunk-eventos-backend/):
+    python -m benchmarks.codigos_offline --ingressos 20000 --aleatorios 20000
+"""
+import argparse
+import asyncio
+import random
+import string
+import time
+from datetime import datetime, timedelta, timezone
+
+from benchmarks.comum import configurar_banco_temporario, remover_banco_temporario, criar_esquema, cliente_http, registrar_e_logar
+
+COMPRA_MAXIMA = 500  # Ingressos por compra ao preparar o evento
+DELTA = 50  # Ingressos vendidos depois do snapshot completo
+
+
+async def executar(total: int, aleatorios: int) -> bool:
+    from utils.codigos_offline import ler_snapshot, snapshot_contem, posicoes_bloom, TIPO_DELTA
+    from utils.helpers import TAMANHO_HASH_INGRESSO
+
+    await criar_esquema()
+    async with cliente_http() as cliente:
+        empresa = await registrar_e_logar(cliente, "empresa", "org@bench.dev")
+        comprador = await registrar_e_logar(cliente, "cliente", "cliente@bench.dev")
+        data_fim = (datetime.now(timezone.utc) + timedelta(days=1)).isoformat()
+        evento = (await cliente.post("/eventos", headers=empresa, json={
+            "nome": "Gate Offline", "localizacao": "Arena", "data_fim": data_fim,
+            "preco_ingresso": 1000, "total_ingressos": total + DELTA
+        })).json()
+
+        async def vender(quantidade: int) -> list:
+            codigos = []
+            while len(codigos) < quantidade:
+                resposta = await cliente.post("/ingressos", headers=comprador, json={
+                    "evento_id": evento["id"], "quantidade": min(COMPRA_MAXIMA, quantidade - len(codigos)),
+                    "metodo_pagamento": "pix", "nome_comprador": "Cliente",
+                    "email_comprador": "cliente@bench.dev", "cpf_comprador": "00000000000"
+                })
+                resposta.raise_for_status()
+                codigos += [ingresso["codigo_hash"] for ingresso in resposta.json()["ingressos"]]
+            return codigos
+
+        codigos = await vender(total)
+        url = f"/eventos/{evento['id']}/codigos-offline"
+
+        inicio = time.perf_counter()
+        resposta = await cliente.get(url, headers=empresa)
+        duracao = time.perf_counter() - inicio
+        resposta.raise_for_status()
+        snapshot = ler_snapshot(resposta.content)
+        print(f"completo: {snapshot.quantidade} códigos, {len(resposta.content) / 1024:.1f} KiB, "
+              f"{duracao * 1000:.0f} ms (Bloom m={snapshot.bloom.bits}, k={snapshot.bloom.funcoes})")
+
+        faltando = sum(not snapshot_contem(snapshot, codigo) for codigo in codigos)
+        vendidos = set(codigos)
+        alfabeto = string.ascii_letters + string.digits
+        gerador = random.Random(42)
+        falsos_bloom = aceitos = 0
+        inicio = time.perf_counter()
+        for _ in range(aleatorios):
+            codigo = "".join(gerador.choices(alfabeto, k=TAMANHO_HASH_INGRESSO))
+            if codigo in vendidos:
+                continue
+            chave = codigo.encode("ascii")
+            falsos_bloom += all(snapshot.filtro[p >> 3] & (1 << (p & 7)) for p in posicoes_bloom(chave, snapshot.bloom))
+            aceitos += snapshot_contem(snapshot, codigo)
+        duracao = time.perf_counter() - inicio
+        print(f"conferência: {faltando} vendidos não encontrados, {aceitos} aleatórios aceitos, "
+              f"{falsos_bloom / max(aleatorios, 1):.2%} falsos positivos do Bloom, "
+              f"{aleatorios / duracao:.0f} consultas/s")
+
+        novos = await vender(DELTA)
+        resposta_delta = await cliente.get(url, headers=empresa, params={"desde": snapshot.versao})
+        resposta_delta.raise_for_status()
+        delta = ler_snapshot(resposta_delta.content)
+        delta_ok = (
+            delta.tipo == TIPO_DELTA and delta.bloom == snapshot.bloom
+            and all(snapshot_contem(delta, codigo) for codigo in novos)
+            and not any(snapshot_contem(delta, codigo) for codigo in codigos[:DELTA])
+        )
+        print(f"delta: {delta.quantidade} códigos, {len(resposta_delta.content)} bytes, "
+              f"{'ok' if delta_ok else 'INCORRETO'}")
+
+        antigo = await cliente.get(url, headers={**empresa, "If-None-Match": resposta.headers["etag"]})
+        atual = await cliente.get(url, headers=empresa)
+        condicional = await cliente.get(url, headers={**empresa, "If-None-Match": atual.headers["etag"]})
+        print(f"If-None-Match: versão antiga {antigo.status_code}, versão atual {condicional.status_code}")
+
+    return not faltando and not aceitos and delta_ok and antigo.status_code == 200 and condicional.status_code == 304
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--ingressos", type=int, default=20000, help="Ingressos vendidos antes do snapshot completo")
+    parser.add_argument("--aleatorios", type=int, default=20000, help="Códigos aleatórios conferidos contra o snapshot")
+    args = parser.parse_args()
+
+    pasta = configurar_banco_temporario()
+    try:
+        ok = asyncio.run(executar(args.ingressos, args.aleatorios))
+    finally:
+        remover_banco_temporario(pasta)
+    raise SystemExit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""Utilitários compartilhados pelos benchmarks (banco temporário, esquema, percentis)"""
+import os
+import shutil
+import tempfile
+from datetime import datetime, timedelta
+from typing import List
+
+
+def configurar_banco_temporario() -> str:
+    """Apontar DATABASE_URL para um arquivo SQLite temporário antes de importar o app"""
+    pasta = tempfile.mkdtemp(prefix="cyberpunk-bench-")
+    os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{pasta}/benchmark.db"
+    os.environ["ESTADO_COMPARTILHADO_URL"] = f"sqlite:///{pasta}/estado.db"
+    os.environ.setdefault("DATABASE_ECHO", "false")
+    os.environ.setdefault("SQL_CABECALHO_CONSULTAS", "true")
+    # Os benchmarks de carga disparam muito mais que os limites de produção
+    os.environ.setdefault("LIMITE_TAXA_ATIVO", "false")
+    return pasta
+
+
+def remover_banco_temporario(pasta: str) -> None:
+    shutil.rmtree(pasta, ignore_errors=True)
+
+
+async def criar_esquema() -> None:
+    """Criar tabelas e aplicar migrações no banco configurado"""
+    from database.database import engine
+    from database.models import Base
+    from database.migracoes import aplicar_migracoes
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.run_sync(aplicar_migracoes)
+
+
+def percentil(valores: List[float], p: float) -> float:
+    """Percentil por posição mais próxima (valores não precisam estar ordenados)"""
+    if not valores:
+        return 0.0
+    ordenados = sorted(valores)
+    indice = min(len(ordenados) - 1, max(0, round(p / 100 * len(ordenados)) - 1))
+    return ordenados[indice]
+
+
+def cliente_http():
+    """Cliente httpx ligado ao app via ASGI, sem rede (o esquema deve ser criado antes).
+
+    Exceções não tratadas no app viram respostas 500, como em um servidor real.
+    """
+    import httpx
+    from main import app
+
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app, raise_app_exceptions=False), base_url="http://bench")
+
+
+async def registrar_e_logar(cliente, tipo_usuario: str, email: str, senha: str = "senha-bench") -> dict:
+    """Registrar empresa/cliente e devolver os cabeçalhos de autorização"""
+    await cliente.post(f"/auth/registrar/{tipo_usuario}", json={"nome": email.split("@")[0], "email": email, "senha": senha})
+    resposta = await cliente.post("/auth/login", json={"email": email, "senha": senha, "tipo_usuario": tipo_usuario})
+    resposta.raise_for_status()
+    return {"Authorization": f"Bearer {resposta.json()['token_acesso']}"}
+
+
+async def semear_compradores(compradores: int) -> dict:
+    """Empresa, clientes e 50 eventos direto pelo ORM; tokens emitidos sem passar pelo Argon2"""
+    from database.database import AsyncSessionLocal
+    from database.models import Empresa, Cliente, Evento
+    from utils.auth import criar_token_acesso
+
+    await criar_esquema()
+    async with AsyncSessionLocal() as sessao:
+        empresa = Empresa(nome="Organizadora", email="org@bench.dev", senha="-")
+        clientes = [Cliente(nome=f"Cliente {i}", email=f"cliente{i}@bench.dev", senha="-") for i in range(compradores)]
+        sessao.add(empresa)
+        sessao.add_all(clientes)
+        await sessao.flush()
+        data_fim = datetime.utcnow() + timedelta(days=30)
+        eventos = [
+            Evento(nome=f"Evento {i}", localizacao="Night City", data_fim=data_fim, preco_ingresso=5000,
+                   total_ingressos=1_000_000, organizador_id=empresa.id)
+            for i in range(50)
+        ]
+        sessao.add_all(eventos)
+        await sessao.commit()
+
+        def cabecalho(usuario_id: int, tipo: str) -> dict:
+            token = criar_token_acesso({"sub": str(usuario_id), "tipo_usuario": tipo})
+            return {"Authorization": f"Bearer {token}"}
+
+        return {
+            "empresa": cabecalho(empresa.id, "empresa"),
+            "empresa_id": empresa.id,
+            "clientes": [cabecalho(cliente.id, "cliente") for cliente in clientes],
+            "eventos": [evento.id for evento in eventos],
+        }
+
@@ -0,0 +1,113 @@
+"""
+Abertura de vendas concorrida com e sem fila de espera.
+
+--compradores clientes tentam comprar ao mesmo tempo o mesmo evento enquanto
+--leitores tarefas navegam pelo catálogo (GET /eventos e GET /empresas/{id}/eventos).
+Sem fila, todos chamam POST /ingressos de uma vez (repetindo em caso de erro);
+com fila, entram em /eventos/{id}/fila/entrar, consultam a posição respeitando o
+Retry-After e só compram quando admitidos. Para cada cenário mostra a latência
+do catálogo durante a rajada, o tempo até a última compra e os erros de compra.
+
+Uso (a partir de cyberpunk-eventos-backend/):
+    python -m benchmarks.fila_espera --compradores 300 --leitores 8 --taxa 30
+    FILA_BACKEND=utils.fila_espera:BackendFilaSQLite python -m benchmarks.fila_espera
+"""
+import argparse
+import asyncio
+import time
+
+from benchmarks.comum import configurar_banco_temporario, remover_banco_temporario, cliente_http, percentil, semear_compradores
+
+
+async def cenario(cliente, dados: dict, evento_id: int, leitores: int, taxa: float = None) -> dict:
+    compra = {
+        "evento_id": evento_id, "quantidade": 2, "metodo_pagamento": "pix",
+        "nome_comprador": "Cliente", "email_comprador": "cliente@bench.dev", "cpf_comprador": "00000000000"
+    }
+    if taxa:
+        resposta = await cliente.put(f"/eventos/{evento_id}/fila", headers=dados["empresa"],
+                                     json={"admissoes_por_segundo": taxa, "rajada": 0})
+        resposta.raise_for_status()
+
+    latencias_catalogo, erros = [], {"compra": 0, "catalogo": 0}
+    consultas_fila = 0
+    terminou = asyncio.Event()
+
+    async def comprador(cabecalhos: dict):
+        nonlocal consultas_fila
+        if taxa:
+            resposta = await cliente.post(f"/eventos/{evento_id}/fila/entrar", headers=cabecalhos)
+            while not resposta.json()["admitido"]:
+                await asyncio.sleep(int(resposta.headers["Retry-After"]))
+                resposta = await cliente.get(f"/eventos/{evento_id}/fila/{resposta.json()['token']}", headers=cabecalhos)
+                consultas_fila += 1
+            situacao = resposta.json()
+            cabecalhos = {**cabecalhos, "X-Fila-Token": situacao["token"]}
+        while True:
+            resposta = await cliente.post("/ingressos", headers=cabecalhos, json=compra)
+            if resposta.status_code == 201:
+                return
+            erros["compra"] += 1
+
+    async def leitor():
+        while not terminou.is_set():
+            for url in ("/eventos?limite=20", f"/empresas/{dados['empresa_id']}/eventos"):
+                inicio = time.perf_counter()
+                resposta = await cliente.get(url)
+                latencias_catalogo.append(time.perf_counter() - inicio)
+                erros["catalogo"] += resposta.status_code >= 400
+
+    inicio = time.perf_counter()
+    tarefas_leitura = [asyncio.create_task(leitor()) for _ in range(leitores)]
+    await asyncio.gather(*(comprador(cabecalhos) for cabecalhos in dados["clientes"]))
+    duracao = time.perf_counter() - inicio
+    terminou.set()
+    await asyncio.gather(*tarefas_leitura)
+
+    return {
+        "duracao_s": duracao,
+        "catalogo_por_s": len(latencias_catalogo) / duracao,
+        "catalogo_p50_ms": percentil(latencias_catalogo, 50) * 1000,
+        "catalogo_p99_ms": percentil(latencias_catalogo, 99) * 1000,
+        "catalogo_max_ms": max(latencias_catalogo, default=0) * 1000,
+        "erros_compra": erros["compra"],
+        "erros_catalogo": erros["catalogo"],
+        "consultas_fila": consultas_fila,
+    }
+
+
+async def executar(compradores: int, leitores: int, taxa: float) -> None:
+    dados = await semear_compradores(compradores)
+    async with cliente_http() as cliente:
+        resultados = {
+            "sem fila": await cenario(cliente, dados, dados["eventos"][0], leitores),
+            f"fila ({taxa:g}/s)": await cenario(cliente, dados, dados["eventos"][1], leitores, taxa),
+        }
+
+    colunas = [
+        ("duracao_s", "duração s", ".1f"), ("catalogo_por_s", "catálogo/s", ".0f"),
+        ("catalogo_p50_ms", "p50 ms", ".1f"), ("catalogo_p99_ms", "p99 ms", ".1f"),
+        ("catalogo_max_ms", "máx ms", ".1f"), ("erros_compra", "erros compra", "d"),
+        ("erros_catalogo", "erros catálogo", "d"), ("consultas_fila", "consultas fila", "d"),
+    ]
+    print(f"{'cenário':<16}" + "".join(f"{titulo:>16}" for _, titulo, _ in colunas))
+    for nome, resultado in resultados.items():
+        print(f"{nome:<16}" + "".join(f"{resultado[chave]:>16{formato}}" for chave, _, formato in colunas))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--compradores", type=int, default=300, help="Clientes comprando na abertura")
+    parser.add_argument("--leitores", type=int, default=8, help="Tarefas navegando no catálogo durante a rajada")
+    parser.add_argument("--taxa", type=float, default=30, help="Admissões por segundo no cenário com fila (abaixo da vazão de compras)")
+    args = parser.parse_args()
+
+    pasta = configurar_banco_temporario()
+    try:
+        asyncio.run(executar(args.compradores, args.leitores, args.taxa))
+    finally:
+        remover_banco_temporario(pasta)
+
+
+if __name__ == "__main__":
+    main()
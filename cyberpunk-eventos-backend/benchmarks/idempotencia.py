@@ -0,0 +1,91 @@
+"""
+Custo das repetições de compra com Idempotency-Key.
+
+Cada um dos --clientes clientes envia a mesma compra (mesma chave) --repeticoes
+vezes ao mesmo tempo, simulando um app que reenvia após timeout, e depois repete
+mais --repeticoes vezes em sequência. Compara latência e consultas SQL da compra
+original com as repetições e confere que só uma compra por chave foi feita
+(sai com código 1 caso contrário).
+
+Uso (a partir de cyberpunk-eventos-backend/):
+    python -m benchmarks.idempotencia --clientes 50 --repeticoes 5
+"""
+import argparse
+import asyncio
+import sys
+import time
+
+from benchmarks.comum import configurar_banco_temporario, remover_banco_temporario, cliente_http, percentil, semear_compradores
+
+QUANTIDADE = 2
+
+
+async def executar(clientes: int, repeticoes: int) -> bool:
+    from sqlalchemy import func, select
+    from database.database import AsyncSessionLocal
+    from database.models import Pagamento, Evento
+    from utils.consultas import CABECALHO_CONSULTAS
+    from utils.idempotencia import CABECALHO_IDEMPOTENCIA, CABECALHO_REPETICAO
+
+    dados = await semear_compradores(clientes)
+    evento_id = dados["eventos"][0]
+    compra = {
+        "evento_id": evento_id, "quantidade": QUANTIDADE, "metodo_pagamento": "pix",
+        "nome_comprador": "Cliente", "email_comprador": "cliente@bench.dev", "cpf_comprador": "00000000000"
+    }
+    medidas = {"original": [], "repetição simultânea": [], "repetição posterior": []}
+    consultas = {nome: set() for nome in medidas}
+
+    async with cliente_http() as cliente:
+        async def enviar(cabecalhos: dict, simultanea: bool):
+            inicio = time.perf_counter()
+            resposta = await cliente.post("/ingressos", headers=cabecalhos, json=compra)
+            duracao = time.perf_counter() - inicio
+            resposta.raise_for_status()
+            if resposta.headers.get(CABECALHO_REPETICAO) is None:
+                nome = "original"
+            else:
+                nome = "repetição simultânea" if simultanea else "repetição posterior"
+            medidas[nome].append(duracao)
+            consultas[nome].add(int(resposta.headers[CABECALHO_CONSULTAS]))
+            return resposta.json()["id"]
+
+        async def comprador(numero: int, cabecalhos: dict) -> set:
+            cabecalhos = {**cabecalhos, CABECALHO_IDEMPOTENCIA: f"compra-{numero}"}
+            ids = set(await asyncio.gather(*(enviar(cabecalhos, True) for _ in range(repeticoes))))
+            for _ in range(repeticoes):
+                ids.add(await enviar(cabecalhos, False))
+            return ids
+
+        ids_por_cliente = await asyncio.gather(*(comprador(i, c) for i, c in enumerate(dados["clientes"])))
+
+    async with AsyncSessionLocal() as sessao:
+        pagamentos = (await sessao.execute(select(func.count(Pagamento.id)))).scalar_one()
+        vendidos = (await sessao.execute(select(Evento.ingressos_vendidos).where(Evento.id == evento_id))).scalar_one()
+
+    print(f"{'requisição':<24}{'quantidade':>12}{'p50 ms':>10}{'p99 ms':>10}{'consultas SQL':>16}")
+    for nome, latencias in medidas.items():
+        print(f"{nome:<24}{len(latencias):>12}{percentil(latencias, 50) * 1000:>10.2f}"
+              f"{percentil(latencias, 99) * 1000:>10.2f}{'/'.join(map(str, sorted(consultas[nome]))):>16}")
+
+    ok = all(len(ids) == 1 for ids in ids_por_cliente) and pagamentos == clientes and vendidos == clientes * QUANTIDADE
+    print(f"{pagamentos} pagamentos e {vendidos} ingressos vendidos para {clientes} chaves: {'ok' if ok else 'DUPLICADOS'}")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clientes", type=int, default=50, help="Clientes, cada um com uma chave")
+    parser.add_argument("--repeticoes", type=int, default=5, help="Envios simultâneos e posteriores por chave")
+    args = parser.parse_args()
+
+    pasta = configurar_banco_temporario()
+    try:
+        ok = asyncio.run(executar(args.clientes, args.repeticoes))
+    finally:
+        remover_banco_temporario(pasta)
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
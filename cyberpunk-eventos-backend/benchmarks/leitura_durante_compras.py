@@ -0,0 +1,154 @@
+"""
+Vazão de leitura do catálogo durante uma rajada de compras concorrentes.
+
+Executa o mesmo cenário em cada perfil de banco (PERFIL_BANCO=desenvolvimento e
+producao), cada um em um subprocesso com seu próprio banco SQLite temporário, e
+compara leituras/s e latência do catálogo enquanto compradores disputam o escritor.
+
+Uso (a partir de cyberpunk-eventos-backend/):
+    python -m benchmarks.leitura_durante_compras --duracao 5 --leitores 16 --compradores 16
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+from datetime import datetime, timedelta
+
+from benchmarks.comum import configurar_banco_temporario, remover_banco_temporario, criar_esquema, percentil
+
+PERFIS = ["desenvolvimento", "producao"]
+
+
+async def executar_cenario(duracao: float, leitores: int, compradores: int, eventos: int) -> dict:
+    from fastapi import HTTPException
+    from sqlalchemy import select
+    from sqlalchemy.orm import selectinload
+    from database.database import AsyncSessionLocal, AsyncSessionLeitura, encerrar_engines
+    from database.models import Empresa, Cliente, Evento
+    from routers.events import _montar_evento_publico
+    from routers.tickets import comprar_ingresso
+    from schemas import IngressoCriar, MetodoPagamento
+    from utils.paginacao import paginar_eventos
+
+    await criar_esquema()
+
+    async with AsyncSessionLocal() as sessao:
+        empresa = Empresa(nome="Organizadora", email="org@bench.dev", senha="-")
+        cliente = Cliente(nome="Comprador", email="cliente@bench.dev", senha="-")
+        sessao.add_all([empresa, cliente])
+        await sessao.flush()
+        data_fim = datetime.utcnow() + timedelta(days=30)
+        sessao.add_all([
+            Evento(
+                nome=f"Evento {i}",
+                localizacao="Night City",
+                data_fim=data_fim,
+                preco_ingresso=1000,
+                total_ingressos=1_000_000,
+                organizador_id=empresa.id
+            )
+            for i in range(eventos)
+        ])
+        await sessao.commit()
+        cliente_id = cliente.id
+
+    dados = IngressoCriar(
+        evento_id=1,
+        quantidade=2,
+        metodo_pagamento=MetodoPagamento.PIX,
+        nome_comprador="Comprador",
+        email_comprador="cliente@bench.dev",
+        cpf_comprador="00000000000"
+    )
+    latencias_leitura, latencias_compra = [], []
+    erros = {"leitura": 0, "compra": 0}
+    fim = time.perf_counter() + duracao
+
+    async def ler_catalogo():
+        consulta = paginar_eventos(
+            select(Evento).options(selectinload(Evento.organizador)).where(Evento.ativo == True),
+            None,
+            100
+        )
+        while time.perf_counter() < fim:
+            inicio = time.perf_counter()
+            try:
+                async with AsyncSessionLeitura() as sessao:
+                    eventos_pagina = (await sessao.execute(consulta)).scalars().all()
+                    [_montar_evento_publico(evento) for evento in eventos_pagina]
+                latencias_leitura.append(time.perf_counter() - inicio)
+            except Exception:
+                erros["leitura"] += 1
+
+    async def comprar():
+        while time.perf_counter() < fim:
+            inicio = time.perf_counter()
+            try:
+                async with AsyncSessionLocal() as sessao:
+                    await comprar_ingresso(
+                        dados, {"usuario_id": cliente_id, "tipo_usuario": "cliente"}, sessao,
+                        fila_token=None, chave_idempotencia=None
+                    )
+                latencias_compra.append(time.perf_counter() - inicio)
+            except (HTTPException, Exception):
+                erros["compra"] += 1
+
+    await asyncio.gather(
+        *(ler_catalogo() for _ in range(leitores)),
+        *(comprar() for _ in range(compradores))
+    )
+    await encerrar_engines()
+
+    return {
+        "leituras_por_s": len(latencias_leitura) / duracao,
+        "leitura_p50_ms": percentil(latencias_leitura, 50) * 1000,
+        "leitura_p99_ms": percentil(latencias_leitura, 99) * 1000,
+        "compras_por_s": len(latencias_compra) / duracao,
+        "compra_p99_ms": percentil(latencias_compra, 99) * 1000,
+        "erros_leitura": erros["leitura"],
+        "erros_compra": erros["compra"],
+    }
+
+
+def executar_perfil(perfil: str, args) -> dict:
+    """Rodar o cenário em um subprocesso, já que o perfil é lido na importação do módulo de banco"""
+    ambiente = {**os.environ, "PERFIL_BANCO": perfil, "DATABASE_ECHO": "false"}
+    comando = [
+        sys.executable, "-m", "benchmarks.leitura_durante_compras", "--interno",
+        "--duracao", str(args.duracao), "--leitores", str(args.leitores),
+        "--compradores", str(args.compradores), "--eventos", str(args.eventos)
+    ]
+    saida = subprocess.run(comando, env=ambiente, capture_output=True, text=True, check=True).stdout
+    return json.loads(saida.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--duracao", type=float, default=5.0, help="Segundos de carga por perfil")
+    parser.add_argument("--leitores", type=int, default=16, help="Tarefas lendo o catálogo")
+    parser.add_argument("--compradores", type=int, default=16, help="Tarefas comprando ingressos")
+    parser.add_argument("--eventos", type=int, default=500, help="Eventos no catálogo")
+    parser.add_argument("--interno", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.interno:
+        pasta = configurar_banco_temporario()
+        try:
+            resultado = asyncio.run(executar_cenario(args.duracao, args.leitores, args.compradores, args.eventos))
+        finally:
+            remover_banco_temporario(pasta)
+        print(json.dumps(resultado))
+        return
+
+    resultados = {perfil: executar_perfil(perfil, args) for perfil in PERFIS}
+    colunas = list(next(iter(resultados.values())).keys())
+    print(f"{'métrica':<18}" + "".join(f"{perfil:>18}" for perfil in PERFIS))
+    for coluna in colunas:
+        print(f"{coluna:<18}" + "".join(f"{resultados[perfil][coluna]:>18.1f}" for perfil in PERFIS))
+
+
+if __name__ == "__main__":
+    main()
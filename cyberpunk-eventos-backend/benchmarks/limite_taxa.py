@@ -0,0 +1,216 @@
+"""
+Custo e comportamento do limite de requisições (MiddlewareLimiteTaxa).
+
+Compara o mesmo app trivial com e sem o middleware, chamando o app ASGI
+diretamente como em benchmarks/metricas.py: rota sem política, rota limitada
+por IP e rota limitada com JWT (principal pelo cache de tokens), com o backend
+em memória e com o SQLite compartilhado. Os limites do cenário são altos para
+que nenhuma requisição seja recusada e a diferença seja só a da contagem. Com um
+relógio simulado, confere as políticas padrão nos dois backends (o 11º login do
+mesmo IP em um minuto recebe 429 com Retry-After, e a vaga reabre nesse prazo),
+mede a memória por chave e o despejo das chaves ociosas. Sai com código 1 se
+alguma conferência falhar.
+
+Uso (a partir de cyberpunk-eventos-backend/):
+    python -m benchmarks.limite_taxa --requisicoes 20000 --rodadas 5 --chaves 100000
+"""
+import argparse
+import asyncio
+import sys
+import time
+import tracemalloc
+
+from benchmarks.comum import configurar_banco_temporario, remover_banco_temporario, percentil
+
+
+def montar_app(backend=None):
+    from fastapi import FastAPI
+    from utils.limite_taxa import MiddlewareLimiteTaxa, Politica
+
+    app = FastAPI()
+    if backend is not None:
+        politicas = {("GET", "/eventos"): Politica("catalogo", 10**9, 60)}
+        app.add_middleware(MiddlewareLimiteTaxa, politicas=politicas, backend=backend)
+
+    @app.get("/eventos")
+    async def listar():
+        return []
+
+    @app.get("/eventos/{evento_id}")
+    async def obter(evento_id: int):
+        return {"id": evento_id}
+
+    return app
+
+
+def _scope(metodo: str, caminho: str, cabecalhos: list, ip: str = "10.0.0.1") -> dict:
+    return {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": metodo,
+        "scheme": "http", "path": caminho, "raw_path": caminho.encode(),
+        "root_path": "", "query_string": b"", "headers": cabecalhos, "server": ("bench", 80), "client": (ip, 1),
+    }
+
+
+async def medir(app, caminho: str, cabecalhos: list, requisicoes: int) -> dict:
+    async def receber():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def enviar(_mensagem):
+        pass
+
+    for _ in range(1000):  # Aquecimento
+        await app(_scope("GET", caminho, cabecalhos), receber, enviar)
+
+    amostras = []
+    inicio_total = time.perf_counter()
+    for _ in range(requisicoes):
+        inicio = time.perf_counter()
+        await app(_scope("GET", caminho, cabecalhos), receber, enviar)
+        amostras.append(time.perf_counter() - inicio)
+    total = time.perf_counter() - inicio_total
+
+    return {
+        "media_us": total / requisicoes * 1e6,
+        "p50_us": percentil(amostras, 50) * 1e6,
+        "p99_us": percentil(amostras, 99) * 1e6,
+    }
+
+
+class Relogio:
+    def __init__(self):
+        self.agora = 1000.0
+
+    def __call__(self) -> float:
+        return self.agora
+
+
+async def conferir_politicas(classe_backend) -> bool:
+    """Login do mesmo IP com as políticas padrão e o tempo simulado"""
+    from utils.limite_taxa import MiddlewareLimiteTaxa
+
+    relogio = Relogio()
+    respostas = []
+
+    async def rota(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b""})
+
+    middleware = MiddlewareLimiteTaxa(rota, backend=classe_backend(relogio=relogio))
+
+    async def login(ip: str = "10.0.0.1") -> tuple:
+        inicio = {}
+
+        async def enviar(mensagem):
+            if mensagem["type"] == "http.response.start":
+                inicio.update(mensagem)
+
+        async def receber():
+            return {"type": "http.request", "body": b"", "more_body": False}
+
+        await middleware(_scope("POST", "/auth/login", [], ip), receber, enviar)
+        cabecalhos = dict(inicio["headers"])
+        return inicio["status"], int(cabecalhos.get(b"retry-after", 0))
+
+    for _ in range(10):
+        respostas.append(await login())
+        relogio.agora += 1
+    recusada, retry_after = await login()
+    outro_ip = await login("10.0.0.2")
+    relogio.agora += retry_after - 1
+    antes_do_prazo = await login()
+    relogio.agora += 1
+    depois_do_prazo = await login()
+
+    ok = (all(status == 200 for status, _ in respostas) and recusada == 429 and retry_after > 0
+          and outro_ip[0] == 200 and antes_do_prazo[0] == 429 and depois_do_prazo[0] == 200)
+    print(f"{classe_backend.__name__}: 10 logins aceitos, 11º: {recusada} com Retry-After {retry_after} s; outro IP: {outro_ip[0]}; "
+          f"antes do prazo: {antes_do_prazo[0]}, no prazo: {depois_do_prazo[0]}: {'ok' if ok else 'FALHOU'}")
+    return ok
+
+
+async def conferir_memoria(chaves: int) -> bool:
+    """Memória por chave e despejo das chaves ociosas"""
+    from utils.limite_taxa import BackendLimiteMemoria
+
+    relogio = Relogio()
+    backend = BackendLimiteMemoria(maximo_chaves=chaves, relogio=relogio)
+    tracemalloc.start()
+    antes = tracemalloc.take_snapshot()
+    for i in range(chaves):
+        await backend.registrar(f"catalogo|ip:10.{i >> 16 & 255}.{i >> 8 & 255}.{i & 255}", 300, 60)
+    depois = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    por_chave = sum(e.size_diff for e in depois.compare_to(antes, "filename")) / chaves
+
+    # Passadas duas janelas sem uso, uma chave nova despeja as ociosas
+    relogio.agora += 120
+    await backend.registrar("catalogo|ip:10.255.255.255", 300, 60)
+    ociosas_despejadas = len(backend) == 1
+
+    # Acima do máximo, as chaves usadas há mais tempo saem primeiro
+    for i in range(chaves + 10):
+        await backend.registrar(f"catalogo|principal:{i}", 300, 60)
+    no_maximo = len(backend) == chaves
+
+    ok = ociosas_despejadas and no_maximo
+    print(f"{chaves} chaves: {por_chave:.0f} bytes por chave; despejo das ociosas: {ociosas_despejadas}, "
+          f"máximo respeitado: {no_maximo}: {'ok' if ok else 'FALHOU'}")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requisicoes", type=int, default=20_000, help="Requisições por cenário em cada rodada")
+    parser.add_argument("--rodadas", type=int, default=5, help="Rodadas alternando os cenários")
+    parser.add_argument("--chaves", type=int, default=100_000, help="Chaves distintas na medida de memória")
+    args = parser.parse_args()
+
+    pasta = configurar_banco_temporario()  # Também aponta o estado compartilhado para a pasta temporária
+    try:
+        ok = executar(args.requisicoes, args.rodadas, args.chaves)
+    finally:
+        remover_banco_temporario(pasta)
+    sys.exit(0 if ok else 1)
+
+
+def executar(requisicoes: int, rodadas: int, chaves: int) -> bool:
+    from utils.auth import criar_token_acesso
+    from utils.limite_taxa import BackendLimiteMemoria, BackendLimiteSQLite
+
+    token = criar_token_acesso({"sub": "1", "tipo_usuario": "cliente"})
+    cenarios = {
+        "rota sem política": ("/eventos/1", []),
+        "limitada por IP": ("/eventos", []),
+        "limitada com JWT": ("/eventos", [(b"authorization", f"Bearer {token}".encode())]),
+    }
+    apps = {
+        "sem limite": montar_app(),
+        "memória": montar_app(BackendLimiteMemoria()),
+        "SQLite": montar_app(BackendLimiteSQLite()),
+    }
+    medidas = {(cenario, nome): [] for cenario in cenarios for nome in apps}
+    for _ in range(rodadas):
+        for cenario, (caminho, cabecalhos) in cenarios.items():
+            for nome, app in apps.items():
+                medidas[cenario, nome].append(asyncio.run(medir(app, caminho, cabecalhos, requisicoes)))
+
+    print(f"{'cenário':<20}{'métrica':<10}" + "".join(f"{nome:>12}" for nome in apps) + "  (diferença para sem limite)")
+    for cenario in cenarios:
+        minimos = {nome: {coluna: min(r[coluna] for r in medidas[cenario, nome]) for coluna in medidas[cenario, nome][0]}
+                   for nome in apps}
+        for coluna in minimos["sem limite"]:
+            base = minimos["sem limite"][coluna]
+            valores = "".join(
+                f"{base:>12.1f}" if nome == "sem limite" else f"{minimos[nome][coluna] - base:>+12.1f}" for nome in apps
+            )
+            print(f"{cenario:<20}{coluna:<10}{valores}")
+    print()
+
+    ok = asyncio.run(conferir_politicas(BackendLimiteMemoria))
+    ok = asyncio.run(conferir_politicas(BackendLimiteSQLite)) and ok
+    ok = asyncio.run(conferir_memoria(chaves)) and ok
+    return ok
+
+
+if __name__ == "__main__":
+    main()
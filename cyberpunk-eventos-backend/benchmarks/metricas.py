@@ -0,0 +1,131 @@
+"""
+Custo das métricas por requisição (MiddlewareMetricas).
+
+Compara o mesmo endpoint trivial com e sem instrumentação, chamando o app ASGI
+diretamente (sem rede, sem banco) para que a diferença seja só a das métricas.
+Os cenários se alternam por várias rodadas e vale o menor valor de cada uma, o
+que filtra o ruído da máquina.
+Também mede a agregação isolada, a memória retida depois de muitas requisições e
+o tempo de uma coleta do /metrics.
+
+Uso (a partir de cyberpunk-eventos-backend/):
+    python -m benchmarks.metricas --requisicoes 20000 --rodadas 5
+"""
+import argparse
+import asyncio
+import time
+import tracemalloc
+
+from benchmarks.comum import percentil
+
+
+def montar_app(instrumentado: bool):
+    from fastapi import FastAPI
+    from utils.metricas import MiddlewareMetricas
+
+    app = FastAPI()
+    if instrumentado:
+        app.add_middleware(MiddlewareMetricas)
+
+    @app.get("/eventos/{evento_id}")
+    async def obter(evento_id: int):
+        return {"id": evento_id}
+
+    return app
+
+
+async def medir(app, requisicoes: int) -> dict:
+    async def receber():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def enviar(_mensagem):
+        pass
+
+    def scope(i):
+        return {
+            "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+            "scheme": "http", "path": f"/eventos/{i}", "raw_path": f"/eventos/{i}".encode(),
+            "root_path": "", "query_string": b"", "headers": [], "server": ("bench", 80), "client": ("c", 1),
+        }
+
+    for i in range(1000):  # Aquecimento
+        await app(scope(i), receber, enviar)
+
+    amostras = []
+    inicio_total = time.perf_counter()
+    for i in range(requisicoes):
+        inicio = time.perf_counter()
+        await app(scope(i), receber, enviar)
+        amostras.append(time.perf_counter() - inicio)
+    total = time.perf_counter() - inicio_total
+
+    return {
+        "media_us": total / requisicoes * 1e6,
+        "p50_us": percentil(amostras, 50) * 1e6,
+        "p99_us": percentil(amostras, 99) * 1e6,
+    }
+
+
+def medir_agregacao(chamadas: int) -> dict:
+    """Só metricas_rota + histograma + contagem por código, como no fim do middleware"""
+    from utils.metricas import metricas_rota, limpar_metricas
+
+    class Rota:
+        path_format = "/eventos/{evento_id}"
+
+    limpar_metricas()
+    scope = {"route": Rota(), "method": "GET"}
+    metricas_rota(scope)
+
+    inicio = time.perf_counter()
+    for i in range(chamadas):
+        metricas = metricas_rota(scope)
+        metricas.latencia.observar(0.003)
+        metricas.respostas[200] = metricas.respostas.get(200, 0) + 1
+    por_chamada_ns = (time.perf_counter() - inicio) / chamadas * 1e9
+
+    # Memória retida pela agregação depois de mais chamadas (deve ficar perto de zero)
+    tracemalloc.start()
+    antes = tracemalloc.take_snapshot()
+    for i in range(chamadas):
+        metricas = metricas_rota(scope)
+        metricas.latencia.observar(0.003)
+        metricas.respostas[200] = metricas.respostas.get(200, 0) + 1
+    depois = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    retida = sum(estatistica.size_diff for estatistica in depois.compare_to(antes, "filename")
+                 if "metricas" in str(estatistica.traceback))
+
+    return {"por_chamada_ns": por_chamada_ns, "memoria_retida_bytes": retida}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requisicoes", type=int, default=20_000, help="Requisições por cenário em cada rodada")
+    parser.add_argument("--rodadas", type=int, default=5, help="Rodadas alternando os cenários")
+    args = parser.parse_args()
+
+    from utils.metricas import gerar_texto
+
+    apps = {"sem": montar_app(False), "com": montar_app(True)}
+    rodadas = {"sem": [], "com": []}
+    for _ in range(args.rodadas):
+        for nome, app in apps.items():
+            rodadas[nome].append(asyncio.run(medir(app, args.requisicoes)))
+    sem, com = ({coluna: min(r[coluna] for r in rodadas[nome]) for coluna in rodadas[nome][0]} for nome in ("sem", "com"))
+
+    print(f"{'métrica':<12}{'sem métricas':>16}{'com métricas':>16}{'diferença':>12}")
+    for coluna in sem:
+        print(f"{coluna:<12}{sem[coluna]:>16.1f}{com[coluna]:>16.1f}{com[coluna] - sem[coluna]:>12.1f}")
+
+    inicio = time.perf_counter()
+    texto = gerar_texto()
+    print(f"\ncoleta do /metrics: {(time.perf_counter() - inicio) * 1e3:.2f} ms, {len(texto)} bytes")
+
+    agregacao = medir_agregacao(args.requisicoes)
+    print(f"agregação por requisição: {agregacao['por_chamada_ns']:.0f} ns, "
+          f"memória retida após {args.requisicoes} chamadas: {agregacao['memoria_retida_bytes']} bytes")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+"""
+Latência do catálogo durante uma rajada de logins concorrentes.
+
+Compara dois modos no mesmo processo:
+  - bloqueante: Argon2 chamado direto no event loop (comportamento antigo)
+  - pool: verificar_senha no executor dedicado (utils.auth)
+
+Para cada modo mede a latência de leitura do catálogo antes (linha de base) e
+durante a rajada de logins, além da latência dos próprios logins e de quantos
+foram recusados com 503 pelo limite de pendentes.
+
+Uso (a partir de cyberpunk-eventos-backend/):
+    python -m benchmarks.tempestade_login --logins 100 --leitores 8
+"""
+import argparse
+import asyncio
+import time
+from datetime import datetime, timedelta
+
+from benchmarks.comum import configurar_banco_temporario, remover_banco_temporario, criar_esquema, percentil
+
+MODOS = ["bloqueante", "pool"]
+SENHA = "senha-do-benchmark"
+
+
+async def preparar_dados(eventos: int) -> None:
+    from database.database import AsyncSessionLocal
+    from database.models import Empresa, Cliente, Evento
+    from utils.auth import hash_senha
+
+    await criar_esquema()
+    async with AsyncSessionLocal() as sessao:
+        empresa = Empresa(nome="Organizadora", email="org@bench.dev", senha=hash_senha.hash(SENHA))
+        cliente = Cliente(nome="Cliente", email="cliente@bench.dev", senha=hash_senha.hash(SENHA))
+        sessao.add_all([empresa, cliente])
+        await sessao.flush()
+        data_fim = datetime.utcnow() + timedelta(days=30)
+        sessao.add_all([
+            Evento(
+                nome=f"Evento {i}",
+                localizacao="Night City",
+                data_fim=data_fim,
+                preco_ingresso=1000,
+                total_ingressos=100,
+                organizador_id=empresa.id
+            )
+            for i in range(eventos)
+        ])
+        await sessao.commit()
+
+
+async def executar_modo(modo: str, logins: int, leitores: int, linha_base: float) -> dict:
+    from fastapi import HTTPException
+    from sqlalchemy import select
+    from sqlalchemy.orm import selectinload
+    from database.database import AsyncSessionLocal, AsyncSessionLeitura
+    from database.models import Evento
+    from routers import auth as rotas_auth
+    from routers.events import _montar_evento_publico
+    from schemas import RequisicaoLogin
+    from utils import auth
+    from utils.paginacao import paginar_eventos
+
+    async def verificar_bloqueante(senha_plana: str, senha_hash: str) -> bool:
+        return auth._verificar_senha_sincrono(senha_plana, senha_hash)
+
+    verificar_original = rotas_auth.verificar_senha
+    if modo == "bloqueante":
+        rotas_auth.verificar_senha = verificar_bloqueante
+
+    consulta = paginar_eventos(
+        select(Evento).options(selectinload(Evento.organizador)).where(Evento.ativo == True),
+        None,
+        20
+    )
+    latencias = {"base": [], "rajada": []}
+    latencias_login = []
+    recusados = 0
+    fase = "base"
+    parar = asyncio.Event()
+
+    async def ler_catalogo():
+        while not parar.is_set():
+            inicio = time.perf_counter()
+            async with AsyncSessionLeitura() as sessao:
+                eventos_pagina = (await sessao.execute(consulta)).scalars().all()
+                [_montar_evento_publico(evento) for evento in eventos_pagina]
+            latencias[fase].append(time.perf_counter() - inicio)
+            await asyncio.sleep(0)
+
+    async def logar():
+        nonlocal recusados
+        dados = RequisicaoLogin(email="cliente@bench.dev", senha=SENHA, tipo_usuario="cliente")
+        inicio = time.perf_counter()
+        try:
+            async with AsyncSessionLocal() as sessao:
+                await rotas_auth.fazer_login(dados, sessao)
+            latencias_login.append(time.perf_counter() - inicio)
+        except HTTPException as erro:
+            if erro.status_code != 503:
+                raise
+            recusados += 1
+
+    tarefas_leitura = [asyncio.create_task(ler_catalogo()) for _ in range(leitores)]
+    await asyncio.sleep(linha_base)
+    fase = "rajada"
+    inicio_rajada = time.perf_counter()
+    await asyncio.gather(*(logar() for _ in range(logins)))
+    duracao_rajada = time.perf_counter() - inicio_rajada
+    parar.set()
+    await asyncio.gather(*tarefas_leitura)
+    rotas_auth.verificar_senha = verificar_original
+
+    return {
+        "catalogo_base_p99_ms": percentil(latencias["base"], 99) * 1000,
+        "catalogo_rajada_p50_ms": percentil(latencias["rajada"], 50) * 1000,
+        "catalogo_rajada_p99_ms": percentil(latencias["rajada"], 99) * 1000,
+        "catalogo_rajada_max_ms": max(latencias["rajada"], default=0) * 1000,
+        "login_p99_ms": percentil(latencias_login, 99) * 1000,
+        "rajada_s": duracao_rajada,
+        "logins_recusados": recusados,
+    }
+
+
+async def executar(args) -> dict:
+    from database.database import encerrar_engines
+    from utils.auth import encerrar_executor_senhas
+
+    await preparar_dados(args.eventos)
+    resultados = {modo: await executar_modo(modo, args.logins, args.leitores, args.linha_base) for modo in MODOS}
+    await encerrar_engines()
+    encerrar_executor_senhas()
+    return resultados
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--logins", type=int, default=100, help="Logins concorrentes na rajada")
+    parser.add_argument("--leitores", type=int, default=8, help="Tarefas lendo o catálogo")
+    parser.add_argument("--eventos", type=int, default=200, help="Eventos no catálogo")
+    parser.add_argument("--linha-base", type=float, default=2.0, help="Segundos de leitura antes da rajada")
+    args = parser.parse_args()
+
+    pasta = configurar_banco_temporario()
+    try:
+        resultados = asyncio.run(executar(args))
+    finally:
+        remover_banco_temporario(pasta)
+
+    colunas = list(resultados[MODOS[0]].keys())
+    print(f"{'métrica':<24}" + "".join(f"{modo:>14}" for modo in MODOS))
+    for coluna in colunas:
+        print(f"{coluna:<24}" + "".join(f"{resultados[modo][coluna]:>14.1f}" for modo in MODOS))
+
+
+if __name__ == "__main__":
+    main()
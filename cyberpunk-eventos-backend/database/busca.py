@@ -0,0 +1,63 @@
+import re
+from typing import Optional
+from sqlalchemy import table, column, Integer, Float, literal_column
+from sqlalchemy.engine import Connection
+
+# Índice FTS5 de conteúdo externo sobre eventos (nome, localizacao, descricao).
+# unicode61 + remove_diacritics torna a busca insensível a acentos ("sao" encontra "São").
+DDL_BUSCA_EVENTOS = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS eventos_busca USING fts5(
+        nome, localizacao, descricao,
+        content='eventos', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2',
+        prefix='2 3 4'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS eventos_busca_ai AFTER INSERT ON eventos BEGIN
+        INSERT INTO eventos_busca(rowid, nome, localizacao, descricao)
+        VALUES (new.id, new.nome, new.localizacao, new.descricao);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS eventos_busca_ad AFTER DELETE ON eventos BEGIN
+        INSERT INTO eventos_busca(eventos_busca, rowid, nome, localizacao, descricao)
+        VALUES ('delete', old.id, old.nome, old.localizacao, old.descricao);
+    END
+    """,
+    # Só reindexa quando colunas de texto mudam (compras atualizam o contador sem tocar no índice)
+    """
+    CREATE TRIGGER IF NOT EXISTS eventos_busca_au AFTER UPDATE OF nome, localizacao, descricao ON eventos BEGIN
+        INSERT INTO eventos_busca(eventos_busca, rowid, nome, localizacao, descricao)
+        VALUES ('delete', old.id, old.nome, old.localizacao, old.descricao);
+        INSERT INTO eventos_busca(rowid, nome, localizacao, descricao)
+        VALUES (new.id, new.nome, new.localizacao, new.descricao);
+    END
+    """,
+    # BM25 com peso maior para o nome, usado pela coluna oculta "rank"
+    "INSERT INTO eventos_busca(eventos_busca, rank) VALUES ('rank', 'bm25(10.0, 3.0, 1.0)')",
+]
+
+eventos_busca = table("eventos_busca", column("rowid", Integer), column("rank", Float))
+
+
+def criar_indice_busca(conn: Connection) -> None:
+    """Criar o índice FTS5 e os triggers de sincronização, e indexar eventos existentes"""
+    for ddl in DDL_BUSCA_EVENTOS:
+        conn.exec_driver_sql(ddl)
+    conn.exec_driver_sql("INSERT INTO eventos_busca(eventos_busca) VALUES ('rebuild')")
+
+
+def montar_consulta_fts(texto: str) -> Optional[str]:
+    """Converter texto livre em consulta FTS5 segura: todos os termos, com prefixo"""
+    termos = re.findall(r"\w+", texto)
+    if not termos:
+        return None
+    # Aspas evitam que palavras como AND/OR/NEAR sejam interpretadas como operadores
+    return " ".join(f'"{termo}"*' for termo in termos)
+
+
+def condicao_busca(consulta_fts: str):
+    """Cláusula MATCH sobre o índice de eventos"""
+    return literal_column("eventos_busca").op("MATCH")(consulta_fts)
@@ -0,0 +1,86 @@
+"""
+Manutenção da tabela vendas_consolidadas (rollup de vendas por hora).
+
+Reconstruir a partir de pagamentos (a partir de cyberpunk-eventos-backend/):
+    python -m database.consolidacao
+"""
+import asyncio
+from datetime import datetime
+from sqlalchemy import delete, func, select, insert, cast, Integer
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.engine import Connection
+from sqlalchemy.ext.asyncio import AsyncSession
+from database.models import Evento, Pagamento, VendaConsolidada, MetodoPagamento
+
+
+def truncar_hora(data: datetime) -> datetime:
+    """Início da hora de um datetime (chave do rollup)"""
+    return data.replace(minute=0, second=0, microsecond=0)
+
+
+async def registrar_venda(
+    db: AsyncSession,
+    organizador_id: int,
+    evento_id: int,
+    data_compra: datetime,
+    metodo_pagamento: MetodoPagamento,
+    quantidade: int,
+    receita_centavos: int
+) -> None:
+    """Somar uma compra ao rollup (upsert) na transação da própria compra"""
+    stmt = sqlite_insert(VendaConsolidada).values(
+        organizador_id=organizador_id,
+        evento_id=evento_id,
+        hora=truncar_hora(data_compra),
+        metodo_pagamento=metodo_pagamento,
+        quantidade_ingressos=quantidade,
+        receita_centavos=receita_centavos
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["organizador_id", "evento_id", "hora", "metodo_pagamento"],
+        set_={
+            "quantidade_ingressos": VendaConsolidada.quantidade_ingressos + stmt.excluded.quantidade_ingressos,
+            "receita_centavos": VendaConsolidada.receita_centavos + stmt.excluded.receita_centavos
+        }
+    )
+    await db.execute(stmt)
+
+
+def reconstruir_vendas_consolidadas(conn: Connection) -> None:
+    """Repopular o rollup inteiro a partir de pagamentos"""
+    # Mesmo formato de texto que o SQLAlchemy usa para DateTime no SQLite
+    hora = func.strftime("%Y-%m-%d %H:00:00.000000", Pagamento.criado_em)
+    consulta = (
+        select(
+            Evento.organizador_id,
+            Pagamento.evento_id,
+            hora,
+            Pagamento.metodo_pagamento,
+            func.sum(Pagamento.quantidade),
+            cast(func.round(func.sum(Pagamento.valor_total) * 100), Integer)
+        )
+        .join(Evento, Evento.id == Pagamento.evento_id)
+        .group_by(Evento.organizador_id, Pagamento.evento_id, hora, Pagamento.metodo_pagamento)
+    )
+
+    conn.execute(delete(VendaConsolidada))
+    conn.execute(
+        insert(VendaConsolidada).from_select(
+            ["organizador_id", "evento_id", "hora", "metodo_pagamento", "quantidade_ingressos", "receita_centavos"],
+            consulta
+        )
+    )
+
+
+async def _main() -> None:
+    from database.database import engine
+    from database.models import Base
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.run_sync(reconstruir_vendas_consolidadas)
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(_main())
@@ -1,18 +1,101 @@
+from sqlalchemy import event, delete
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
 from sqlalchemy.orm import declarative_base
 from dotenv import load_dotenv
+from datetime import datetime
+from database.models import ChaveIdempotencia
+from utils.metricas import pool_medido
+from utils.consultas import registrar_contagem_consultas
+import asyncio
+import logging
 import os
 
 load_dotenv()
 
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite+aiosqlite:///./database/cyberpunk.db")
 
-# Criar engine assíncrona
-engine = create_async_engine(
-    DATABASE_URL,
-    echo=True,
-    connect_args={"check_same_thread": False} if "sqlite" in DATABASE_URL else {}
-)
+# Perfil do banco: "desenvolvimento" (padrão) ou "producao"
+PERFIL_BANCO = os.getenv("PERFIL_BANCO", "desenvolvimento").lower()
+EM_PRODUCAO = PERFIL_BANCO == "producao"
+E_SQLITE = "sqlite" in DATABASE_URL
+PERFIL_SQLITE_PRODUCAO = EM_PRODUCAO and E_SQLITE
+
+# Log de todas as consultas só por padrão em desenvolvimento
+DATABASE_ECHO = os.getenv("DATABASE_ECHO", "false" if EM_PRODUCAO else "true").lower() == "true"
+
+# Contagem de consultas por requisição: cabeçalho de depuração (padrão só em desenvolvimento)
+# e aviso no log acima do orçamento
+SQL_CABECALHO_CONSULTAS = os.getenv("SQL_CABECALHO_CONSULTAS", "false" if EM_PRODUCAO else "true").lower() == "true"
+SQL_ORCAMENTO_CONSULTAS = int(os.getenv("SQL_ORCAMENTO_CONSULTAS", "15"))
+
+# Pragmas aplicados em cada conexão no perfil de produção
+PRAGMAS_PRODUCAO = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "busy_timeout": int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000")),
+    "mmap_size": int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024))),
+    "cache_size": int(os.getenv("SQLITE_CACHE_SIZE", "-65536")),  # Negativo = KiB (64 MiB)
+    "temp_store": "MEMORY",
+}
+TAMANHO_POOL_ESCRITA = int(os.getenv("SQLITE_POOL_ESCRITA", "1"))
+TAMANHO_POOL_LEITURA = int(os.getenv("SQLITE_POOL_LEITURA", "8"))
+INTERVALO_CHECKPOINT = int(os.getenv("SQLITE_INTERVALO_CHECKPOINT", "300"))  # Segundos
+INTERVALO_OPTIMIZE = int(os.getenv("SQLITE_INTERVALO_OPTIMIZE", "3600"))  # Segundos
+
+logger = logging.getLogger(__name__)
+
+connect_args = {"check_same_thread": False} if E_SQLITE else {}
+
+# Bancos em memória usam um pool estático (uma conexão só), sem espera a medir
+E_MEMORIA = E_SQLITE and (":memory:" in DATABASE_URL or "mode=memory" in DATABASE_URL)
+
+
+def _aplicar_pragmas(somente_leitura: bool):
+    """Listener de conexão que configura o SQLite para o perfil de produção"""
+    def ao_conectar(conexao_dbapi, _registro):
+        cursor = conexao_dbapi.cursor()
+        for nome, valor in PRAGMAS_PRODUCAO.items():
+            cursor.execute(f"PRAGMA {nome}={valor}")
+        if somente_leitura:
+            cursor.execute("PRAGMA query_only=ON")
+        cursor.close()
+    return ao_conectar
+
+
+if PERFIL_SQLITE_PRODUCAO:
+    # Um único escritor: SQLite serializa escritas de qualquer forma, e a fila fica no pool
+    engine = create_async_engine(
+        DATABASE_URL,
+        echo=DATABASE_ECHO,
+        connect_args=connect_args,
+        pool_size=TAMANHO_POOL_ESCRITA,
+        max_overflow=0,
+        poolclass=pool_medido("escrita")
+    )
+    # Leitores em WAL não bloqueiam nem são bloqueados pelo escritor
+    engine_leitura = create_async_engine(
+        DATABASE_URL,
+        echo=DATABASE_ECHO,
+        connect_args=connect_args,
+        pool_size=TAMANHO_POOL_LEITURA,
+        max_overflow=0,
+        poolclass=pool_medido("leitura")
+    )
+    event.listen(engine.sync_engine, "connect", _aplicar_pragmas(somente_leitura=False))
+    event.listen(engine_leitura.sync_engine, "connect", _aplicar_pragmas(somente_leitura=True))
+else:
+    # Criar engine assíncrona
+    engine = create_async_engine(
+        DATABASE_URL,
+        echo=DATABASE_ECHO,
+        connect_args=connect_args,
+        **({} if E_MEMORIA else {"poolclass": pool_medido("principal")})
+    )
+    engine_leitura = engine
+
+registrar_contagem_consultas(engine.sync_engine)
+if engine_leitura is not engine:
+    registrar_contagem_consultas(engine_leitura.sync_engine)
 
 # Criar sessão assíncrona
 AsyncSessionLocal = async_sessionmaker(
@@ -23,6 +106,15 @@ AsyncSessionLocal = async_sessionmaker(
     autoflush=False
 )
 
+# Sessão para endpoints somente leitura
+AsyncSessionLeitura = async_sessionmaker(
+    engine_leitura,
+    class_=AsyncSession,
+    expire_on_commit=False,
+    autocommit=False,
+    autoflush=False
+)
+
 
 # Dependência
 async def obter_db():
@@ -31,3 +123,45 @@ async def obter_db():
             yield sessao
         finally:
             await sessao.close()
+
+
+# Dependência para endpoints que só leem (pool de leitura no perfil de produção)
+async def obter_db_leitura():
+    async with AsyncSessionLeitura() as sessao:
+        try:
+            yield sessao
+        finally:
+            await sessao.close()
+
+
+async def executar_manutencao():
+    """Tarefa periódica: limpeza das chaves de idempotência vencidas e, no perfil de
+    produção do SQLite, PRAGMA optimize e checkpoint do WAL"""
+    if PERFIL_SQLITE_PRODUCAO:
+        async with engine.connect() as conn:
+            await conn.exec_driver_sql("PRAGMA optimize")
+
+    decorrido = 0
+    while True:
+        await asyncio.sleep(INTERVALO_CHECKPOINT)
+        decorrido += INTERVALO_CHECKPOINT
+        try:
+            async with engine.connect() as conn:
+                # Chaves de idempotência vencidas já não são devolvidas; só ocupam espaço
+                await conn.execute(delete(ChaveIdempotencia).where(ChaveIdempotencia.expira_em <= datetime.utcnow()))
+                await conn.commit()
+                if PERFIL_SQLITE_PRODUCAO:
+                    await conn.exec_driver_sql("PRAGMA wal_checkpoint(TRUNCATE)")
+                    if decorrido >= INTERVALO_OPTIMIZE:
+                        # Roda ANALYZE apenas nas tabelas cujas estatísticas ficaram defasadas
+                        await conn.exec_driver_sql("PRAGMA optimize")
+                        decorrido = 0
+        except Exception:
+            logger.exception("Falha na manutenção do banco")
+
+
+async def encerrar_engines():
+    """Fechar os pools de conexão"""
+    await engine.dispose()
+    if engine_leitura is not engine:
+        await engine_leitura.dispose()
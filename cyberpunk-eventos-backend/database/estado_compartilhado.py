@@ -0,0 +1,125 @@
+"""
+Banco SQLite do estado compartilhado entre os workers (fila de espera, limite de requisições e tokens revogados).
+
+Fica em um arquivo separado do banco principal para não disputar o escritor
+das compras. Cada operação dos backends compartilhados é uma função síncrona
+executada inteira, em uma transação BEGIN IMMEDIATE, na thread única do
+estado: um só salto de thread por operação, a trava de escrita presa por
+microssegundos e, entre processos, leitura e escrita atômicas. Serve para
+vários workers na mesma máquina; entre máquinas, implemente os backends sobre
+um serviço compartilhado (ex.: Redis).
+"""
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, TypeVar
+
+from sqlalchemy import (
+    create_engine, event, Engine, Connection, MetaData, Table, Column, Integer, Float, String, LargeBinary, Index,
+    UniqueConstraint
+)
+
+ESTADO_COMPARTILHADO_URL = os.getenv("ESTADO_COMPARTILHADO_URL", "sqlite:///./database/estado_compartilhado.db")
+ESTADO_BUSY_TIMEOUT_MS = int(os.getenv("ESTADO_BUSY_TIMEOUT_MS", "5000"))
+
+T = TypeVar("T")
+
+metadata_estado = MetaData()
+
+filas_espera = Table(
+    "filas_espera", metadata_estado,
+    Column("evento_id", Integer, primary_key=True),
+    Column("taxa", Float, nullable=False),
+    Column("rajada", Integer, nullable=False),
+    Column("validade", Integer, nullable=False),
+    Column("proxima", Integer, nullable=False),  # Próxima posição a distribuir
+    Column("limite", Float, nullable=False),  # Admissões liberadas até `atualizado`
+    Column("atualizado", Float, nullable=False),  # time.time() do último avanço
+)
+
+tokens_fila = Table(
+    "tokens_fila", metadata_estado,
+    Column("token", String, primary_key=True),
+    Column("evento_id", Integer, nullable=False),
+    Column("posicao", Integer, nullable=False),
+    Column("cliente_id", Integer, nullable=False),
+    Column("admitido_em", Float),
+    UniqueConstraint("evento_id", "cliente_id"),
+    Index("ix_tokens_fila_evento_admitido_posicao", "evento_id", "admitido_em", "posicao"),
+)
+
+contadores_limite = Table(
+    "contadores_limite", metadata_estado,
+    Column("chave", String, primary_key=True),
+    Column("inicio", Float, nullable=False),  # Início da janela fixa atual
+    Column("atual", Integer, nullable=False),
+    Column("anterior", Integer, nullable=False),
+    Column("janela", Float, nullable=False),
+    Index("ix_contadores_limite_inicio", "inicio"),
+)
+
+tokens_revogados = Table(
+    "tokens_revogados", metadata_estado,
+    # Ordem das revogações, lida incrementalmente por cada processo (AUTOINCREMENT: ids nunca reaproveitados)
+    Column("id", Integer, primary_key=True),
+    Column("digest", LargeBinary, nullable=False, unique=True),  # SHA-256 do token
+    Column("exp", Float, nullable=False),
+    Index("ix_tokens_revogados_exp", "exp"),
+    sqlite_autoincrement=True,
+)
+
+# Uma thread: as operações do processo se enfileiram aqui e só os workers disputam a trava do SQLite
+executor_estado = ThreadPoolExecutor(max_workers=1, thread_name_prefix="estado")
+_engine: Engine = None
+
+
+def _configurar_conexao(conexao_dbapi, _registro):
+    # BEGIN emitido por nós (IMMEDIATE), não pelo driver
+    conexao_dbapi.isolation_level = None
+    cursor = conexao_dbapi.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute(f"PRAGMA busy_timeout={ESTADO_BUSY_TIMEOUT_MS}")
+    cursor.close()
+
+
+def _iniciar_transacao(conexao: Connection):
+    # Leituras isoladas não precisam da trava de escrita
+    conexao.exec_driver_sql("BEGIN" if conexao.get_execution_options().get("leitura") else "BEGIN IMMEDIATE")
+
+
+def _obter_engine() -> Engine:
+    """Engine do estado compartilhado, criada (com as tabelas) no primeiro uso, sempre na thread do estado"""
+    global _engine
+    if _engine is None:
+        engine = create_engine(ESTADO_COMPARTILHADO_URL, pool_size=1, max_overflow=0)
+        event.listen(engine, "connect", _configurar_conexao)
+        event.listen(engine, "begin", _iniciar_transacao)
+        with engine.begin() as conn:
+            metadata_estado.create_all(conn)
+        _engine = engine
+    return _engine
+
+
+def _executar(funcao: Callable[..., T], args: tuple, leitura: bool) -> T:
+    with _obter_engine().connect() as conn:
+        conn.execution_options(leitura=leitura)
+        with conn.begin():
+            return funcao(conn, *args)
+
+
+async def executar_no_estado(funcao: Callable[..., T], *args, leitura: bool = False) -> T:
+    """Rodar funcao(conn, *args) em uma transação na thread do estado compartilhado"""
+    return await asyncio.get_running_loop().run_in_executor(executor_estado, _executar, funcao, args, leitura)
+
+
+def _descartar_engine() -> None:
+    global _engine
+    if _engine is not None:
+        _engine.dispose()
+        _engine = None
+
+
+async def encerrar_estado_compartilhado() -> None:
+    """Fechar a conexão do estado (a thread fica ociosa; reabre no próximo uso)"""
+    await asyncio.get_running_loop().run_in_executor(executor_estado, _descartar_engine)
@@ -0,0 +1,321 @@
+"""
+Gerador de dados sintéticos para testes em escala (milhões de linhas).
+
+Insere empresas, clientes, eventos, pagamentos e ingressos em lotes (executemany
+direto no driver, sem unit of work do ORM), com distribuições assimétricas:
+poucas organizadoras concentram a maioria dos eventos, poucos eventos concentram a
+maioria das vendas, e as compras se espalham no tempo com pico à noite. O
+resultado é determinístico para a mesma semente e os mesmos parâmetros.
+
+Exemplo (a partir de cyberpunk-eventos-backend/):
+    python -m database.gerar_dados --empresas 2000 --eventos 200000 --pagamentos 5000000
+    python -m database.gerar_dados --banco /tmp/escala.db --semente 7
+"""
+import argparse
+import random
+import time
+from bisect import bisect_left
+from datetime import datetime, timedelta
+from itertools import accumulate
+from typing import Iterable, Iterator, List, Sequence
+
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.engine import Connection
+
+from database.consolidacao import reconstruir_vendas_consolidadas
+from database.migracoes import aplicar_migracoes
+from database.models import Base, Empresa, Cliente, Evento, Pagamento, Ingresso
+
+SENHA_PADRAO = "senha123"
+FORMATO_DATA = "%Y-%m-%d %H:%M:%S.%f"  # Mesmo formato que o SQLAlchemy grava no SQLite
+
+# Códigos únicos sem sorteio: multiplicação por uma constante coprima com a base é
+# uma bijeção em [0, base^n), então ids distintos geram códigos distintos
+_ALFABETO = "ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789"
+_ESPACO_INGRESSO = 62 ** 11
+_ESPACO_PAGAMENTO = 16 ** 16
+_MULTIPLICADOR = 0x9E3779B97F4A7C15  # Ímpar e não múltiplo de 31
+_PARES = [a + b for a in _ALFABETO for b in _ALFABETO]
+
+# Peso relativo de compras por hora do dia (pico à noite)
+PESOS_HORA = [2, 1, 1, 1, 1, 1, 2, 3, 4, 5, 6, 6, 7, 7, 6, 6, 7, 8, 10, 12, 12, 10, 7, 4]
+
+PALAVRAS = [
+    "Neon", "Chrome", "Synth", "Rave", "Grid", "Cyber", "Night", "Data", "Pulse", "Static",
+    "Glitch", "Circuit", "Vapor", "Nova", "Ghost", "Signal", "Flux", "Voltage", "Hex", "Echo",
+]
+SUFIXOS_EVENTO = ["Fest", "Night", "Live", "Expo", "Session"]
+LOCAIS = ["Night City", "Watson", "Westbrook", "Heywood", "Pacifica", "Santo Domingo", "City Center", "Badlands"]
+
+
+def codigo_ingresso(ingresso_id: int) -> str:
+    numero = (ingresso_id * _MULTIPLICADOR + 12345) % _ESPACO_INGRESSO
+    # Dois dígitos base 62 por divisão (5 pares + 1 caractere = 11)
+    partes = []
+    for _ in range(5):
+        numero, resto = divmod(numero, 3844)
+        partes.append(_PARES[resto])
+    partes.append(_ALFABETO[numero])
+    return "".join(partes)
+
+
+def codigo_pagamento(pagamento_id: int) -> str:
+    return f"{(pagamento_id * _MULTIPLICADOR + 54321) % _ESPACO_PAGAMENTO:016X}"
+
+
+def pesos_zipf(quantidade: int, expoente: float) -> List[float]:
+    """Pesos acumulados de uma distribuição de Zipf (posição 1 é a mais popular)"""
+    return list(accumulate(1.0 / (posicao ** expoente) for posicao in range(1, quantidade + 1)))
+
+
+def sortear(aleatorio: random.Random, acumulados: Sequence[float]) -> int:
+    """Índice sorteado a partir de pesos acumulados"""
+    return bisect_left(acumulados, aleatorio.random() * acumulados[-1])
+
+
+def _sql_insert(tabela, colunas: Sequence[str]) -> str:
+    return f"INSERT INTO {tabela.name} ({', '.join(colunas)}) VALUES ({', '.join('?' for _ in colunas)})"
+
+
+def inserir_em_lotes(conn: Connection, tabela, colunas: Sequence[str], linhas: Iterable[tuple], lote: int) -> int:
+    """executemany em lotes a partir de um gerador (memória constante)"""
+    sql = _sql_insert(tabela, colunas)
+    total = 0
+    buffer = []
+    for linha in linhas:
+        buffer.append(linha)
+        if len(buffer) >= lote:
+            conn.exec_driver_sql(sql, buffer)
+            total += len(buffer)
+            buffer = []
+    if buffer:
+        conn.exec_driver_sql(sql, buffer)
+        total += len(buffer)
+    return total
+
+
+def _maior_id(conn: Connection, tabela) -> int:
+    return conn.execute(text(f"SELECT coalesce(max(id), 0) FROM {tabela.name}")).scalar()
+
+
+def gerar(conn: Connection, args) -> None:
+    from utils.auth import hash_senha
+
+    aleatorio = random.Random(args.semente)
+    agora = datetime(2026, 1, 1) if args.data_referencia is None else datetime.fromisoformat(args.data_referencia)
+    inicio_periodo = agora - timedelta(days=args.dias)
+    # Mesmo hash para todos os usuários: login funciona com SENHA_PADRAO
+    senha_hash = hash_senha.hash(SENHA_PADRAO)
+
+    base_empresa = _maior_id(conn, Empresa.__table__)
+    base_cliente = _maior_id(conn, Cliente.__table__)
+    base_evento = _maior_id(conn, Evento.__table__)
+    base_pagamento = _maior_id(conn, Pagamento.__table__)
+    base_ingresso = _maior_id(conn, Ingresso.__table__)
+
+    def etapa(nome: str, funcao):
+        inicio = time.perf_counter()
+        quantidade = funcao()
+        duracao = time.perf_counter() - inicio
+        print(f"{nome:<12}{quantidade:>12,} linhas {duracao:>8.1f}s {quantidade / max(duracao, 1e-9):>12,.0f} linhas/s")
+
+    # Empresas e clientes, criados ao longo do período
+    def linhas_usuarios(base: int, quantidade: int, prefixo: str, empresa: bool) -> Iterator[tuple]:
+        for i in range(1, quantidade + 1):
+            criado_em = (inicio_periodo + timedelta(seconds=aleatorio.random() * args.dias * 86400)).strftime(FORMATO_DATA)
+            nome = f"{aleatorio.choice(PALAVRAS)} {aleatorio.choice(PALAVRAS)} {base + i}"
+            email = f"{prefixo}{base + i}@seed.dev"
+            if empresa:
+                yield (base + i, nome, email, senha_hash, aleatorio.choice(LOCAIS), None, criado_em, criado_em)
+            else:
+                yield (base + i, nome, email, senha_hash, criado_em)
+
+    etapa("empresas", lambda: inserir_em_lotes(
+        conn, Empresa.__table__,
+        ["id", "nome", "email", "senha", "endereco", "biografia", "criado_em", "atualizado_em"],
+        linhas_usuarios(base_empresa, args.empresas, "empresa", True), args.lote
+    ))
+    etapa("clientes", lambda: inserir_em_lotes(
+        conn, Cliente.__table__,
+        ["id", "nome", "email", "senha", "criado_em"],
+        linhas_usuarios(base_cliente, args.clientes, "cliente", False), args.lote
+    ))
+
+    # Eventos: organizadora sorteada por Zipf, criação uniforme no período (ids em ordem cronológica)
+    acumulado_organizadoras = pesos_zipf(args.empresas, args.assimetria)
+    instantes = sorted(aleatorio.random() * args.dias * 86400 for _ in range(args.eventos))
+    eventos = []  # (criado_em, data_fim, preco) em memória para gerar as compras
+    for segundos in instantes:
+        criado_em = inicio_periodo + timedelta(seconds=segundos)
+        data_fim = criado_em + timedelta(days=aleatorio.randint(3, 120), hours=aleatorio.randint(18, 23))
+        preco = int(min(50000, max(500, aleatorio.lognormvariate(8.5, 0.7))) // 100 * 100)
+        eventos.append((criado_em, data_fim, preco))
+
+    vendidos = [0] * args.eventos
+    capacidades = [aleatorio.choice([50, 100, 200, 500, 1000, 5000]) for _ in range(args.eventos)]
+
+    def linhas_eventos() -> Iterator[tuple]:
+        for i, (criado_em, data_fim, preco) in enumerate(eventos):
+            organizadora = base_empresa + 1 + sortear(aleatorio, acumulado_organizadoras)
+            texto_criado = criado_em.strftime(FORMATO_DATA)
+            ativo = 1 if data_fim > agora and aleatorio.random() > 0.05 else 0
+            yield (
+                base_evento + i + 1,
+                f"{aleatorio.choice(PALAVRAS)} {aleatorio.choice(PALAVRAS)} {aleatorio.choice(SUFIXOS_EVENTO)}",
+                aleatorio.choice(LOCAIS),
+                f"Evento sintético {base_evento + i + 1}",
+                texto_criado,
+                data_fim.strftime(FORMATO_DATA),
+                preco,
+                capacidades[i],
+                0,
+                ativo,
+                texto_criado,
+                organizadora,
+            )
+
+    etapa("eventos", lambda: inserir_em_lotes(
+        conn, Evento.__table__,
+        ["id", "nome", "localizacao", "descricao", "criado_em", "data_fim", "preco_ingresso",
+         "total_ingressos", "ingressos_vendidos", "ativo", "atualizado_em", "organizador_id"],
+        linhas_eventos(), args.lote
+    ))
+
+    # Pagamentos e ingressos: evento por popularidade (Zipf sobre uma permutação
+    # fixa, para os populares não serem só os mais antigos), hora com pico à noite
+    ordem_popularidade = list(range(args.eventos))
+    aleatorio.shuffle(ordem_popularidade)
+    acumulado_eventos = pesos_zipf(args.eventos, args.assimetria)
+    acumulado_clientes = pesos_zipf(args.clientes, args.assimetria * 0.5)
+    acumulado_horas = list(accumulate(PESOS_HORA))
+    acumulado_quantidade = list(accumulate([55, 25, 10, 6, 4]))
+
+    def compras() -> Iterator[tuple]:
+        proximo_ingresso = base_ingresso + 1
+        for numero in range(1, args.pagamentos + 1):
+            indice = ordem_popularidade[sortear(aleatorio, acumulado_eventos)]
+            criado_em, data_fim, preco = eventos[indice]
+            quantidade = sortear(aleatorio, acumulado_quantidade) + 1
+            vendidos[indice] += quantidade
+            limite = min(data_fim, agora)
+            if limite <= criado_em:
+                limite = criado_em + timedelta(hours=1)
+            dia = criado_em + timedelta(seconds=aleatorio.random() * (limite - criado_em).total_seconds())
+            instante = dia.replace(
+                hour=sortear(aleatorio, acumulado_horas), minute=aleatorio.randrange(60),
+                second=aleatorio.randrange(60), microsecond=aleatorio.randrange(1_000_000)
+            )
+            # No primeiro e no último dia a hora sorteada pode cair fora de [criado_em, limite]
+            if not criado_em <= instante <= limite:
+                instante = dia
+            cliente_id = base_cliente + 1 + sortear(aleatorio, acumulado_clientes)
+            metodo = "PIX" if aleatorio.random() < 0.7 else "CARTAO"
+            yield numero, proximo_ingresso, indice, quantidade, preco, instante.strftime(FORMATO_DATA), cliente_id, metodo
+            proximo_ingresso += quantidade
+
+    colunas_pagamento = [
+        "id", "codigo_pagamento", "quantidade", "valor_total", "metodo_pagamento", "nome_comprador",
+        "email_comprador", "cpf_comprador", "criado_em", "cliente_id", "evento_id"
+    ]
+    colunas_ingresso = [
+        "id", "codigo_hash", "comprado_em", "quantidade", "metodo_pagamento", "nome_comprador",
+        "email_comprador", "cpf_comprador", "cliente_id", "evento_id", "pagamento_id"
+    ]
+    sql_pagamento = _sql_insert(Pagamento.__table__, colunas_pagamento)
+    sql_ingresso = _sql_insert(Ingresso.__table__, colunas_ingresso)
+
+    def inserir_compras() -> int:
+        pagamentos, ingressos, total = [], [], 0
+        for numero, primeiro_ingresso, indice, quantidade, preco, instante, cliente_id, metodo in compras():
+            pagamento_id = base_pagamento + numero
+            evento_id = base_evento + indice + 1
+            nome, email, cpf = f"Cliente {cliente_id}", f"cliente{cliente_id}@seed.dev", f"{cliente_id:011d}"
+            pagamentos.append((
+                pagamento_id, codigo_pagamento(pagamento_id), quantidade, preco / 100 * quantidade, metodo,
+                nome, email, cpf, instante, cliente_id, evento_id
+            ))
+            for ingresso_id in range(primeiro_ingresso, primeiro_ingresso + quantidade):
+                ingressos.append((
+                    ingresso_id, codigo_ingresso(ingresso_id), instante, 1, metodo,
+                    nome, email, cpf, cliente_id, evento_id, pagamento_id
+                ))
+            if len(pagamentos) >= args.lote:
+                conn.exec_driver_sql(sql_pagamento, pagamentos)
+                conn.exec_driver_sql(sql_ingresso, ingressos)
+                total += len(pagamentos) + len(ingressos)
+                pagamentos, ingressos = [], []
+        if pagamentos:
+            conn.exec_driver_sql(sql_pagamento, pagamentos)
+            conn.exec_driver_sql(sql_ingresso, ingressos)
+            total += len(pagamentos) + len(ingressos)
+        return total
+
+    etapa("compras", inserir_compras)
+
+    # Contadores desnormalizados e capacidade mínima para comportar as vendas geradas
+    def atualizar_eventos() -> int:
+        linhas = [
+            (vendidos[i], vendidos[i], base_evento + i + 1)
+            for i in range(args.eventos) if vendidos[i]
+        ]
+        conn.exec_driver_sql(
+            "UPDATE eventos SET ingressos_vendidos = ?, total_ingressos = max(total_ingressos, ?) WHERE id = ?",
+            linhas
+        )
+        return len(linhas)
+
+    etapa("contadores", atualizar_eventos)
+
+    def consolidar() -> int:
+        reconstruir_vendas_consolidadas(conn)
+        return conn.execute(text("SELECT count(*) FROM vendas_consolidadas")).scalar()
+
+    etapa("rollup", consolidar)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--banco", help="Arquivo SQLite de destino (padrão: o de DATABASE_URL)")
+    parser.add_argument("--empresas", type=int, default=1_000)
+    parser.add_argument("--clientes", type=int, default=100_000)
+    parser.add_argument("--eventos", type=int, default=50_000)
+    parser.add_argument("--pagamentos", type=int, default=1_000_000, help="Cada pagamento gera de 1 a 5 ingressos")
+    parser.add_argument("--dias", type=int, default=365, help="Período coberto pelas datas geradas")
+    parser.add_argument("--data-referencia", help="Fim do período (ISO, padrão 2026-01-01); fixo para manter o determinismo")
+    parser.add_argument("--assimetria", type=float, default=1.1, help="Expoente de Zipf da popularidade")
+    parser.add_argument("--semente", type=int, default=1)
+    parser.add_argument("--lote", type=int, default=10_000, help="Linhas por executemany")
+    args = parser.parse_args()
+
+    if args.banco:
+        url = f"sqlite:///{args.banco}"
+    else:
+        from database.database import DATABASE_URL
+        url = DATABASE_URL.replace("+aiosqlite", "")
+
+    engine = create_engine(url)
+
+    @event.listens_for(engine, "connect")
+    def _pragmas_carga(conexao_dbapi, _registro):
+        # Carga em massa: durabilidade não importa até o commit final
+        cursor = conexao_dbapi.cursor()
+        cursor.execute("PRAGMA synchronous=OFF")
+        cursor.execute("PRAGMA cache_size=-262144")
+        cursor.execute("PRAGMA temp_store=MEMORY")
+        cursor.close()
+
+    with engine.begin() as conn:
+        Base.metadata.create_all(conn)
+        aplicar_migracoes(conn)
+
+    inicio = time.perf_counter()
+    with engine.begin() as conn:
+        gerar(conn, args)
+    with engine.begin() as conn:
+        conn.exec_driver_sql("ANALYZE")
+    engine.dispose()
+    print(f"concluído em {time.perf_counter() - inicio:.1f}s -> {url}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+from sqlalchemy import Table, Column, Integer, String, DateTime, MetaData, inspect, select, text
+from sqlalchemy.engine import Connection
+from datetime import datetime
+from database.consolidacao import reconstruir_vendas_consolidadas
+from database.busca import criar_indice_busca
+
+# Tabela de controle das migrações já aplicadas
+metadata_migracoes = MetaData()
+
+migracoes_esquema = Table(
+    "migracoes_esquema",
+    metadata_migracoes,
+    Column("versao", Integer, primary_key=True),
+    Column("descricao", String, nullable=False),
+    Column("aplicada_em", DateTime, default=datetime.utcnow),
+)
+
+
+def _coluna_existe(conn: Connection, tabela: str, coluna: str) -> bool:
+    """Verificar se uma coluna já existe na tabela"""
+    return any(c["name"] == coluna for c in inspect(conn).get_columns(tabela))
+
+
+def _adicionar_coluna(conn: Connection, tabela: str, definicao: str) -> None:
+    """Adicionar coluna se ainda não existir (bancos criados pelo create_all já a possuem)"""
+    coluna = definicao.split()[0]
+    if not _coluna_existe(conn, tabela, coluna):
+        conn.exec_driver_sql(f"ALTER TABLE {tabela} ADD COLUMN {definicao}")
+
+
+def _m001_contador_ingressos_vendidos(conn: Connection) -> None:
+    """Contador desnormalizado de ingressos vendidos por evento"""
+    _adicionar_coluna(conn, "eventos", "ingressos_vendidos INTEGER NOT NULL DEFAULT 0")
+    conn.execute(text(
+        "UPDATE eventos SET ingressos_vendidos = "
+        "(SELECT COUNT(*) FROM ingressos WHERE ingressos.evento_id = eventos.id)"
+    ))
+
+
+def _m002_vendas_consolidadas(conn: Connection) -> None:
+    """Popular o rollup de vendas (tabela criada pelo create_all)"""
+    reconstruir_vendas_consolidadas(conn)
+
+
+def _m003_atualizado_em(conn: Connection) -> None:
+    """Marcador de versão atualizado_em em empresas e eventos"""
+    for tabela in ("empresas", "eventos"):
+        _adicionar_coluna(conn, tabela, "atualizado_em DATETIME")
+        conn.execute(text(f"UPDATE {tabela} SET atualizado_em = criado_em WHERE atualizado_em IS NULL"))
+
+
+def _m004_busca_eventos(conn: Connection) -> None:
+    """Índice FTS5 de busca de eventos, sincronizado por triggers"""
+    criar_indice_busca(conn)
+
+
+def _m005_imagens_variantes(conn: Connection) -> None:
+    """Caminhos das variantes redimensionadas das imagens da empresa"""
+    _adicionar_coluna(conn, "empresas", "imagens_variantes JSON")
+
+
+def _m006_indices_consultas(conn: Connection) -> None:
+    """Índices compostos das consultas quentes (congelados: mudanças posteriores vão em novas migrações)"""
+    for indice in (
+        "ix_eventos_organizador_ativo_criado_em ON eventos (organizador_id, ativo, criado_em)",
+        "ix_eventos_ativo_criado_em ON eventos (ativo, criado_em)",
+        "ix_pagamentos_cliente_criado_em ON pagamentos (cliente_id, criado_em)",
+        "ix_pagamentos_evento_id ON pagamentos (evento_id)",
+        "ix_ingressos_evento_id ON ingressos (evento_id)",  # Substituído na migração 8
+        "ix_ingressos_cliente_comprado_em ON ingressos (cliente_id, comprado_em)",
+        "ix_ingressos_pagamento_id ON ingressos (pagamento_id)",
+        "ix_vendas_consolidadas_organizador_hora ON vendas_consolidadas (organizador_id, hora)",
+        "ix_vendas_consolidadas_evento_id ON vendas_consolidadas (evento_id)",
+    ):
+        conn.exec_driver_sql(f"CREATE INDEX IF NOT EXISTS {indice}")
+
+
+def _m007_checkin_ingressos(conn: Connection) -> None:
+    """Estado de utilização (check-in) dos ingressos"""
+    _adicionar_coluna(conn, "ingressos", "utilizado_em DATETIME")
+
+
+def _m008_indice_evento_codigo(conn: Connection) -> None:
+    """Índice (evento_id, codigo_hash) do snapshot offline, no lugar do índice só por evento_id"""
+    conn.exec_driver_sql("CREATE INDEX IF NOT EXISTS ix_ingressos_evento_codigo ON ingressos (evento_id, codigo_hash)")
+    conn.exec_driver_sql("DROP INDEX IF EXISTS ix_ingressos_evento_id")
+
+
+# Lista ordenada de migrações: (versão, descrição, função)
+MIGRACOES = [
+    (1, "contador ingressos_vendidos em eventos", _m001_contador_ingressos_vendidos),
+    (2, "rollup vendas_consolidadas", _m002_vendas_consolidadas),
+    (3, "atualizado_em em empresas e eventos", _m003_atualizado_em),
+    (4, "índice FTS5 eventos_busca", _m004_busca_eventos),
+    (5, "imagens_variantes em empresas", _m005_imagens_variantes),
+    (6, "índices das consultas de eventos, pagamentos, ingressos e vendas", _m006_indices_consultas),
+    (7, "utilizado_em em ingressos", _m007_checkin_ingressos),
+    (8, "índice ingressos (evento_id, codigo_hash)", _m008_indice_evento_codigo),
+]
+
+
+def aplicar_migracoes(conn: Connection) -> None:
+    """Aplicar migrações pendentes em ordem (executar após o create_all)"""
+    metadata_migracoes.create_all(conn)
+    aplicadas = set(conn.execute(select(migracoes_esquema.c.versao)).scalars())
+    
+    for versao, descricao, migracao in MIGRACOES:
+        if versao in aplicadas:
+            continue
+        migracao(conn)
+        conn.execute(migracoes_esquema.insert().values(versao=versao, descricao=descricao))
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, Boolean, Enum, Float, func
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, Boolean, Enum, Float, UniqueConstraint, Index, JSON, func
 from sqlalchemy.orm import relationship, declarative_base
 from datetime import datetime
 import enum
@@ -22,7 +22,9 @@ class Empresa(Base):
     biografia = Column(Text, nullable=True)
     imagem_perfil = Column(String, nullable=True)
     imagem_fundo = Column(String, nullable=True)
+    imagens_variantes = Column(JSON, nullable=True)  # {"perfil"|"fundo": {tamanho: {formato: caminho}}}
     criado_em = Column(DateTime, default=datetime.utcnow)
+    atualizado_em = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)  # Marcador de versão (ETag)
 
     # Relacionamentos
     eventos = relationship("Evento", back_populates="organizador", cascade="all, delete-orphan")
@@ -44,6 +46,10 @@ class Cliente(Base):
 
 class Evento(Base):
     __tablename__ = "eventos"
+    __table_args__ = (
+        Index("ix_eventos_organizador_ativo_criado_em", "organizador_id", "ativo", "criado_em"),
+        Index("ix_eventos_ativo_criado_em", "ativo", "criado_em"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     nome = Column(String, nullable=False)
@@ -53,7 +59,9 @@ class Evento(Base):
     data_fim = Column(DateTime, nullable=False)
     preco_ingresso = Column(Integer, nullable=False)  # Preço em centavos
     total_ingressos = Column(Integer, nullable=False)
+    ingressos_vendidos = Column(Integer, default=0, server_default="0", nullable=False)  # Contador desnormalizado
     ativo = Column(Boolean, default=True)
+    atualizado_em = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)  # Marcador de versão (ETag)
     
     # Chaves Estrangeiras
     organizador_id = Column(Integer, ForeignKey("empresas.id"), nullable=False)
@@ -62,6 +70,7 @@ class Evento(Base):
     organizador = relationship("Empresa", back_populates="eventos")
     ingressos = relationship("Ingresso", back_populates="evento", cascade="all, delete-orphan")
     pagamentos = relationship("Pagamento", back_populates="evento", cascade="all, delete-orphan")
+    vendas_consolidadas = relationship("VendaConsolidada", cascade="all, delete-orphan")
 
 
 class MetodoPagamento(str, enum.Enum):
@@ -70,6 +79,10 @@ class MetodoPagamento(str, enum.Enum):
 
 class Pagamento(Base):
     __tablename__ = "pagamentos"
+    __table_args__ = (
+        Index("ix_pagamentos_cliente_criado_em", "cliente_id", "criado_em"),
+        Index("ix_pagamentos_evento_id", "evento_id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     codigo_pagamento = Column(String, unique=True, index=True, nullable=False)
@@ -98,6 +111,12 @@ class Pagamento(Base):
 
 class Ingresso(Base):
     __tablename__ = "ingressos"
+    __table_args__ = (
+        # Também serve as buscas só por evento_id; o snapshot offline lê os códigos em ordem por ele
+        Index("ix_ingressos_evento_codigo", "evento_id", "codigo_hash"),
+        Index("ix_ingressos_cliente_comprado_em", "cliente_id", "comprado_em"),
+        Index("ix_ingressos_pagamento_id", "pagamento_id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     codigo_hash = Column(String(11), unique=True, index=True, nullable=False)
@@ -107,6 +126,7 @@ class Ingresso(Base):
     nome_comprador = Column(String, nullable=True)
     email_comprador = Column(String, nullable=True)
     cpf_comprador = Column(String, nullable=True)
+    utilizado_em = Column(DateTime, nullable=True)  # Check-in na entrada (nulo = não utilizado)
     
     # Chaves Estrangeiras
     cliente_id = Column(Integer, ForeignKey("clientes.id"), nullable=False)
@@ -117,3 +137,42 @@ class Ingresso(Base):
     cliente = relationship("Cliente", back_populates="ingressos")
     evento = relationship("Evento", back_populates="ingressos")
     pagamento = relationship("Pagamento", back_populates="ingressos")
+
+
+class VendaConsolidada(Base):
+    """Rollup de vendas por (organizador, evento, hora UTC, método de pagamento)"""
+    __tablename__ = "vendas_consolidadas"
+    __table_args__ = (
+        UniqueConstraint("organizador_id", "evento_id", "hora", "metodo_pagamento", name="uq_vendas_consolidadas_chave"),
+        Index("ix_vendas_consolidadas_organizador_hora", "organizador_id", "hora"),
+        Index("ix_vendas_consolidadas_evento_id", "evento_id"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    hora = Column(DateTime, nullable=False)  # Início da hora (UTC) da compra
+    metodo_pagamento = Column(Enum(MetodoPagamento), nullable=False)
+    quantidade_ingressos = Column(Integer, default=0, nullable=False)
+    receita_centavos = Column(Integer, default=0, nullable=False)
+
+    # Chaves Estrangeiras
+    organizador_id = Column(Integer, ForeignKey("empresas.id"), nullable=False)
+    evento_id = Column(Integer, ForeignKey("eventos.id", ondelete="CASCADE"), nullable=False)
+
+
+class ChaveIdempotencia(Base):
+    """Resposta de uma compra feita com Idempotency-Key, devolvida às repetições da mesma chave"""
+    __tablename__ = "chaves_idempotencia"
+    __table_args__ = (
+        UniqueConstraint("cliente_id", "chave", name="uq_chaves_idempotencia_cliente_chave"),
+        Index("ix_chaves_idempotencia_expira_em", "expira_em"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    chave = Column(String, nullable=False)
+    impressao = Column(String, nullable=False)  # SHA-256 do corpo da requisição
+    resposta = Column(Text, nullable=False)  # JSON de PagamentoComIngressos
+    criado_em = Column(DateTime, default=datetime.utcnow)
+    expira_em = Column(DateTime, nullable=False)
+
+    # Chaves Estrangeiras
+    cliente_id = Column(Integer, ForeignKey("clientes.id", ondelete="CASCADE"), nullable=False)
@@ -1,30 +1,72 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
 from contextlib import asynccontextmanager
+import asyncio
 import os
 
-from database.database import engine
+from database.database import (
+    engine, encerrar_engines, executar_manutencao,
+    SQL_CABECALHO_CONSULTAS, SQL_ORCAMENTO_CONSULTAS
+)
 from database.models import Base
-from routers import auth, companies, clients, events, tickets
+from database.migracoes import aplicar_migracoes
+from routers import auth, companies, clients, events, tickets, fila
+from utils.paginacao import CABECALHO_PROXIMO_CURSOR
+from utils.cache_http import ArquivosImutaveis
+from utils.auth import encerrar_executor_senhas
+from utils.imagens import encerrar_executor_imagens
+from utils.metricas import MiddlewareMetricas, gerar_texto, TIPO_CONTEUDO_METRICAS
+from utils.consultas import MiddlewareConsultas, CABECALHO_CONSULTAS
+from utils.idempotencia import CABECALHO_REPETICAO
+from utils.limite_taxa import MiddlewareLimiteTaxa, LIMITE_TAXA_ATIVO, BackendLimiteMemoria, backend_limite
+from utils.fila_espera import BackendFilaMemoria, backend_fila
+from database.estado_compartilhado import encerrar_estado_compartilhado
+
+# Workers do uvicorn/gunicorn (WEB_CONCURRENCY é o padrão de --workers em ambos)
+WORKERS = int(os.getenv("WEB_CONCURRENCY", "1"))
+
+
+def exigir_backends_compartilhados():
+    """Com vários workers, a fila e os limites em memória seriam divididos por processo"""
+    em_memoria = [nome for nome, em_uso in (
+        ("FILA_BACKEND", isinstance(backend_fila, BackendFilaMemoria)),
+        ("LIMITE_TAXA_BACKEND", LIMITE_TAXA_ATIVO and isinstance(backend_limite, BackendLimiteMemoria)),
+    ) if em_uso]
+    if WORKERS > 1 and em_memoria:
+        raise RuntimeError(
+            f"WEB_CONCURRENCY={WORKERS} com backend em memória ({', '.join(em_memoria)}): "
+            "configure os backends SQLite (ver README, Estado compartilhado)"
+        )
 
 
 @asynccontextmanager
 async def ciclo_vida(app: FastAPI):
     """Eventos de inicialização e encerramento"""
+    exigir_backends_compartilhados()
+    
     # Criar tabelas do banco de dados
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+        await conn.run_sync(aplicar_migracoes)
     
     # Criar diretórios de upload
     pasta_upload = os.getenv("UPLOAD_FOLDER", "./uploads")
     os.makedirs(os.path.join(pasta_upload, "perfis"), exist_ok=True)
     os.makedirs(os.path.join(pasta_upload, "fundos"), exist_ok=True)
+    os.makedirs("./perfis", exist_ok=True)
+    os.makedirs("./fundos", exist_ok=True)
+    
+    # Manutenção periódica (limpeza em todos os perfis; PRAGMAs do SQLite só em produção)
+    tarefa_manutencao = asyncio.create_task(executar_manutencao())
     
     yield
     
     # Limpeza
-    await engine.dispose()
+    tarefa_manutencao.cancel()
+    await encerrar_engines()
+    await encerrar_estado_compartilhado()
+    encerrar_executor_senhas()
+    encerrar_executor_imagens()
 
 
 app = FastAPI(
@@ -34,6 +76,10 @@ app = FastAPI(
     lifespan=ciclo_vida
 )
 
+# Limite de requisições por usuário ou IP (dentro do CORS: o 429 também leva os cabeçalhos CORS)
+if LIMITE_TAXA_ATIVO:
+    app.add_middleware(MiddlewareLimiteTaxa)
+
 # Middleware CORS
 app.add_middleware(
     CORSMiddleware,
@@ -41,18 +87,23 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[CABECALHO_PROXIMO_CURSOR, CABECALHO_CONSULTAS, CABECALHO_REPETICAO, "Retry-After"],
 )
 
-# Montar arquivos estáticos para uploads
+# Consultas SQL por requisição (cabeçalho de depuração e orçamento)
+app.add_middleware(MiddlewareConsultas, orcamento=SQL_ORCAMENTO_CONSULTAS, cabecalho=SQL_CABECALHO_CONSULTAS)
+
+# Métricas por rota (mais externo: inclui o tempo dos demais middlewares)
+app.add_middleware(MiddlewareMetricas)
+
+# Montar arquivos estáticos para uploads (nomes por hash de conteúdo, cache imutável)
+# check_dir=False: as pastas podem ser criadas só no startup
 pasta_upload = os.getenv("UPLOAD_FOLDER", "./uploads")
-if os.path.exists(pasta_upload):
-    app.mount("/uploads", StaticFiles(directory=pasta_upload), name="uploads")
+app.mount("/uploads", ArquivosImutaveis(directory=pasta_upload, check_dir=False), name="uploads")
 
 # Montar diretórios de perfis e fundos diretamente
-if os.path.exists("./perfis"):
-    app.mount("/perfis", StaticFiles(directory="./perfis"), name="perfis")
-if os.path.exists("./fundos"):
-    app.mount("/fundos", StaticFiles(directory="./fundos"), name="fundos")
+app.mount("/perfis", ArquivosImutaveis(directory="./perfis", check_dir=False), name="perfis")
+app.mount("/fundos", ArquivosImutaveis(directory="./fundos", check_dir=False), name="fundos")
 
 # Incluir routers
 app.include_router(auth.router)
@@ -60,6 +111,7 @@ app.include_router(companies.router)
 app.include_router(clients.router)
 app.include_router(events.router)
 app.include_router(tickets.router)
+app.include_router(fila.router)
 
 
 @app.get("/")
@@ -73,4 +125,10 @@ async def raiz():
 
 @app.get("/saude")
 async def verificar_saude():
-    return {"status": "saudável"}
\ No newline at end of file
+    return {"status": "saudável"}
+
+
+@app.get("/metrics", include_in_schema=False)
+async def obter_metricas():
+    """Métricas no formato de texto do Prometheus"""
+    return Response(gerar_texto(), media_type=TIPO_CONTEUDO_METRICAS)
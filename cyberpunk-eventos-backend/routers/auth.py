@@ -1,10 +1,15 @@
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.security import HTTPAuthorizationCredentials
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from database.database import obter_db
 from database.models import Empresa, Cliente
 from schemas import Token, RequisicaoLogin, EmpresaCriar, ClienteCriar, EmpresaResposta, ClienteResposta
-from utils.auth import verificar_senha, obter_hash_senha, criar_token_acesso
+from utils.auth import (
+    verificar_senha, obter_hash_senha, precisa_rehash, criar_token_acesso,
+    decodificar_token, revogar_token, seguranca
+)
+from utils.metricas import LOGINS_FALHOS
 
 router = APIRouter(prefix="/auth", tags=["Autenticação"])
 
@@ -29,7 +34,7 @@ async def registrar_empresa(empresa: EmpresaCriar, db: AsyncSession = Depends(ob
         )
     
     # Criar nova empresa
-    senha_hash = obter_hash_senha(empresa.senha)
+    senha_hash = await obter_hash_senha(empresa.senha)
     db_empresa = Empresa(
         nome=empresa.nome,
         email=empresa.email,
@@ -65,7 +70,7 @@ async def registrar_cliente(cliente: ClienteCriar, db: AsyncSession = Depends(ob
         )
     
     # Criar novo cliente
-    senha_hash = obter_hash_senha(cliente.senha)
+    senha_hash = await obter_hash_senha(cliente.senha)
     db_cliente = Cliente(
         nome=cliente.nome,
         email=cliente.email,
@@ -96,13 +101,22 @@ async def fazer_login(dados_login: RequisicaoLogin, db: AsyncSession = Depends(o
             detail="Tipo de usuário inválido. Deve ser 'empresa' ou 'cliente'"
         )
     
-    if not usuario or not verificar_senha(dados_login.senha, usuario.senha):
+    # Encerrar a transação de leitura para não segurar uma conexão do pool durante o Argon2
+    await db.commit()
+
+    if not usuario or not await verificar_senha(dados_login.senha, usuario.senha):
+        LOGINS_FALHOS.incrementar()
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Email ou senha incorretos",
             headers={"WWW-Authenticate": "Bearer"},
         )
     
+    # Refazer o hash de forma transparente se os parâmetros do Argon2 mudaram
+    if precisa_rehash(usuario.senha):
+        usuario.senha = await obter_hash_senha(dados_login.senha)
+        await db.commit()
+    
     # Criar token de acesso
     token_acesso = criar_token_acesso(
         data={"sub": str(usuario.id), "tipo_usuario": dados_login.tipo_usuario}
@@ -114,3 +128,15 @@ async def fazer_login(dados_login: RequisicaoLogin, db: AsyncSession = Depends(o
         "tipo_usuario": dados_login.tipo_usuario,
         "usuario_id": usuario.id
     }
+
+
+@router.post("/logout", status_code=status.HTTP_204_NO_CONTENT)
+async def fazer_logout(credenciais: HTTPAuthorizationCredentials = Depends(seguranca)):
+    """Revogar o token atual até a sua expiração.
+
+    Vale imediatamente neste processo; nos demais workers (e após reinícios), a partir
+    da próxima sincronia com o banco de estado compartilhado, em até
+    TOKEN_REVOGACAO_SINCRONIA segundos.
+    """
+    decodificar_token(credenciais.credentials)
+    await revogar_token(credenciais.credentials)
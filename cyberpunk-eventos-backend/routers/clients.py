@@ -1,7 +1,7 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Form
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
-from database.database import obter_db
+from database.database import obter_db, obter_db_leitura
 from database.models import Cliente
 from schemas import ClienteResposta, ClienteAtualizar
 from utils.auth import obter_cliente_atual, obter_hash_senha, verificar_senha
@@ -12,7 +12,7 @@ router = APIRouter(prefix="/clientes", tags=["Clientes"])
 @router.get("/eu", response_model=ClienteResposta)
 async def obter_meu_perfil(
     usuario_atual: dict = Depends(obter_cliente_atual),
-    db: AsyncSession = Depends(obter_db)
+    db: AsyncSession = Depends(obter_db_leitura)
 ):
     """Obter perfil do cliente atual"""
     result = await db.execute(select(Cliente).where(Cliente.id == usuario_atual["usuario_id"]))
@@ -79,13 +79,13 @@ async def mudar_senha(
             detail="Cliente não encontrado"
         )
     
-    if not verificar_senha(senha_antiga, cliente.senha):
+    if not await verificar_senha(senha_antiga, cliente.senha):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Senha incorreta"
         )
     
-    cliente.senha = obter_hash_senha(senha_nova)
+    cliente.senha = await obter_hash_senha(senha_nova)
     await db.commit()
     
     return {"mensagem": "Senha alterada com sucesso"}
@@ -1,23 +1,54 @@
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status, UploadFile, File, Form, Query, Request, Response
+from fastapi.responses import RedirectResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, func
-from sqlalchemy.orm import selectinload
 from typing import Optional, List
-from database.database import obter_db
+from database.database import obter_db, obter_db_leitura
 from database.models import Empresa, Evento
-from schemas import EmpresaResposta, EmpresaAtualizar
+from schemas import EmpresaResposta, EmpresaAtualizar, TipoImagem, TamanhoImagem
 from utils.auth import obter_empresa_atual, obter_hash_senha, verificar_senha
 from utils.helpers import salvar_arquivo_upload, deletar_arquivo
+from utils.imagens import (
+    CAMPOS_IMAGEM, arquivo_em_uso, remover_variantes, caminhos_variantes, processar_imagem_empresa, url_variante
+)
+from utils.paginacao import paginar_eventos, finalizar_pagina
+from utils.cache_http import responder_condicional, consulta_marcador
 
 router = APIRouter(prefix="/empresas", tags=["Empresas"])
 
 
+async def _responder_condicional_empresa(
+    request: Request,
+    response: Response,
+    db: AsyncSession,
+    empresa_id: int,
+    privado: bool = False
+) -> Optional[Response]:
+    """304 para o perfil da empresa a partir de atualizado_em, sem carregar a linha inteira"""
+    atualizado_em = (await db.execute(
+        select(Empresa.atualizado_em).where(Empresa.id == empresa_id)
+    )).one_or_none()
+    if atualizado_em is None:
+        return None
+    return responder_condicional(
+        request, response, empresa_id, atualizado_em[0], ultima_modificacao=atualizado_em[0], privado=privado
+    )
+
+
 @router.get("/eu", response_model=EmpresaResposta)
 async def obter_meu_perfil(
+    request: Request,
+    response: Response,
     usuario_atual: dict = Depends(obter_empresa_atual),
-    db: AsyncSession = Depends(obter_db)
+    db: AsyncSession = Depends(obter_db_leitura)
 ):
     """Obter perfil da empresa atual"""
+    nao_modificado = await _responder_condicional_empresa(
+        request, response, db, usuario_atual["usuario_id"], privado=True
+    )
+    if nao_modificado:
+        return nao_modificado
+    
     result = await db.execute(select(Empresa).where(Empresa.id == usuario_atual["usuario_id"]))
     empresa = result.scalar_one_or_none()
     
@@ -31,8 +62,17 @@ async def obter_meu_perfil(
 
 
 @router.get("/{empresa_id}", response_model=EmpresaResposta)
-async def obter_perfil_empresa(empresa_id: int, db: AsyncSession = Depends(obter_db)):
+async def obter_perfil_empresa(
+    empresa_id: int,
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(obter_db_leitura)
+):
     """Obter perfil público da empresa"""
+    nao_modificado = await _responder_condicional_empresa(request, response, db, empresa_id)
+    if nao_modificado:
+        return nao_modificado
+    
     result = await db.execute(select(Empresa).where(Empresa.id == empresa_id))
     empresa = result.scalar_one_or_none()
     
@@ -45,8 +85,39 @@ async def obter_perfil_empresa(empresa_id: int, db: AsyncSession = Depends(obter
     return empresa
 
 
+@router.get("/{empresa_id}/imagens/{tipo}")
+async def obter_imagem_empresa(
+    empresa_id: int,
+    tipo: TipoImagem,
+    request: Request,
+    tamanho: TamanhoImagem = Query(TamanhoImagem.CARTAO),
+    db: AsyncSession = Depends(obter_db_leitura)
+):
+    """Redirecionar para a imagem no tamanho pedido, no melhor formato aceito pelo cliente"""
+    result = await db.execute(select(Empresa).where(Empresa.id == empresa_id))
+    empresa = result.scalar_one_or_none()
+    
+    if not empresa or not getattr(empresa, CAMPOS_IMAGEM[tipo.value]):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Imagem não encontrada"
+        )
+    
+    aceitos = request.headers.get("accept", "")
+    formatos = [formato for formato in ("avif", "webp") if f"image/{formato}" in aceitos]
+    if tamanho == TamanhoImagem.ORIGINAL:
+        formatos = []
+    
+    return RedirectResponse(
+        url_variante(empresa, tipo.value, tamanho.value, formatos),
+        status_code=status.HTTP_307_TEMPORARY_REDIRECT,
+        headers={"Cache-Control": "no-cache", "Vary": "Accept"}
+    )
+
+
 @router.put("/eu", response_model=EmpresaResposta)
 async def atualizar_perfil_empresa(
+    tarefas: BackgroundTasks,
     nome: Optional[str] = Form(None),
     endereco: Optional[str] = Form(None),
     biografia: Optional[str] = Form(None),
@@ -73,23 +144,39 @@ async def atualizar_perfil_empresa(
     if biografia is not None:
         empresa.biografia = biografia
     
-    # Atualizar imagem de perfil
-    if imagem_perfil:
-        # Deletar imagem antiga
-        await deletar_arquivo(empresa.imagem_perfil)
-        # Salvar nova imagem
-        empresa.imagem_perfil = await salvar_arquivo_upload(imagem_perfil, "perfis")
+    # Atualizar imagens de perfil e fundo
+    # Imagens antigas (e suas variantes) só são apagadas depois que o banco aponta para as novas
+    imagens_antigas = []
+    novas_imagens = []
+    variantes_atuais = empresa.imagens_variantes or {}
+    for tipo, pasta, arquivo in (("perfil", "perfis", imagem_perfil), ("fundo", "fundos", imagem_fundo)):
+        if not arquivo:
+            continue
+        campo = CAMPOS_IMAGEM[tipo]
+        if getattr(empresa, campo):
+            imagens_antigas.append((getattr(empresa, campo), variantes_atuais.get(tipo)))
+        setattr(empresa, campo, await salvar_arquivo_upload(arquivo, pasta))
+        novas_imagens.append((tipo, getattr(empresa, campo)))
     
-    # Atualizar imagem de fundo
-    if imagem_fundo:
-        # Deletar imagem antiga
-        await deletar_arquivo(empresa.imagem_fundo)
-        # Salvar nova imagem
-        empresa.imagem_fundo = await salvar_arquivo_upload(imagem_fundo, "fundos")
+    if novas_imagens:
+        # Sem variantes até a codificação terminar: as URLs caem na imagem original
+        empresa.imagens_variantes = remover_variantes(*[tipo for tipo, _ in novas_imagens])
     
     await db.commit()
+    for caminho_original, variantes in imagens_antigas:
+        # O mesmo conteúdo pode estar em uso pela própria empresa ou por outra
+        if caminho_original in (empresa.imagem_perfil, empresa.imagem_fundo):
+            continue
+        if await arquivo_em_uso(db, caminho_original, empresa.id):
+            continue
+        for caminho in [caminho_original, *caminhos_variantes(variantes)]:
+            await deletar_arquivo(caminho)
     await db.refresh(empresa)
     
+    # Variantes WebP/AVIF codificadas no pool de processos depois da resposta
+    for tipo, caminho in novas_imagens:
+        tarefas.add_task(processar_imagem_empresa, empresa.id, tipo, caminho)
+    
     return empresa
 
 
@@ -110,28 +197,42 @@ async def mudar_senha(
             detail="Empresa não encontrada"
         )
     
-    if not verificar_senha(senha_antiga, empresa.senha):
+    if not await verificar_senha(senha_antiga, empresa.senha):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Senha incorreta"
         )
     
-    empresa.senha = obter_hash_senha(senha_nova)
+    empresa.senha = await obter_hash_senha(senha_nova)
     await db.commit()
     
     return {"mensagem": "Senha alterada com sucesso"}
 
 
 @router.get("/{empresa_id}/eventos", response_model=List[dict])
-async def obter_eventos_ativos_empresa(empresa_id: int, db: AsyncSession = Depends(obter_db)):
-    """Obter eventos ativos de uma empresa (endpoint público)"""
-    result = await db.execute(
-        select(Evento)
-        .options(selectinload(Evento.ingressos))
-        .where(Evento.organizador_id == empresa_id, Evento.ativo == True)
-        .order_by(Evento.criado_em.desc())
-    )
-    eventos = result.scalars().all()
+async def obter_eventos_ativos_empresa(
+    empresa_id: int,
+    request: Request,
+    response: Response,
+    cursor: Optional[str] = Query(None, description="Token de continuação do cabeçalho X-Proximo-Cursor"),
+    limite: int = Query(100, ge=1, le=100),
+    db: AsyncSession = Depends(obter_db_leitura)
+):
+    """Obter eventos ativos de uma empresa (endpoint público, paginação por cursor)"""
+    filtros = (Evento.organizador_id == empresa_id, Evento.ativo == True)
+    
+    marcador = (await db.execute(consulta_marcador(paginar_eventos(
+        select(Evento.id.label("id"), Evento.atualizado_em.label("versao")).where(*filtros),
+        cursor,
+        limite
+    )))).one()
+    nao_modificado = responder_condicional(request, response, *marcador, ultima_modificacao=marcador[2])
+    if nao_modificado:
+        return nao_modificado
+    
+    query = select(Evento).where(*filtros)
+    result = await db.execute(paginar_eventos(query, cursor, limite))
+    eventos = finalizar_pagina(result.scalars().all(), limite, response)
     
     return [
         {
@@ -144,7 +245,7 @@ async def obter_eventos_ativos_empresa(empresa_id: int, db: AsyncSession = Depen
             "preco_ingresso": evento.preco_ingresso,
             "total_ingressos": evento.total_ingressos,
             "ativo": evento.ativo,
-            "ingressos_vendidos": len(evento.ingressos)
+            "ingressos_vendidos": evento.ingressos_vendidos
         }
         for evento in eventos
     ]
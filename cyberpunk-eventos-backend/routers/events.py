@@ -1,17 +1,51 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func, and_, extract
+from sqlalchemy import select, func, case, cast, and_, or_, Integer
 from sqlalchemy.orm import selectinload
 from typing import List, Optional
 from datetime import datetime, timedelta, timezone
-from database.database import obter_db
-from database.models import Evento, Ingresso, Empresa
-from schemas import EventoCriar, EventoResposta, EventoDetalheResposta, EventoAtualizar, EstatisticasDashboard, EstatisticasVendasIngressos
+from database.database import obter_db, obter_db_leitura, AsyncSessionLeitura
+from database.models import Evento, Ingresso, Empresa, Pagamento, VendaConsolidada
+from database.consolidacao import truncar_hora
+from database.busca import eventos_busca, montar_consulta_fts, condicao_busca
+from schemas import EventoCriar, EventoResposta, EventoDetalheResposta, EventoAtualizar, EstatisticasDashboard, GranularidadeTempo
 from utils.auth import obter_empresa_atual
+from utils.paginacao import paginar_eventos, paginar_busca, finalizar_pagina
+from utils.cache_http import responder_condicional, consulta_marcador
+from utils.imagens import url_variante
+from utils.estatisticas import (
+    obter_fuso_horario, para_utc_ingenuo, expressao_bucket, rotulos_buckets, transicoes_fuso, deslocamentos_em_horas_inteiras,
+    instante_sql
+)
+from utils.fila_espera import backend_fila
+from utils.codigos_offline import parametros_bloom, gerar_snapshot, tamanho_snapshot, TIPO_CONTEUDO_SNAPSHOT, FORMATO_SNAPSHOT
 
 router = APIRouter(prefix="/eventos", tags=["Eventos"])
 
 
+def _montar_evento_publico(evento: Evento) -> dict:
+    """Representação pública do evento usada no catálogo e na busca"""
+    return {
+        "id": evento.id,
+        "nome": evento.nome,
+        "localizacao": evento.localizacao,
+        "descricao": evento.descricao,
+        "criado_em": evento.criado_em,
+        "data_fim": evento.data_fim,
+        "preco_ingresso": evento.preco_ingresso,
+        "total_ingressos": evento.total_ingressos,
+        "ativo": evento.ativo,
+        "ingressos_vendidos": evento.ingressos_vendidos,
+        "organizador": {
+            "id": evento.organizador.id,
+            "nome": evento.organizador.nome,
+            "email": evento.organizador.email,
+            "imagem_perfil": url_variante(evento.organizador, "perfil", "miniatura")
+        } if evento.organizador else None
+    }
+
+
 @router.post("", response_model=EventoResposta, status_code=status.HTTP_201_CREATED)
 async def criar_evento(
     evento: EventoCriar,
@@ -40,57 +74,59 @@ async def criar_evento(
     await db.commit()
     await db.refresh(db_evento)
     
-    # Adicionar contagem de ingressos vendidos (cada registro = 1 ingresso)
-    result = await db.execute(select(func.count(Ingresso.id)).where(Ingresso.evento_id == db_evento.id))
-    ingressos_vendidos = result.scalar() or 0
-    
-    resposta_dict = {
-        **db_evento.__dict__,
-        "ingressos_vendidos": ingressos_vendidos
-    }
-    
-    return resposta_dict
+    return db_evento
 
 
 @router.get("/meus-eventos", response_model=List[EventoResposta])
 async def obter_meus_eventos(
+    request: Request,
+    response: Response,
     apenas_ativos: bool = Query(True, description="Filtrar apenas eventos ativos"),
     usuario_atual: dict = Depends(obter_empresa_atual),
-    db: AsyncSession = Depends(obter_db)
+    db: AsyncSession = Depends(obter_db_leitura)
 ):
     """Obter todos os eventos da empresa atual"""
-    query = select(Evento).where(Evento.organizador_id == usuario_atual["usuario_id"])
-    
+    filtros = [Evento.organizador_id == usuario_atual["usuario_id"]]
     if apenas_ativos:
-        query = query.where(Evento.ativo == True)
+        filtros.append(Evento.ativo == True)
+    
+    # Responder 304 sem montar a lista se nada mudou
+    marcador = (await db.execute(consulta_marcador(
+        select(Evento.id.label("id"), Evento.atualizado_em.label("versao")).where(*filtros)
+    ))).one()
+    nao_modificado = responder_condicional(
+        request, response, usuario_atual["usuario_id"], *marcador, ultima_modificacao=marcador[2], privado=True
+    )
+    if nao_modificado:
+        return nao_modificado
     
-    query = query.order_by(Evento.criado_em.desc())
+    query = select(Evento).where(*filtros).order_by(Evento.criado_em.desc())
     
     result = await db.execute(query)
     eventos = result.scalars().all()
     
-    # Adicionar contagem de ingressos vendidos para cada evento (cada registro = 1 ingresso)
-    resposta = []
-    for evento in eventos:
-        ingresso_result = await db.execute(
-            select(func.count(Ingresso.id)).where(Ingresso.evento_id == evento.id)
-        )
-        ingressos_vendidos = ingresso_result.scalar() or 0
-        
-        resposta.append({
-            **evento.__dict__,
-            "ingressos_vendidos": ingressos_vendidos
-        })
-    
-    return resposta
+    # ingressos_vendidos é mantido como coluna em Evento
+    return eventos
 
 
 @router.get("/meus-eventos/historico", response_model=List[EventoResposta])
 async def obter_historico_eventos(
+    request: Request,
+    response: Response,
     usuario_atual: dict = Depends(obter_empresa_atual),
-    db: AsyncSession = Depends(obter_db)
+    db: AsyncSession = Depends(obter_db_leitura)
 ):
     """Obter eventos finalizados/inativos da empresa atual"""
+    marcador = (await db.execute(consulta_marcador(
+        select(Evento.id.label("id"), Evento.atualizado_em.label("versao"))
+        .where(Evento.organizador_id == usuario_atual["usuario_id"], Evento.ativo == False)
+    ))).one()
+    nao_modificado = responder_condicional(
+        request, response, usuario_atual["usuario_id"], *marcador, ultima_modificacao=marcador[2], privado=True
+    )
+    if nao_modificado:
+        return nao_modificado
+    
     result = await db.execute(
         select(Evento)
         .where(
@@ -101,84 +137,127 @@ async def obter_historico_eventos(
     )
     eventos = result.scalars().all()
     
-    # Adicionar contagem de ingressos vendidos para cada evento (cada registro = 1 ingresso)
-    resposta = []
-    for evento in eventos:
-        ingresso_result = await db.execute(
-            select(func.count(Ingresso.id)).where(Ingresso.evento_id == evento.id)
+    # ingressos_vendidos é mantido como coluna em Evento
+    return eventos
+
+
+async def _vendas_por_bucket(
+    db: AsyncSession,
+    organizador_id: int,
+    granularidade: GranularidadeTempo,
+    data_inicio: datetime,
+    data_fim: datetime,
+    fuso
+) -> dict:
+    """Quantidade e receita (centavos) por rótulo de bucket no intervalo [data_inicio, data_fim]"""
+    # Horas inteiras pelo rollup horário (custo proporcional ao intervalo); as horas parciais
+    # das bordas e os fusos com deslocamento fracionário (ex.: +05:30) exigem os pagamentos
+    inicio_rollup = truncar_hora(data_inicio)
+    if inicio_rollup < data_inicio:
+        inicio_rollup += timedelta(hours=1)
+    fim_rollup = truncar_hora(data_fim)
+    
+    consultas = []
+    # Comparações pelo instante, não pelo texto gravado
+    criado_em = instante_sql(Pagamento.criado_em)
+    periodo_exato = and_(criado_em >= instante_sql(data_inicio), criado_em <= instante_sql(data_fim))
+    if inicio_rollup < fim_rollup and deslocamentos_em_horas_inteiras(transicoes_fuso(data_inicio, data_fim, fuso)):
+        bucket = expressao_bucket(VendaConsolidada.hora, granularidade, data_inicio, data_fim, fuso)
+        consultas.append(
+            select(bucket, func.sum(VendaConsolidada.quantidade_ingressos), func.sum(VendaConsolidada.receita_centavos))
+            .where(
+                VendaConsolidada.organizador_id == organizador_id,
+                VendaConsolidada.hora >= inicio_rollup,
+                VendaConsolidada.hora < fim_rollup
+            )
+            .group_by(bucket)
         )
-        ingressos_vendidos = ingresso_result.scalar() or 0
-        
-        resposta.append({
-            **evento.__dict__,
-            "ingressos_vendidos": ingressos_vendidos
-        })
+        periodo_exato = or_(
+            and_(criado_em >= instante_sql(data_inicio), criado_em < instante_sql(inicio_rollup)),
+            and_(criado_em >= instante_sql(fim_rollup), criado_em <= instante_sql(data_fim))
+        )
+    
+    bucket = expressao_bucket(Pagamento.criado_em, granularidade, data_inicio, data_fim, fuso)
+    consultas.append(
+        select(
+            bucket,
+            func.sum(Pagamento.quantidade),
+            cast(func.round(func.sum(Pagamento.valor_total) * 100), Integer)
+        )
+        .join(Evento, Evento.id == Pagamento.evento_id)
+        .where(Evento.organizador_id == organizador_id, periodo_exato)
+        .group_by(bucket)
+    )
     
-    return resposta
+    vendas = {}
+    for consulta in consultas:
+        for rotulo, quantidade, receita in (await db.execute(consulta)).all():
+            quantidade_anterior, receita_anterior = vendas.get(rotulo, (0, 0))
+            vendas[rotulo] = (quantidade_anterior + quantidade, receita_anterior + receita)
+    return vendas
 
 
 @router.get("/dashboard/estatisticas", response_model=EstatisticasDashboard)
 async def obter_estatisticas_dashboard(
+    request: Request,
+    response: Response,
     data_inicio: Optional[datetime] = Query(None),
     data_fim: Optional[datetime] = Query(None),
+    granularidade: GranularidadeTempo = Query(GranularidadeTempo.DIA),
+    fuso_horario: str = Query("UTC", description="Fuso horário IANA dos buckets, ex.: America/Sao_Paulo"),
     usuario_atual: dict = Depends(obter_empresa_atual),
-    db: AsyncSession = Depends(obter_db)
+    db: AsyncSession = Depends(obter_db_leitura)
 ):
     """Obter estatísticas do dashboard com vendas ao longo do tempo"""
-    # Definir intervalo de datas padrão se não fornecido (últimos 30 dias)
-    if not data_fim:
-        data_fim = datetime.utcnow()
-    if not data_inicio:
-        data_inicio = data_fim - timedelta(days=30)
-    
-    # Total de eventos
-    total_eventos_result = await db.execute(
-        select(func.count(Evento.id)).where(Evento.organizador_id == usuario_atual["usuario_id"])
-    )
-    total_eventos = total_eventos_result.scalar() or 0
+    fuso = obter_fuso_horario(fuso_horario)
     
-    # Eventos ativos
-    eventos_ativos_result = await db.execute(
-        select(func.count(Evento.id)).where(
-            Evento.organizador_id == usuario_atual["usuario_id"],
-            Evento.ativo == True
-        )
-    )
-    eventos_ativos = eventos_ativos_result.scalar() or 0
-    
-    # Obter todos os ingressos dos eventos do usuário
-    ingressos_query = select(Ingresso).join(Evento).where(Evento.organizador_id == usuario_atual["usuario_id"])
-    ingressos_result = await db.execute(ingressos_query)
-    todos_ingressos = ingressos_result.scalars().all()
+    # Definir intervalo de datas padrão se não fornecido (últimos 30 dias)
+    data_fim = para_utc_ingenuo(data_fim) if data_fim else datetime.utcnow()
+    data_inicio = para_utc_ingenuo(data_inicio) if data_inicio else data_fim - timedelta(days=30)
     
-    total_ingressos_vendidos = len(todos_ingressos)
+    rotulos = rotulos_buckets(granularidade, data_inicio, data_fim, fuso)
     
-    # Calcular receita
-    receita_query = (
-        select(func.sum(Evento.preco_ingresso))
-        .join(Ingresso, Evento.id == Ingresso.evento_id)
+    # Compras atualizam o evento, então os eventos do organizador bastam como marcador
+    marcador = (await db.execute(consulta_marcador(
+        select(Evento.id.label("id"), Evento.atualizado_em.label("versao"))
         .where(Evento.organizador_id == usuario_atual["usuario_id"])
+    ))).one()
+    nao_modificado = responder_condicional(
+        request, response, usuario_atual["usuario_id"], rotulos[:1], rotulos[-1:], *marcador,
+        ultima_modificacao=marcador[2], privado=True
+    )
+    if nao_modificado:
+        return nao_modificado
+    
+    # Totais em uma única consulta (contador de vendidos + receita do rollup)
+    receita_subquery = (
+        select(func.coalesce(func.sum(VendaConsolidada.receita_centavos), 0))
+        .where(VendaConsolidada.organizador_id == usuario_atual["usuario_id"])
+        .scalar_subquery()
+    )
+    totais_result = await db.execute(
+        select(
+            func.count(Evento.id),
+            func.coalesce(func.sum(case((Evento.ativo == True, 1), else_=0)), 0),
+            func.coalesce(func.sum(Evento.ingressos_vendidos), 0),
+            receita_subquery
+        ).where(Evento.organizador_id == usuario_atual["usuario_id"])
+    )
+    total_eventos, eventos_ativos, total_ingressos_vendidos, receita_total = totais_result.one()
+    
+    vendas_dict = await _vendas_por_bucket(
+        db, usuario_atual["usuario_id"], granularidade, data_inicio, data_fim, fuso
     )
-    receita_result = await db.execute(receita_query)
-    receita_total = receita_result.scalar() or 0
-    
-    # Vendas ao longo do tempo (agrupadas por data)
-    vendas_dict = {}
-    for ingresso in todos_ingressos:
-        if data_inicio <= ingresso.comprado_em <= data_fim:
-            chave_data = ingresso.comprado_em.strftime("%Y-%m-%d")
-            vendas_dict[chave_data] = vendas_dict.get(chave_data, 0) + 1
-    
-    # Preencher datas faltantes com 0
-    data_atual = data_inicio
+    
+    # Preencher buckets faltantes com 0
     vendas_ao_longo_tempo = []
-    while data_atual <= data_fim:
-        chave_data = data_atual.strftime("%Y-%m-%d")
+    for rotulo in rotulos:
+        quantidade, receita = vendas_dict.get(rotulo, (0, 0))
         vendas_ao_longo_tempo.append({
-            "data": chave_data,
-            "quantidade": vendas_dict.get(chave_data, 0)
+            "data": rotulo,
+            "quantidade": quantidade,
+            "receita": receita
         })
-        data_atual += timedelta(days=1)
     
     return {
         "total_eventos": total_eventos,
@@ -189,13 +268,61 @@ async def obter_estatisticas_dashboard(
     }
 
 
+@router.get("/busca", response_model=List[dict])
+async def buscar_eventos(
+    response: Response,
+    q: str = Query(..., min_length=1, max_length=200, description="Termos de busca (prefixo, sem acentos)"),
+    cursor: Optional[str] = Query(None, description="Token de continuação do cabeçalho X-Proximo-Cursor"),
+    limite: int = Query(20, ge=1, le=100),
+    db: AsyncSession = Depends(obter_db_leitura)
+):
+    """Buscar eventos ativos por nome, localização e descrição (endpoint público, ranking BM25)"""
+    consulta_fts = montar_consulta_fts(q)
+    if not consulta_fts:
+        return []
+    
+    query = (
+        select(Evento, eventos_busca.c.rank)
+        .join(eventos_busca, eventos_busca.c.rowid == Evento.id)
+        .options(selectinload(Evento.organizador))
+        .where(condicao_busca(consulta_fts), Evento.ativo == True)
+    )
+    result = await db.execute(paginar_busca(query, cursor, limite))
+    linhas = finalizar_pagina(result.all(), limite, response, chave=lambda linha: (linha.rank, linha.Evento.id))
+    
+    return [_montar_evento_publico(linha.Evento) for linha in linhas]
+
+
 @router.get("/{evento_id}", response_model=EventoDetalheResposta)
 async def obter_detalhes_evento(
     evento_id: int,
+    request: Request,
+    response: Response,
     usuario_atual: dict = Depends(obter_empresa_atual),
-    db: AsyncSession = Depends(obter_db)
+    db: AsyncSession = Depends(obter_db_leitura)
 ):
     """Obter informações detalhadas do evento"""
+    # Compras atualizam atualizado_em do evento; o organizador também entra na resposta e o
+    # check-in só muda utilizado_em dos ingressos, então entram a contagem e o maior utilizado_em
+    do_evento = Ingresso.evento_id == evento_id
+    marcador = (await db.execute(
+        select(
+            Evento.atualizado_em,
+            Empresa.atualizado_em,
+            select(func.count(Ingresso.id)).where(do_evento).scalar_subquery(),
+            select(func.max(Ingresso.utilizado_em)).where(do_evento).scalar_subquery()
+        )
+        .join(Empresa, Empresa.id == Evento.organizador_id)
+        .where(Evento.id == evento_id, Evento.organizador_id == usuario_atual["usuario_id"])
+    )).one_or_none()
+    if marcador:
+        nao_modificado = responder_condicional(
+            request, response, usuario_atual["usuario_id"], *marcador,
+            ultima_modificacao=max(filter(None, (marcador[0], marcador[1], marcador[3])), default=None), privado=True
+        )
+        if nao_modificado:
+            return nao_modificado
+    
     result = await db.execute(
         select(Evento)
         .where(
@@ -212,7 +339,6 @@ async def obter_detalhes_evento(
         )
     
     # Obter detalhes do organizador
-    from database.models import Empresa
     organizador_result = await db.execute(select(Empresa).where(Empresa.id == evento.organizador_id))
     organizador = organizador_result.scalar_one()
     
@@ -222,12 +348,97 @@ async def obter_detalhes_evento(
     
     return {
         **evento.__dict__,
-        "ingressos_vendidos": len(ingressos),
         "organizador": organizador,
         "ingressos": ingressos
     }
 
 
+@router.get("/{evento_id}/publico", response_model=dict)
+async def obter_evento_publico(
+    evento_id: int,
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(obter_db_leitura)
+):
+    """Obter um evento ativo pelo id (endpoint público, mesma representação do catálogo)"""
+    marcador = (await db.execute(
+        select(Evento.atualizado_em, Empresa.atualizado_em)
+        .join(Empresa, Empresa.id == Evento.organizador_id)
+        .where(Evento.id == evento_id, Evento.ativo == True)
+    )).one_or_none()
+    if not marcador:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Evento não encontrado"
+        )
+    nao_modificado = responder_condicional(
+        request, response, *marcador, ultima_modificacao=max(filter(None, marcador), default=None)
+    )
+    if nao_modificado:
+        return nao_modificado
+    
+    result = await db.execute(
+        select(Evento)
+        .options(selectinload(Evento.organizador))
+        .where(Evento.id == evento_id, Evento.ativo == True)
+    )
+    evento = result.scalar_one_or_none()
+    if not evento:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Evento não encontrado"
+        )
+    
+    return _montar_evento_publico(evento)
+
+
+@router.get("/{evento_id}/codigos-offline", response_class=StreamingResponse)
+async def exportar_codigos_offline(
+    evento_id: int,
+    request: Request,
+    response: Response,
+    desde: int = Query(0, ge=0, description="Versão já sincronizada pelo dispositivo (0 = snapshot completo)"),
+    usuario_atual: dict = Depends(obter_empresa_atual),
+    db: AsyncSession = Depends(obter_db_leitura)
+):
+    """Snapshot binário dos códigos de ingresso do evento para verificação offline (apenas a organizadora)"""
+    capacidade = (await db.execute(
+        select(Evento.total_ingressos)
+        .where(Evento.id == evento_id, Evento.organizador_id == usuario_atual["usuario_id"])
+    )).scalar_one_or_none()
+    
+    if capacidade is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Evento não encontrado"
+        )
+    
+    versao, quantidade = (await db.execute(
+        select(func.max(Ingresso.id), func.count(Ingresso.id).filter(Ingresso.id > desde))
+        .where(Ingresso.evento_id == evento_id)
+    )).one()
+    versao = max(versao or 0, desde)
+    bloom = parametros_bloom(capacidade)
+    
+    nao_modificado = responder_condicional(
+        request, response, FORMATO_SNAPSHOT, versao, quantidade, *bloom, privado=True
+    )
+    if nao_modificado:
+        return nao_modificado
+    
+    # Sessão própria no gerador: a da dependência pode ser fechada antes do corpo ser enviado
+    return StreamingResponse(
+        gerar_snapshot(AsyncSessionLeitura, evento_id, bloom, quantidade, desde, versao),
+        media_type=TIPO_CONTEUDO_SNAPSHOT,
+        headers={
+            "ETag": response.headers["etag"],
+            "Cache-Control": response.headers["cache-control"],
+            "Content-Length": str(tamanho_snapshot(quantidade, bloom, desde)),
+            "X-Versao-Snapshot": str(versao),
+        }
+    )
+
+
 @router.put("/{evento_id}", response_model=EventoResposta)
 async def atualizar_evento(
     evento_id: int,
@@ -259,16 +470,7 @@ async def atualizar_evento(
     await db.commit()
     await db.refresh(evento)
     
-    # Adicionar contagem de ingressos vendidos (cada registro = 1 ingresso)
-    ingresso_result = await db.execute(
-        select(func.count(Ingresso.id)).where(Ingresso.evento_id == evento.id)
-    )
-    ingressos_vendidos = ingresso_result.scalar() or 0
-    
-    return {
-        **evento.__dict__,
-        "ingressos_vendidos": ingressos_vendidos
-    }
+    return evento
 
 
 @router.delete("/{evento_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -295,46 +497,41 @@ async def deletar_evento(
     
     await db.delete(evento)
     await db.commit()
+    await backend_fila.remover(evento_id)
     
     return None
 
 
 @router.get("", response_model=List[dict])
 async def obter_todos_eventos_ativos(
-    pular: int = Query(0, ge=0),
+    request: Request,
+    response: Response,
+    cursor: Optional[str] = Query(None, description="Token de continuação do cabeçalho X-Proximo-Cursor"),
     limite: int = Query(100, ge=1, le=100),
-    db: AsyncSession = Depends(obter_db)
+    pular: int = Query(0, ge=0, deprecated=True, description="Deslocamento legado, ignorado com cursor; prefira cursor"),
+    db: AsyncSession = Depends(obter_db_leitura)
 ):
-    """Obter todos os eventos ativos (endpoint público)"""
-    result = await db.execute(
+    """Obter todos os eventos ativos (endpoint público, paginação por cursor)"""
+    # Marcador da página: ids e maior atualizado_em entre evento e organizador
+    marcador = (await db.execute(consulta_marcador(paginar_eventos(
+        select(Evento.id.label("id"), func.max(Evento.atualizado_em, Empresa.atualizado_em).label("versao"))
+        .join(Empresa, Empresa.id == Evento.organizador_id)
+        .where(Evento.ativo == True),
+        cursor,
+        limite,
+        pular
+    )))).one()
+    nao_modificado = responder_condicional(request, response, *marcador, ultima_modificacao=marcador[2])
+    if nao_modificado:
+        return nao_modificado
+    
+    query = (
         select(Evento)
-        .options(selectinload(Evento.organizador), selectinload(Evento.ingressos))
+        .options(selectinload(Evento.organizador))
         .where(Evento.ativo == True)
-        .order_by(Evento.criado_em.desc())
-        .offset(pular)
-        .limit(limite)
     )
-    eventos = result.scalars().all()
+    result = await db.execute(paginar_eventos(query, cursor, limite, pular))
+    eventos = finalizar_pagina(result.scalars().all(), limite, response)
     
     # Montar resposta com organizador e ingressos vendidos
-    resposta = []
-    for evento in eventos:
-        resposta.append({
-            "id": evento.id,
-            "nome": evento.nome,
-            "localizacao": evento.localizacao,
-            "descricao": evento.descricao,
-            "criado_em": evento.criado_em,
-            "data_fim": evento.data_fim,
-            "preco_ingresso": evento.preco_ingresso,
-            "total_ingressos": evento.total_ingressos,
-            "ativo": evento.ativo,
-            "ingressos_vendidos": len(evento.ingressos),
-            "organizador": {
-                "id": evento.organizador.id,
-                "nome": evento.organizador.nome,
-                "email": evento.organizador.email
-            } if evento.organizador else None
-        })
-    
-    return resposta
+    return [_montar_evento_publico(evento) for evento in eventos]
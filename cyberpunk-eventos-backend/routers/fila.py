@@ -0,0 +1,126 @@
+from fastapi import APIRouter, Depends, HTTPException, status, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
+from database.database import obter_db_leitura
+from database.models import Evento
+from schemas import ConfiguracaoFilaRequisicao, EstadoFilaResposta, SituacaoFilaResposta
+from utils.auth import obter_empresa_atual, obter_cliente_atual
+from utils.fila_espera import backend_fila, ConfiguracaoFila, EstadoFila, SituacaoFila, intervalo_consulta
+
+router = APIRouter(prefix="/eventos", tags=["Fila de Espera"])
+
+
+def _estado_resposta(evento_id: int, estado: EstadoFila) -> dict:
+    taxa, rajada, validade = estado.configuracao
+    return {
+        "evento_id": evento_id,
+        "admissoes_por_segundo": taxa,
+        "rajada": rajada,
+        "validade_admissao": validade,
+        "aguardando": estado.aguardando,
+        "admitidos": estado.admitidos
+    }
+
+
+def _situacao_resposta(evento_id: int, situacao: SituacaoFila, response: Response) -> dict:
+    # Quem ainda aguarda recebe o intervalo sugerido para consultar de novo
+    if not situacao.admitido:
+        response.headers["Retry-After"] = str(intervalo_consulta(situacao))
+    return {"evento_id": evento_id, **situacao._asdict()}
+
+
+async def _exigir_organizadora(db: AsyncSession, evento_id: int, empresa_id: int) -> None:
+    evento_id_encontrado = (await db.execute(
+        select(Evento.id).where(Evento.id == evento_id, Evento.organizador_id == empresa_id)
+    )).scalar_one_or_none()
+
+    if evento_id_encontrado is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Evento não encontrado"
+        )
+
+
+@router.put("/{evento_id}/fila", response_model=EstadoFilaResposta)
+async def configurar_fila(
+    evento_id: int,
+    configuracao: ConfiguracaoFilaRequisicao,
+    usuario_atual: dict = Depends(obter_empresa_atual),
+    db: AsyncSession = Depends(obter_db_leitura)
+):
+    """Ligar ou ajustar a fila de espera do evento (apenas a organizadora)"""
+    await _exigir_organizadora(db, evento_id, usuario_atual["usuario_id"])
+    estado = await backend_fila.configurar(evento_id, ConfiguracaoFila(
+        configuracao.admissoes_por_segundo, configuracao.rajada, configuracao.validade_admissao
+    ))
+    return _estado_resposta(evento_id, estado)
+
+
+@router.get("/{evento_id}/fila", response_model=EstadoFilaResposta)
+async def obter_estado_fila(
+    evento_id: int,
+    usuario_atual: dict = Depends(obter_empresa_atual),
+    db: AsyncSession = Depends(obter_db_leitura)
+):
+    """Configuração e tamanho da fila de espera do evento (apenas a organizadora)"""
+    await _exigir_organizadora(db, evento_id, usuario_atual["usuario_id"])
+    estado = await backend_fila.estado(evento_id)
+
+    if estado is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Evento sem fila de espera"
+        )
+
+    return _estado_resposta(evento_id, estado)
+
+
+@router.delete("/{evento_id}/fila", status_code=status.HTTP_204_NO_CONTENT)
+async def encerrar_fila(
+    evento_id: int,
+    usuario_atual: dict = Depends(obter_empresa_atual),
+    db: AsyncSession = Depends(obter_db_leitura)
+):
+    """Desligar a fila de espera: as compras voltam a ser livres"""
+    await _exigir_organizadora(db, evento_id, usuario_atual["usuario_id"])
+    await backend_fila.remover(evento_id)
+
+    return None
+
+
+# As rotas dos clientes não tocam o banco: aguentam a rajada de consultas da abertura
+@router.post("/{evento_id}/fila/entrar", response_model=SituacaoFilaResposta)
+async def entrar_fila(
+    evento_id: int,
+    response: Response,
+    usuario_atual: dict = Depends(obter_cliente_atual)
+):
+    """Entrar na fila de espera do evento (repetir devolve a mesma posição)"""
+    situacao = await backend_fila.entrar(evento_id, usuario_atual["usuario_id"])
+
+    if situacao is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Evento sem fila de espera"
+        )
+
+    return _situacao_resposta(evento_id, situacao, response)
+
+
+@router.get("/{evento_id}/fila/{token}", response_model=SituacaoFilaResposta)
+async def consultar_fila(
+    evento_id: int,
+    token: str,
+    response: Response,
+    usuario_atual: dict = Depends(obter_cliente_atual)
+):
+    """Consultar a posição de um token na fila"""
+    situacao = await backend_fila.consultar(evento_id, token)
+
+    if situacao is None or situacao.cliente_id != usuario_atual["usuario_id"]:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Token não encontrado na fila (expirado ou já utilizado)"
+        )
+
+    return _situacao_resposta(evento_id, situacao, response)
@@ -1,32 +1,84 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, Request, Response, Header
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, update, insert, func
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import selectinload
-from typing import List
-from database.database import obter_db
+from sqlalchemy.orm.attributes import set_committed_value
+from typing import Callable, List, Optional
+from database.database import obter_db, obter_db_leitura
 from database.models import Ingresso, Evento, Pagamento
-from schemas import IngressoCriar, IngressoResposta, IngressoDetalheResposta, PagamentoComIngressos
-from utils.auth import obter_cliente_atual
-from utils.helpers import gerar_hash_ingresso
-from hashlib import sha256
-from datetime import datetime
+from database.consolidacao import registrar_venda
+from schemas import (
+    IngressoCriar, IngressoResposta, IngressoDetalheResposta, PagamentoComIngressos,
+    RequisicaoCheckin, RespostaCheckin, SituacaoCheckin
+)
+from utils.auth import obter_cliente_atual, obter_empresa_atual
+from utils.checkin import fazer_checkin
+from utils.fila_espera import exigir_admissao, backend_fila
+from utils.idempotencia import (
+    CABECALHO_IDEMPOTENCIA, ChaveCompra, chave_compra, execucao_exclusiva, resposta_armazenada, registrar_resposta
+)
+from utils.helpers import gerar_hash_ingresso, gerar_codigo_pagamento
+from utils.cache_http import responder_condicional, consulta_marcador
+from utils.metricas import INGRESSOS_VENDIDOS, COMPRAS_SEM_ESTOQUE
 
 router = APIRouter(prefix="/ingressos", tags=["Ingressos"])
 
+# Tentativas de INSERT antes de desistir em caso de colisão de código (praticamente impossível)
+TENTATIVAS_CODIGO_UNICO = 5
 
-def gerar_codigo_pagamento() -> str:
-    """Gera um código único de pagamento"""
-    timestamp = datetime.now().isoformat()
-    return sha256(f"PAG-{timestamp}".encode()).hexdigest()[:16].upper()
+
+def versao_ingresso():
+    """Marcador de versão de um ingresso: muda com o evento e com o check-in"""
+    return func.max(Evento.atualizado_em, func.coalesce(Ingresso.utilizado_em, Evento.atualizado_em))
+
+
+async def inserir_com_codigos_unicos(db: AsyncSession, modelo, montar_linhas: Callable[[], List[dict]]) -> list:
+    """Inserir linhas com códigos aleatórios, confiando no índice único em vez de consultar antes.
+    
+    Cada tentativa roda em um SAVEPOINT; só uma IntegrityError real gera novos códigos.
+    """
+    for tentativa in range(TENTATIVAS_CODIGO_UNICO):
+        try:
+            async with db.begin_nested():
+                result = await db.execute(insert(modelo).returning(modelo), montar_linhas())
+                return result.scalars().all()
+        except IntegrityError:
+            if tentativa == TENTATIVAS_CODIGO_UNICO - 1:
+                raise
 
 
 @router.post("", response_model=PagamentoComIngressos, status_code=status.HTTP_201_CREATED)
 async def comprar_ingresso(
     dados_ingresso: IngressoCriar,
     usuario_atual: dict = Depends(obter_cliente_atual),
-    db: AsyncSession = Depends(obter_db)
+    db: AsyncSession = Depends(obter_db),
+    fila_token: Optional[str] = Header(None, alias="X-Fila-Token"),
+    chave_idempotencia: Optional[str] = Header(None, alias=CABECALHO_IDEMPOTENCIA)
 ):
     """Comprar ingressos - cria 1 pagamento + N ingressos individuais"""
+    if chave_idempotencia is None:
+        return await _efetuar_compra(dados_ingresso, usuario_atual, db, fila_token)
+    
+    # Repetições da mesma chave devolvem a resposta da primeira, sem tocar no estoque nem na fila
+    chave = chave_compra(usuario_atual["usuario_id"], chave_idempotencia, dados_ingresso)
+    async with execucao_exclusiva(chave):
+        repeticao = await resposta_armazenada(chave)
+        if repeticao is not None:
+            return repeticao
+        return await _efetuar_compra(dados_ingresso, usuario_atual, db, fila_token, chave)
+
+
+async def _efetuar_compra(
+    dados_ingresso: IngressoCriar,
+    usuario_atual: dict,
+    db: AsyncSession,
+    fila_token: Optional[str],
+    chave: Optional[ChaveCompra] = None
+):
+    # Eventos com fila de espera: só tokens admitidos, antes de qualquer acesso ao banco
+    token_admitido = await exigir_admissao(dados_ingresso.evento_id, usuario_atual["usuario_id"], fila_token)
+    
     # Verificar se o evento existe e está ativo
     evento_result = await db.execute(select(Evento).where(Evento.id == dados_ingresso.evento_id))
     evento = evento_result.scalar_one_or_none()
@@ -43,104 +95,129 @@ async def comprar_ingresso(
             detail="Evento não está ativo"
         )
     
-    # Verificar se ainda há ingressos disponíveis
-    ingressos_result = await db.execute(
-        select(Ingresso).where(Ingresso.evento_id == dados_ingresso.evento_id)
+    # Reservar os ingressos de forma atômica: o UPDATE só afeta a linha se ainda
+    # houver estoque, então compras concorrentes nunca ultrapassam total_ingressos
+    reserva_result = await db.execute(
+        update(Evento)
+        .where(
+            Evento.id == dados_ingresso.evento_id,
+            Evento.ativo == True,
+            Evento.ingressos_vendidos + dados_ingresso.quantidade <= Evento.total_ingressos
+        )
+        .values(ingressos_vendidos=Evento.ingressos_vendidos + dados_ingresso.quantidade)
+        .returning(Evento.ingressos_vendidos)
+        .execution_options(synchronize_session=False)
     )
-    ingressos_existentes = ingressos_result.scalars().all()
-    
-    # Calcular total de ingressos vendidos (cada registro = 1 ingresso)
-    total_vendidos = len(ingressos_existentes)
+    ingressos_vendidos = reserva_result.scalar_one_or_none()
     
-    if total_vendidos + dados_ingresso.quantidade > evento.total_ingressos:
+    if ingressos_vendidos is None:
+        await db.rollback()
+        COMPRAS_SEM_ESTOQUE.incrementar()
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Não há ingressos disponíveis suficientes para este evento"
         )
     
+    set_committed_value(evento, "ingressos_vendidos", ingressos_vendidos)
+    
     # Calcular valor total
     valor_total = (evento.preco_ingresso / 100) * dados_ingresso.quantidade
     
-    # Gerar código único de pagamento
-    codigo_pagamento = gerar_codigo_pagamento()
+    # Criar o pagamento (INSERT ... RETURNING já traz id e criado_em)
+    [pagamento] = await inserir_com_codigos_unicos(db, Pagamento, lambda: [{
+        "codigo_pagamento": gerar_codigo_pagamento(),
+        "quantidade": dados_ingresso.quantidade,
+        "valor_total": valor_total,
+        "metodo_pagamento": dados_ingresso.metodo_pagamento,
+        "nome_comprador": dados_ingresso.nome_comprador,
+        "email_comprador": dados_ingresso.email_comprador,
+        "cpf_comprador": dados_ingresso.cpf_comprador,
+        "cliente_id": usuario_atual["usuario_id"],
+        "evento_id": dados_ingresso.evento_id
+    }])
     
-    # Garantir que o código de pagamento é único
-    while True:
-        pag_result = await db.execute(select(Pagamento).where(Pagamento.codigo_pagamento == codigo_pagamento))
-        if not pag_result.scalar_one_or_none():
-            break
-        codigo_pagamento = gerar_codigo_pagamento()
+    # Criar ingressos individuais (quantidade sempre 1) em um único INSERT multi-linha
+    def montar_ingressos() -> List[dict]:
+        codigos_hash = set()
+        while len(codigos_hash) < dados_ingresso.quantidade:
+            codigos_hash.add(gerar_hash_ingresso())
+        return [
+            {
+                "codigo_hash": codigo_hash,
+                "cliente_id": usuario_atual["usuario_id"],
+                "evento_id": dados_ingresso.evento_id,
+                "pagamento_id": pagamento.id,
+                "quantidade": 1,  # Cada registro é 1 ingresso
+                "metodo_pagamento": dados_ingresso.metodo_pagamento.value,
+                "nome_comprador": dados_ingresso.nome_comprador,
+                "email_comprador": dados_ingresso.email_comprador,
+                "cpf_comprador": dados_ingresso.cpf_comprador
+            }
+            for codigo_hash in codigos_hash
+        ]
+    
+    ingressos = await inserir_com_codigos_unicos(db, Ingresso, montar_ingressos)
     
-    # Criar o pagamento
-    pagamento = Pagamento(
-        codigo_pagamento=codigo_pagamento,
+    # Atualizar o rollup de vendas na mesma transação
+    await registrar_venda(
+        db,
+        organizador_id=evento.organizador_id,
+        evento_id=evento.id,
+        data_compra=pagamento.criado_em,
+        metodo_pagamento=pagamento.metodo_pagamento,
         quantidade=dados_ingresso.quantidade,
-        valor_total=valor_total,
-        metodo_pagamento=dados_ingresso.metodo_pagamento,
-        nome_comprador=dados_ingresso.nome_comprador,
-        email_comprador=dados_ingresso.email_comprador,
-        cpf_comprador=dados_ingresso.cpf_comprador,
-        cliente_id=usuario_atual["usuario_id"],
-        evento_id=dados_ingresso.evento_id
+        receita_centavos=evento.preco_ingresso * dados_ingresso.quantidade
     )
     
-    db.add(pagamento)
-    await db.flush()  # Flush para obter o ID do pagamento
+    # Montar a resposta a partir das linhas retornadas, sem reler o banco
+    set_committed_value(pagamento, "ingressos", ingressos)
+    set_committed_value(pagamento, "evento", evento)
     
-    # Criar ingressos individuais
-    ingressos_criados = []
-    
-    for _ in range(dados_ingresso.quantidade):
-        # Gerar hash único para cada ingresso
-        codigo_hash = gerar_hash_ingresso()
-        
-        # Garantir que o hash é único
-        while True:
-            hash_result = await db.execute(select(Ingresso).where(Ingresso.codigo_hash == codigo_hash))
-            if not hash_result.scalar_one_or_none():
-                break
-            codigo_hash = gerar_hash_ingresso()
-        
-        # Criar ingresso individual (quantidade sempre 1)
-        ingresso = Ingresso(
-            codigo_hash=codigo_hash,
-            cliente_id=usuario_atual["usuario_id"],
-            evento_id=dados_ingresso.evento_id,
-            pagamento_id=pagamento.id,
-            quantidade=1,  # Cada registro é 1 ingresso
-            metodo_pagamento=dados_ingresso.metodo_pagamento.value,
-            nome_comprador=dados_ingresso.nome_comprador,
-            email_comprador=dados_ingresso.email_comprador,
-            cpf_comprador=dados_ingresso.cpf_comprador
-        )
-        
-        db.add(ingresso)
-        ingressos_criados.append(ingresso)
+    corpo = None
+    if chave:
+        corpo = PagamentoComIngressos.model_validate(pagamento).model_dump_json()
+        if not await registrar_resposta(db, chave, corpo):
+            # Outro processo concluiu a mesma chave antes: desfazer e devolver a resposta dele
+            await db.rollback()
+            repeticao = await resposta_armazenada(chave)
+            if repeticao is None:
+                # A linha que venceu a disputa já não está válida: nada foi comprado nesta requisição
+                raise HTTPException(
+                    status_code=status.HTTP_409_CONFLICT,
+                    detail=f"{CABECALHO_IDEMPOTENCIA} em uso por outra requisição. Tente novamente."
+                )
+            return repeticao
     
     await db.commit()
-    await db.refresh(pagamento)
+    INGRESSOS_VENDIDOS.incrementar(dados_ingresso.quantidade)
+    if token_admitido:
+        await backend_fila.concluir(dados_ingresso.evento_id, token_admitido)
     
-    # Refresh dos ingressos para obter IDs
-    for ingresso in ingressos_criados:
-        await db.refresh(ingresso)
-    
-    # Carregar relacionamentos completos
-    result = await db.execute(
-        select(Pagamento)
-        .options(selectinload(Pagamento.ingressos), selectinload(Pagamento.evento))
-        .where(Pagamento.id == pagamento.id)
-    )
-    pagamento_completo = result.scalar_one()
-    
-    return pagamento_completo
+    if corpo is not None:
+        return Response(corpo, status_code=status.HTTP_201_CREATED, media_type="application/json")
+    return pagamento
 
 
 @router.get("/meus-pagamentos", response_model=List[PagamentoComIngressos])
 async def obter_meus_pagamentos(
+    request: Request,
+    response: Response,
     usuario_atual: dict = Depends(obter_cliente_atual),
-    db: AsyncSession = Depends(obter_db)
+    db: AsyncSession = Depends(obter_db_leitura)
 ):
     """Obter todos os pagamentos do cliente atual"""
+    # Pagamentos são imutáveis; mudam o evento embutido (atualizado_em) e o check-in dos ingressos
+    marcador = (await db.execute(consulta_marcador(
+        select(Ingresso.pagamento_id.label("id"), versao_ingresso().label("versao"))
+        .join(Evento, Evento.id == Ingresso.evento_id)
+        .where(Ingresso.cliente_id == usuario_atual["usuario_id"])
+    ))).one()
+    nao_modificado = responder_condicional(
+        request, response, usuario_atual["usuario_id"], *marcador, ultima_modificacao=marcador[2], privado=True
+    )
+    if nao_modificado:
+        return nao_modificado
+    
     result = await db.execute(
         select(Pagamento)
         .options(selectinload(Pagamento.ingressos), selectinload(Pagamento.evento))
@@ -154,50 +231,59 @@ async def obter_meus_pagamentos(
 
 @router.get("/meus-ingressos", response_model=List[IngressoDetalheResposta])
 async def obter_meus_ingressos(
+    request: Request,
+    response: Response,
     usuario_atual: dict = Depends(obter_cliente_atual),
-    db: AsyncSession = Depends(obter_db)
+    db: AsyncSession = Depends(obter_db_leitura)
 ):
     """Obter todos os ingressos comprados pelo cliente atual"""
+    marcador = (await db.execute(consulta_marcador(
+        select(Ingresso.id.label("id"), versao_ingresso().label("versao"))
+        .join(Evento, Evento.id == Ingresso.evento_id)
+        .where(Ingresso.cliente_id == usuario_atual["usuario_id"])
+    ))).one()
+    nao_modificado = responder_condicional(
+        request, response, usuario_atual["usuario_id"], *marcador, ultima_modificacao=marcador[2], privado=True
+    )
+    if nao_modificado:
+        return nao_modificado
+    
     result = await db.execute(
         select(Ingresso)
+        .options(selectinload(Ingresso.evento))
         .where(Ingresso.cliente_id == usuario_atual["usuario_id"])
         .order_by(Ingresso.comprado_em.desc())
     )
     ingressos = result.scalars().all()
     
-    # Adicionar detalhes do evento para cada ingresso
-    resposta = []
-    for ingresso in ingressos:
-        evento_result = await db.execute(select(Evento).where(Evento.id == ingresso.evento_id))
-        evento = evento_result.scalar_one()
-        
-        # Contar ingressos vendidos (cada registro = 1 ingresso)
-        from sqlalchemy import func
-        ingressos_vendidos_result = await db.execute(
-            select(func.count(Ingresso.id)).where(Ingresso.evento_id == evento.id)
-        )
-        ingressos_vendidos = ingressos_vendidos_result.scalar() or 0
-        
-        resposta.append({
-            **ingresso.__dict__,
-            "evento": {
-                **evento.__dict__,
-                "ingressos_vendidos": ingressos_vendidos
-            }
-        })
-    
-    return resposta
+    # Detalhes do evento (incluindo ingressos_vendidos) vêm do relacionamento
+    return ingressos
 
 
 @router.get("/{ingresso_id}", response_model=IngressoDetalheResposta)
 async def obter_detalhes_ingresso(
     ingresso_id: int,
+    request: Request,
+    response: Response,
     usuario_atual: dict = Depends(obter_cliente_atual),
-    db: AsyncSession = Depends(obter_db)
+    db: AsyncSession = Depends(obter_db_leitura)
 ):
     """Obter detalhes de um ingresso específico"""
+    versao = (await db.execute(
+        select(versao_ingresso())
+        .join(Ingresso, Ingresso.evento_id == Evento.id)
+        .where(Ingresso.id == ingresso_id, Ingresso.cliente_id == usuario_atual["usuario_id"])
+    )).one_or_none()
+    if versao:
+        nao_modificado = responder_condicional(
+            request, response, usuario_atual["usuario_id"], versao[0], ultima_modificacao=versao[0], privado=True
+        )
+        if nao_modificado:
+            return nao_modificado
+    
     result = await db.execute(
         select(Ingresso)
+        .options(selectinload(Ingresso.evento))
         .where(
             Ingresso.id == ingresso_id,
             Ingresso.cliente_id == usuario_atual["usuario_id"]
@@ -211,30 +297,32 @@ async def obter_detalhes_ingresso(
             detail="Ingresso não encontrado"
         )
     
-    # Obter detalhes do evento
-    evento_result = await db.execute(select(Evento).where(Evento.id == ingresso.evento_id))
-    evento = evento_result.scalar_one()
-    
-    # Contar ingressos vendidos (soma das quantidades)
-    from sqlalchemy import func
-    ingressos_vendidos_result = await db.execute(
-        select(func.sum(Ingresso.quantidade)).where(Ingresso.evento_id == evento.id)
-    )
-    ingressos_vendidos = ingressos_vendidos_result.scalar() or 0
-    
-    return {
-        **ingresso.__dict__,
-        "evento": {
-            **evento.__dict__,
-            "ingressos_vendidos": ingressos_vendidos
-        }
-    }
+    return ingresso
 
 
 @router.get("/verificar/{codigo_hash}", response_model=IngressoDetalheResposta)
-async def verificar_ingresso(codigo_hash: str, db: AsyncSession = Depends(obter_db)):
+async def verificar_ingresso(
+    codigo_hash: str,
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(obter_db_leitura)
+):
     """Verificar um ingresso pelo código hash (endpoint público)"""
-    result = await db.execute(select(Ingresso).where(Ingresso.codigo_hash == codigo_hash))
+    versao = (await db.execute(
+        select(versao_ingresso())
+        .join(Ingresso, Ingresso.evento_id == Evento.id)
+        .where(Ingresso.codigo_hash == codigo_hash)
+    )).one_or_none()
+    if versao:
+        nao_modificado = responder_condicional(request, response, versao[0], ultima_modificacao=versao[0])
+        if nao_modificado:
+            return nao_modificado
+    
+    result = await db.execute(
+        select(Ingresso)
+        .options(selectinload(Ingresso.evento))
+        .where(Ingresso.codigo_hash == codigo_hash)
+    )
     ingresso = result.scalar_one_or_none()
     
     if not ingresso:
@@ -243,21 +331,33 @@ async def verificar_ingresso(codigo_hash: str, db: AsyncSession = Depends(obter_
             detail="Ingresso não encontrado"
         )
     
-    # Obter detalhes do evento
-    evento_result = await db.execute(select(Evento).where(Evento.id == ingresso.evento_id))
-    evento = evento_result.scalar_one()
+    return ingresso
+
+
+@router.post("/checkin", response_model=RespostaCheckin)
+async def fazer_checkin_ingressos(
+    dados: RequisicaoCheckin,
+    usuario_atual: dict = Depends(obter_empresa_atual),
+    db: AsyncSession = Depends(obter_db)
+):
+    """Validar e dar entrada em um lote de ingressos do evento (apenas a organizadora)"""
+    organizador_id = (await db.execute(
+        select(Evento.organizador_id).where(Evento.id == dados.evento_id)
+    )).scalar_one_or_none()
+    
+    if organizador_id != usuario_atual["usuario_id"]:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Evento não encontrado"
+        )
     
-    # Contar ingressos vendidos (soma das quantidades)
-    from sqlalchemy import func
-    ingressos_vendidos_result = await db.execute(
-        select(func.sum(Ingresso.quantidade)).where(Ingresso.evento_id == evento.id)
-    )
-    ingressos_vendidos = ingressos_vendidos_result.scalar() or 0
+    resultados = await fazer_checkin(db, dados.evento_id, dados.codigos)
     
     return {
-        **ingresso.__dict__,
-        "evento": {
-            **evento.__dict__,
-            "ingressos_vendidos": ingressos_vendidos
-        }
+        "evento_id": dados.evento_id,
+        "confirmados": sum(1 for _, situacao, _ in resultados if situacao == SituacaoCheckin.CONFIRMADO),
+        "resultados": [
+            {"codigo_hash": codigo, "situacao": situacao, "utilizado_em": utilizado_em}
+            for codigo, situacao, utilizado_em in resultados
+        ]
     }
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, EmailStr, Field
-from typing import Optional, List
+from typing import Optional, List, Dict
 from datetime import datetime
 from enum import Enum
 
@@ -9,6 +9,31 @@ class MetodoPagamento(str, Enum):
     CARTAO = "cartao"
 
 
+class GranularidadeTempo(str, Enum):
+    HORA = "hora"
+    DIA = "dia"
+    SEMANA = "semana"
+    MES = "mes"
+
+
+class TipoImagem(str, Enum):
+    PERFIL = "perfil"
+    FUNDO = "fundo"
+
+
+class TamanhoImagem(str, Enum):
+    MINIATURA = "miniatura"
+    CARTAO = "cartao"
+    COMPLETA = "completa"
+    ORIGINAL = "original"
+
+
+class SituacaoCheckin(str, Enum):
+    CONFIRMADO = "confirmado"  # Entrada liberada agora
+    JA_UTILIZADO = "ja_utilizado"
+    INVALIDO = "invalido"  # Código inexistente ou de outro evento
+
+
 # Schemas da Empresa
 class EmpresaBase(BaseModel):
     nome: str
@@ -34,6 +59,7 @@ class EmpresaResposta(EmpresaBase):
     biografia: Optional[str]
     imagem_perfil: Optional[str]
     imagem_fundo: Optional[str]
+    imagens_variantes: Optional[Dict[str, Dict[str, Dict[str, str]]]] = None
     criado_em: datetime
 
     class Config:
@@ -112,7 +138,7 @@ class IngressoBase(BaseModel):
 
 
 class IngressoCriar(IngressoBase):
-    quantidade: int = 1
+    quantidade: int = Field(1, gt=0, description="Quantidade de ingressos")
     metodo_pagamento: MetodoPagamento
     nome_comprador: str
     email_comprador: EmailStr
@@ -128,6 +154,7 @@ class IngressoResposta(BaseModel):
     quantidade: int
     pagamento_id: int
     metodo_pagamento: Optional[str] = None
+    utilizado_em: Optional[datetime] = None
 
     class Config:
         from_attributes = True
@@ -166,6 +193,50 @@ class IngressoDetalheResposta(IngressoResposta):
         from_attributes = True
 
 
+# Schemas do Check-in
+class RequisicaoCheckin(BaseModel):
+    evento_id: int
+    codigos: List[str] = Field(..., min_length=1, max_length=500, description="Códigos lidos no portão")
+
+
+class ResultadoCheckin(BaseModel):
+    codigo_hash: str
+    situacao: SituacaoCheckin
+    utilizado_em: Optional[datetime] = None
+
+
+class RespostaCheckin(BaseModel):
+    evento_id: int
+    confirmados: int
+    resultados: List[ResultadoCheckin]  # Na ordem dos códigos enviados
+
+
+# Schemas da Fila de Espera
+class ConfiguracaoFilaRequisicao(BaseModel):
+    admissoes_por_segundo: float = Field(..., gt=0, description="Clientes liberados para comprar por segundo")
+    rajada: int = Field(10, ge=0, description="Admissões imediatas quando a fila está vazia")
+    validade_admissao: int = Field(600, gt=0, description="Segundos para comprar depois de admitido")
+
+
+class EstadoFilaResposta(BaseModel):
+    evento_id: int
+    admissoes_por_segundo: float
+    rajada: int
+    validade_admissao: int
+    aguardando: int
+    admitidos: int
+
+
+class SituacaoFilaResposta(BaseModel):
+    evento_id: int
+    token: str  # Enviar no cabeçalho X-Fila-Token da compra
+    posicao: int
+    a_frente: int
+    admitido: bool
+    espera_estimada: float = Field(description="Segundos até a admissão (estimativa)")
+    expira_em: Optional[float] = Field(None, description="Segundos restantes para comprar, se admitido")
+
+
 # Schemas de Autenticação
 class Token(BaseModel):
     token_acesso: str
@@ -189,6 +260,7 @@ class RequisicaoMudarSenha(BaseModel):
 class EstatisticasVendasIngressos(BaseModel):
     data: str
     quantidade: int
+    receita: int = 0  # Receita em centavos
 
 
 class EstatisticasDashboard(BaseModel):
@@ -0,0 +1,45 @@
+"""
+Fixtures dos testes (a partir de cyberpunk-eventos-backend/: python -m pytest).
+
+O app lê DATABASE_URL na importação, então o banco temporário é configurado ao
+carregar este módulo, antes de qualquer teste importar o app. Cada teste roda
+em um banco novo, com o esquema e as migrações aplicados.
+"""
+import asyncio
+import os
+
+import pytest
+
+from benchmarks.comum import configurar_banco_temporario, remover_banco_temporario, criar_esquema
+
+PASTA = configurar_banco_temporario()
+
+
+@pytest.fixture(scope="session", autouse=True)
+def _pasta_temporaria():
+    yield
+    remover_banco_temporario(PASTA)
+
+
+@pytest.fixture
+def rodar():
+    """rodar(funcao, *args): executar a corrotina em um banco recém-criado e liberar as conexões no fim"""
+    from database.database import DATABASE_URL, engine, engine_leitura
+
+    def rodar(funcao, *args):
+        async def executar():
+            await criar_esquema()
+            try:
+                return await funcao(*args)
+            finally:
+                for motor in {engine, engine_leitura}:
+                    await motor.dispose()
+
+        return asyncio.run(executar())
+
+    yield rodar
+
+    caminho = DATABASE_URL.split("///", 1)[1]
+    for sufixo in ("", "-wal", "-shm"):
+        if os.path.exists(caminho + sufixo):
+            os.remove(caminho + sufixo)
@@ -0,0 +1,41 @@
+"""ETag dos detalhes do evento: mudanças que não tocam atualizado_em também geram nova versão."""
+from datetime import datetime, timedelta, timezone
+
+from benchmarks.comum import cliente_http, registrar_e_logar
+
+
+async def etags_antes_e_depois_do_checkin() -> dict:
+    async with cliente_http() as cliente:
+        empresa = await registrar_e_logar(cliente, "empresa", "org@cache.dev")
+        comprador = await registrar_e_logar(cliente, "cliente", "cliente@cache.dev")
+        evento = (await cliente.post("/eventos", headers=empresa, json={
+            "nome": "Neon Rave", "localizacao": "Night City", "preco_ingresso": 5000, "total_ingressos": 10,
+            "data_fim": (datetime.now(timezone.utc) + timedelta(days=30)).isoformat()
+        })).json()
+        pagamento = (await cliente.post("/ingressos", headers=comprador, json={
+            "evento_id": evento["id"], "quantidade": 1, "metodo_pagamento": "pix",
+            "nome_comprador": "Cliente", "email_comprador": "cliente@cache.dev", "cpf_comprador": "00000000000"
+        })).json()
+        url = f"/eventos/{evento['id']}"
+
+        antes = await cliente.get(url, headers=empresa)
+        repeticao = await cliente.get(url, headers={**empresa, "If-None-Match": antes.headers["ETag"]})
+        (await cliente.post("/ingressos/checkin", headers=empresa, json={
+            "evento_id": evento["id"], "codigos": [pagamento["ingressos"][0]["codigo_hash"]]
+        })).raise_for_status()
+        depois = await cliente.get(url, headers={**empresa, "If-None-Match": antes.headers["ETag"]})
+
+    return {"antes": antes, "repeticao": repeticao, "depois": depois}
+
+
+def test_checkin_invalida_etag_dos_detalhes_do_evento(rodar):
+    respostas = rodar(etags_antes_e_depois_do_checkin)
+
+    assert respostas["antes"].status_code == 200
+    assert respostas["antes"].json()["ingressos"][0]["utilizado_em"] is None
+    assert respostas["repeticao"].status_code == 304
+
+    depois = respostas["depois"]
+    assert depois.status_code == 200
+    assert depois.headers["ETag"] != respostas["antes"].headers["ETag"]
+    assert depois.json()["ingressos"][0]["utilizado_em"] is not None
@@ -0,0 +1,128 @@
+"""
+Detector de N+1: o número de consultas SQL de cada endpoint não pode crescer com os dados.
+
+Para cada endpoint de listagem/detalhe, acrescenta linhas (eventos, compras,
+ingressos por compra) em degraus e compara o cabeçalho X-Consultas-SQL entre
+eles, via afirmar_consultas_constantes.
+"""
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable, Dict, List, Sequence, Tuple
+
+import pytest
+
+from benchmarks.comum import cliente_http, registrar_e_logar
+
+TAMANHOS = (1, 5, 20)
+
+CENARIOS = [
+    "GET /eventos",
+    "GET /eventos/busca",
+    "GET /eventos/meus-eventos",
+    "GET /empresas/{id}/eventos",
+    "GET /eventos/{id}",
+    "GET /eventos/dashboard/estatisticas",
+    "GET /ingressos/meus-pagamentos",
+    "GET /ingressos/meus-ingressos",
+    "POST /ingressos (quantidade)",
+]
+
+
+async def afirmar_consultas_constantes(
+    nome: str,
+    crescer: Callable[[int], Awaitable[None]],
+    requisitar: Callable[[int], Awaitable],
+    tamanhos: Sequence[int] = TAMANHOS,
+) -> List[int]:
+    """Falhar (AssertionError) se as consultas SQL de um endpoint variam com o volume de dados.
+
+    Para cada tamanho, crescer(n) acrescenta n linhas e requisitar(tamanho) faz a
+    requisição; a contagem vem do cabeçalho X-Consultas-SQL. Um N+1 aparece como
+    contagens diferentes.
+    """
+    from utils.consultas import CABECALHO_CONSULTAS
+
+    contagens = []
+    atual = 0
+    for tamanho in tamanhos:
+        await crescer(tamanho - atual)
+        atual = tamanho
+        resposta = await requisitar(tamanho)
+        resposta.raise_for_status()
+        contagens.append(int(resposta.headers[CABECALHO_CONSULTAS]))
+
+    assert len(set(contagens)) == 1, (
+        f"{nome}: consultas variam com o volume (degrau: consultas) "
+        + ", ".join(f"{t}: {c}" for t, c in zip(tamanhos, contagens))
+    )
+    return contagens
+
+
+async def montar_cenarios(cliente) -> Dict[str, Tuple[Callable, Callable]]:
+    """Empresa, comprador e um evento; para cada cenário, (crescer, requisitar)"""
+    empresa = await registrar_e_logar(cliente, "empresa", "org@bench.dev")
+    comprador = await registrar_e_logar(cliente, "cliente", "cliente@bench.dev")
+    empresa_id = (await cliente.get("/empresas/eu", headers=empresa)).json()["id"]
+    data_fim = (datetime.now(timezone.utc) + timedelta(days=30)).isoformat()
+
+    async def criar_evento(nome="Neon Rave") -> dict:
+        resposta = await cliente.post("/eventos", headers=empresa, json={
+            "nome": nome, "localizacao": "Night City", "data_fim": data_fim,
+            "preco_ingresso": 5000, "total_ingressos": 100_000
+        })
+        resposta.raise_for_status()
+        return resposta.json()
+
+    evento = await criar_evento()
+
+    async def comprar(evento_id: int, quantidade: int = 2):
+        resposta = await cliente.post("/ingressos", headers=comprador, json={
+            "evento_id": evento_id, "quantidade": quantidade, "metodo_pagamento": "pix",
+            "nome_comprador": "Cliente", "email_comprador": "cliente@bench.dev", "cpf_comprador": "00000000000"
+        })
+        resposta.raise_for_status()
+        return resposta
+
+    async def mais_eventos(n: int):
+        for _ in range(n):
+            await criar_evento()
+
+    async def mais_compras(n: int):
+        for _ in range(n):
+            await comprar(evento["id"])
+
+    async def nada(_n: int):
+        pass
+
+    def obter(url: str, cabecalhos=None):
+        return lambda _tamanho: cliente.get(url, headers=cabecalhos)
+
+    return {
+        "GET /eventos": (mais_eventos, obter("/eventos")),
+        "GET /eventos/busca": (mais_eventos, obter("/eventos/busca?q=neon")),
+        "GET /eventos/meus-eventos": (mais_eventos, obter("/eventos/meus-eventos", empresa)),
+        "GET /empresas/{id}/eventos": (mais_eventos, obter(f"/empresas/{empresa_id}/eventos")),
+        "GET /eventos/{id}": (mais_compras, obter(f"/eventos/{evento['id']}", empresa)),
+        "GET /eventos/dashboard/estatisticas": (mais_compras, obter("/eventos/dashboard/estatisticas", empresa)),
+        "GET /ingressos/meus-pagamentos": (mais_compras, obter("/ingressos/meus-pagamentos", comprador)),
+        "GET /ingressos/meus-ingressos": (mais_compras, obter("/ingressos/meus-ingressos", comprador)),
+        # Mais ingressos na mesma compra: os INSERTs são multi-linha, a contagem não muda
+        "POST /ingressos (quantidade)": (nada, lambda tamanho: comprar(evento["id"], tamanho)),
+    }
+
+
+@pytest.mark.parametrize("nome", CENARIOS)
+def test_consultas_nao_crescem_com_o_volume(rodar, nome):
+    async def verificar():
+        async with cliente_http() as cliente:
+            crescer, requisitar = (await montar_cenarios(cliente))[nome]
+            await afirmar_consultas_constantes(nome, crescer, requisitar)
+
+    rodar(verificar)
+
+
+def test_todos_os_cenarios_sao_verificados(rodar):
+    async def nomes():
+        async with cliente_http() as cliente:
+            return set(await montar_cenarios(cliente))
+
+    assert rodar(nomes) == set(CENARIOS)
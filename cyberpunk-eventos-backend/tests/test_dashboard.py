@@ -0,0 +1,68 @@
+"""Vendas ao longo do tempo do dashboard: pagamentos nos limites das horas do rollup."""
+from datetime import datetime
+
+import pytest
+
+# Gravado pelo server_default (CURRENT_TIMESTAMP), sem fração de segundo
+INSTANTE_PAGAMENTO = "2026-10-10 12:00:00"
+
+
+async def vendas_no_intervalo(data_inicio: str, data_fim: str, fuso_horario: str) -> dict:
+    from sqlalchemy import text
+    from database.database import AsyncSessionLocal
+    from database.models import Empresa, Cliente, Evento, Pagamento, MetodoPagamento
+    from database.consolidacao import registrar_venda
+    from utils.auth import criar_token_acesso
+    from benchmarks.comum import cliente_http
+
+    async with AsyncSessionLocal() as sessao:
+        empresa = Empresa(nome="Organizadora", email="org@dashboard.dev", senha="-")
+        cliente = Cliente(nome="Comprador", email="cliente@dashboard.dev", senha="-")
+        sessao.add_all([empresa, cliente])
+        await sessao.flush()
+        evento = Evento(
+            nome="Neon Rave", localizacao="Night City", data_fim=datetime(2026, 12, 1),
+            preco_ingresso=5000, total_ingressos=100, organizador_id=empresa.id
+        )
+        sessao.add(evento)
+        await sessao.flush()
+        pagamento = Pagamento(
+            codigo_pagamento="LIMITE", quantidade=2, valor_total=100.0, metodo_pagamento=MetodoPagamento.PIX,
+            nome_comprador="Comprador", email_comprador="cliente@dashboard.dev", cpf_comprador="00000000000",
+            cliente_id=cliente.id, evento_id=evento.id
+        )
+        sessao.add(pagamento)
+        await sessao.flush()
+        # Texto cru, como o CURRENT_TIMESTAMP grava (sem passar pelo DateTime do SQLAlchemy)
+        await sessao.execute(
+            text("UPDATE pagamentos SET criado_em = :instante WHERE id = :id"),
+            {"instante": INSTANTE_PAGAMENTO, "id": pagamento.id}
+        )
+        await registrar_venda(
+            sessao, empresa.id, evento.id, datetime.fromisoformat(INSTANTE_PAGAMENTO), MetodoPagamento.PIX, 2, 10000
+        )
+        await sessao.commit()
+        cabecalhos = {"Authorization": f"Bearer {criar_token_acesso({'sub': str(empresa.id), 'tipo_usuario': 'empresa'})}"}
+
+    async with cliente_http() as http:
+        resposta = await http.get("/eventos/dashboard/estatisticas", headers=cabecalhos, params={
+            "data_inicio": data_inicio, "data_fim": data_fim, "granularidade": "hora", "fuso_horario": fuso_horario
+        })
+        resposta.raise_for_status()
+    return {venda["data"]: venda["quantidade"] for venda in resposta.json()["vendas_ao_longo_tempo"] if venda["quantidade"]}
+
+
+@pytest.mark.parametrize("data_inicio, data_fim, fuso_horario, esperado", [
+    # Hora cheia pelo rollup, borda inicial pelos pagamentos
+    ("2026-10-10T11:30:00", "2026-10-10T14:30:00", "UTC", {"2026-10-10 12:00": 2}),
+    # Pagamento na borda final (hora parcial)
+    ("2026-10-10T10:30:00", "2026-10-10T12:00:00.500000", "UTC", {"2026-10-10 12:00": 2}),
+    # Intervalo começando exatamente no pagamento
+    ("2026-10-10T12:00:00", "2026-10-10T13:00:00", "UTC", {"2026-10-10 12:00": 2}),
+    # Antes do pagamento
+    ("2026-10-10T10:00:00", "2026-10-10T11:59:59.999000", "UTC", {}),
+    # Fuso com deslocamento fracionário: tudo pelos pagamentos
+    ("2026-10-10T11:30:00", "2026-10-10T14:30:00", "Asia/Kolkata", {"2026-10-10 17:00": 2}),
+])
+def test_pagamento_no_limite_da_hora_conta_uma_vez(rodar, data_inicio, data_fim, fuso_horario, esperado):
+    assert rodar(vendas_no_intervalo, data_inicio, data_fim, fuso_horario) == esperado
@@ -0,0 +1,79 @@
+"""
+Estresse da compra de ingressos: compras concorrentes contra um evento de
+capacidade pequena emitem exatamente total_ingressos ingressos (sem overselling).
+"""
+import asyncio
+from datetime import datetime, timedelta
+
+COMPRAS = 300
+CAPACIDADE = 50
+
+
+async def comprar_concorrentemente(compras: int, capacidade: int) -> dict:
+    from fastapi import HTTPException
+    from sqlalchemy import select, func
+    from database.database import AsyncSessionLocal
+    from database.models import Empresa, Cliente, Evento, Ingresso
+    from routers.tickets import comprar_ingresso
+    from schemas import IngressoCriar, MetodoPagamento
+
+    async with AsyncSessionLocal() as sessao:
+        empresa = Empresa(nome="Organizadora", email="org@estresse.dev", senha="-")
+        cliente = Cliente(nome="Comprador", email="cliente@estresse.dev", senha="-")
+        sessao.add_all([empresa, cliente])
+        await sessao.flush()
+        evento = Evento(
+            nome="Evento concorrido",
+            localizacao="Night City",
+            data_fim=datetime.utcnow() + timedelta(days=1),
+            preco_ingresso=1000,
+            total_ingressos=capacidade,
+            organizador_id=empresa.id
+        )
+        sessao.add(evento)
+        await sessao.commit()
+        evento_id, cliente_id = evento.id, cliente.id
+
+    dados = IngressoCriar(
+        evento_id=evento_id,
+        quantidade=1,
+        metodo_pagamento=MetodoPagamento.PIX,
+        nome_comprador="Comprador",
+        email_comprador="cliente@estresse.dev",
+        cpf_comprador="00000000000"
+    )
+    resultados = {"sucesso": 0, "esgotado": 0, "erros": []}
+
+    async def comprar():
+        async with AsyncSessionLocal() as sessao:
+            try:
+                # Chamada direta: os parâmetros de cabeçalho precisam dos valores explícitos
+                await comprar_ingresso(
+                    dados, {"usuario_id": cliente_id, "tipo_usuario": "cliente"}, sessao,
+                    fila_token=None, chave_idempotencia=None
+                )
+                resultados["sucesso"] += 1
+            except HTTPException:
+                resultados["esgotado"] += 1
+            except Exception as erro:
+                resultados["erros"].append(repr(erro))
+
+    await asyncio.gather(*(comprar() for _ in range(compras)))
+
+    async with AsyncSessionLocal() as sessao:
+        resultados["emitidos"] = (await sessao.execute(
+            select(func.count(Ingresso.id)).where(Ingresso.evento_id == evento_id)
+        )).scalar()
+        resultados["contador"] = (await sessao.execute(
+            select(Evento.ingressos_vendidos).where(Evento.id == evento_id)
+        )).scalar()
+    return resultados
+
+
+def test_compras_concorrentes_nao_excedem_a_capacidade(rodar):
+    resultados = rodar(comprar_concorrentemente, COMPRAS, CAPACIDADE)
+
+    assert resultados["erros"] == []
+    assert resultados["sucesso"] == CAPACIDADE
+    assert resultados["esgotado"] == COMPRAS - CAPACIDADE
+    assert resultados["emitidos"] == resultados["contador"] == CAPACIDADE
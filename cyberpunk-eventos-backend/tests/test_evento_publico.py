@@ -0,0 +1,34 @@
+"""Evento público pelo id: usado no checkout no lugar de percorrer o catálogo."""
+from datetime import datetime, timedelta, timezone
+
+from benchmarks.comum import cliente_http, registrar_e_logar
+
+
+async def consultar_evento_publico() -> dict:
+    async with cliente_http() as cliente:
+        empresa = await registrar_e_logar(cliente, "empresa", "org@publico.dev")
+        evento = (await cliente.post("/eventos", headers=empresa, json={
+            "nome": "Neon Rave", "localizacao": "Night City", "preco_ingresso": 5000, "total_ingressos": 10,
+            "data_fim": (datetime.now(timezone.utc) + timedelta(days=30)).isoformat()
+        })).json()
+        url = f"/eventos/{evento['id']}/publico"
+
+        ativo = await cliente.get(url)
+        repeticao = await cliente.get(url, headers={"If-None-Match": ativo.headers["ETag"]})
+        (await cliente.put(f"/eventos/{evento['id']}", headers=empresa, json={"ativo": False})).raise_for_status()
+        inativo = await cliente.get(url)
+        inexistente = await cliente.get("/eventos/999999/publico")
+
+    return {"evento": evento, "ativo": ativo, "repeticao": repeticao, "inativo": inativo, "inexistente": inexistente}
+
+
+def test_evento_publico_pelo_id(rodar):
+    respostas = rodar(consultar_evento_publico)
+
+    ativo = respostas["ativo"]
+    assert ativo.status_code == 200
+    assert ativo.json()["id"] == respostas["evento"]["id"]
+    assert ativo.json()["organizador"]["nome"] == "org"
+    assert respostas["repeticao"].status_code == 304
+    assert respostas["inativo"].status_code == 404
+    assert respostas["inexistente"].status_code == 404
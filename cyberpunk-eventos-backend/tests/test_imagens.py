@@ -0,0 +1,37 @@
+"""Variantes das imagens: um formato sem codificador não descarta os outros."""
+import os
+
+import pytest
+from PIL import Image, features
+
+from utils import imagens
+
+
+@pytest.fixture
+def imagem_original(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    os.makedirs("perfis")
+    Image.new("RGB", (800, 600), (200, 40, 120)).save("perfis/original.png")
+    imagens.formatos_disponiveis.cache_clear()
+    yield "/perfis/original.png"
+    imagens.formatos_disponiveis.cache_clear()
+
+
+def test_variantes_em_todos_os_formatos_disponiveis(imagem_original):
+    variantes = imagens.gerar_variantes(imagem_original)
+
+    assert set(variantes) == set(imagens.TAMANHOS_IMAGEM)
+    for formatos in variantes.values():
+        assert set(formatos) == set(imagens.formatos_disponiveis())
+        for caminho in formatos.values():
+            assert os.path.exists(f".{caminho}")
+
+
+def test_formato_sem_codificador_e_ignorado(imagem_original, monkeypatch):
+    verificar = features.check
+    monkeypatch.setattr(features, "check", lambda nome: nome != "avif" and verificar(nome))
+    monkeypatch.setattr(imagens, "FORMATOS_IMAGEM", ["webp", "avif"])
+
+    variantes = imagens.gerar_variantes(imagem_original)
+
+    assert all(set(formatos) == {"webp"} for formatos in variantes.values())
@@ -0,0 +1,56 @@
+"""Logout: o token revogado deixa de valer também em outros processos (workers ou após reinício)."""
+import subprocess
+import sys
+from pathlib import Path
+
+from benchmarks.comum import cliente_http, registrar_e_logar
+
+# Outro processo com o mesmo ambiente (DATABASE_URL e ESTADO_COMPARTILHADO_URL do conftest)
+VERIFICAR_EM_OUTRO_PROCESSO = """
+import asyncio, sys
+from fastapi import HTTPException
+from utils.auth import decodificar_token, sincronizar_revogacoes
+
+asyncio.run(sincronizar_revogacoes())
+try:
+    decodificar_token(sys.argv[1])
+except HTTPException as erro:
+    print(erro.status_code, erro.detail)
+else:
+    print(200)
+"""
+
+
+async def sair() -> dict:
+    async with cliente_http() as cliente:
+        cabecalhos = await registrar_e_logar(cliente, "cliente", "cliente@logout.dev")
+        antes = await cliente.get("/clientes/eu", headers=cabecalhos)
+        logout = await cliente.post("/auth/logout", headers=cabecalhos)
+        depois = await cliente.get("/clientes/eu", headers=cabecalhos)
+    return {"token": cabecalhos["Authorization"].split()[1], "antes": antes, "logout": logout, "depois": depois}
+
+
+def _em_outro_processo(token: str) -> str:
+    resultado = subprocess.run(
+        [sys.executable, "-c", VERIFICAR_EM_OUTRO_PROCESSO, token],
+        cwd=Path(__file__).resolve().parent.parent, capture_output=True, text=True, check=True
+    )
+    return resultado.stdout.strip()
+
+
+def test_token_revogado_no_logout_vale_em_outro_processo(rodar):
+    respostas = rodar(sair)
+
+    assert respostas["antes"].status_code == 200
+    assert respostas["logout"].status_code == 204
+    assert respostas["depois"].status_code == 401
+    assert _em_outro_processo(respostas["token"]) == "401 Token revogado"
+
+
+def test_token_valido_continua_aceito_em_outro_processo(rodar):
+    async def entrar():
+        async with cliente_http() as cliente:
+            cabecalhos = await registrar_e_logar(cliente, "cliente", "ativo@logout.dev")
+        return cabecalhos["Authorization"].split()[1]
+
+    assert _em_outro_processo(rodar(entrar)) == "200"
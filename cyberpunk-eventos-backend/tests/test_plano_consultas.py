@@ -0,0 +1,137 @@
+"""
+Planos de consulta (EXPLAIN QUERY PLAN) de todas as consultas dos routers.
+
+Percorre os endpoints pelo app (transporte ASGI, banco SQLite temporário com as
+migrações aplicadas), captura cada SQL executado e roda EXPLAIN QUERY PLAN sobre
+ele. Falha se alguma consulta fizer varredura completa de uma tabela do modelo
+(SCAN sem índice).
+"""
+import re
+import sqlite3
+from datetime import datetime, timedelta, timezone
+
+from benchmarks.comum import cliente_http, registrar_e_logar
+
+# (tabela, trecho do SQL) de varreduras aceitas de propósito
+SCANS_PERMITIDOS = []
+
+_SCAN_TABELA = re.compile(r"^SCAN (\w+)(?: AS \w+)?$")
+
+
+async def percorrer_endpoints() -> None:
+    """Exercitar cada endpoint ao menos uma vez, com dados suficientes para todos os ramos"""
+    async with cliente_http() as cliente:
+        empresa = await registrar_e_logar(cliente, "empresa", "org@bench.dev")
+        comprador = await registrar_e_logar(cliente, "cliente", "cliente@bench.dev")
+
+        data_fim = (datetime.now(timezone.utc) + timedelta(days=30)).isoformat()
+        evento = (await cliente.post("/eventos", headers=empresa, json={
+            "nome": "Neon Rave", "localizacao": "Night City", "descricao": "Festa",
+            "data_fim": data_fim, "preco_ingresso": 5000, "total_ingressos": 100
+        })).json()
+        outro = (await cliente.post("/eventos", headers=empresa, json={
+            "nome": "Chrome Talk", "localizacao": "Watson", "data_fim": data_fim,
+            "preco_ingresso": 1000, "total_ingressos": 10
+        })).json()
+
+        pagamento = (await cliente.post("/ingressos", headers=comprador, json={
+            "evento_id": evento["id"], "quantidade": 2, "metodo_pagamento": "pix",
+            "nome_comprador": "Cliente", "email_comprador": "cliente@bench.dev", "cpf_comprador": "00000000000"
+        })).json()
+        ingresso = pagamento["ingressos"][0]
+        # Compra com Idempotency-Key e a repetição (resposta gravada)
+        for _ in range(2):
+            (await cliente.post("/ingressos", headers={**comprador, "Idempotency-Key": "plano"}, json={
+                "evento_id": evento["id"], "quantidade": 1, "metodo_pagamento": "pix",
+                "nome_comprador": "Cliente", "email_comprador": "cliente@bench.dev", "cpf_comprador": "00000000000"
+            })).raise_for_status()
+
+        requisicoes = [
+            ("GET", "/eventos", None, None),
+            ("GET", "/eventos?limite=1", None, None),
+            ("GET", "/eventos/busca?q=neon", None, None),
+            ("GET", f"/eventos/{evento['id']}", empresa, None),
+            ("GET", f"/eventos/{evento['id']}/publico", None, None),
+            ("GET", "/eventos/meus-eventos", empresa, None),
+            ("GET", "/eventos/meus-eventos/historico", empresa, None),
+            ("GET", "/eventos/dashboard/estatisticas?granularidade=hora", empresa, None),
+            ("PUT", f"/eventos/{outro['id']}", empresa, {"descricao": "Palestra"}),
+            ("GET", "/empresas/eu", empresa, None),
+            ("GET", "/empresas/1", None, None),
+            ("GET", "/empresas/1/eventos", None, None),
+            ("GET", "/clientes/eu", comprador, None),
+            ("GET", "/ingressos/meus-pagamentos", comprador, None),
+            ("GET", "/ingressos/meus-ingressos", comprador, None),
+            ("GET", f"/ingressos/{ingresso['id']}", comprador, None),
+            ("GET", f"/ingressos/verificar/{ingresso['codigo_hash']}", None, None),
+            ("GET", f"/eventos/{evento['id']}/codigos-offline", empresa, None),
+            ("GET", f"/eventos/{evento['id']}/codigos-offline?desde=1", empresa, None),
+            ("POST", "/ingressos/checkin", empresa, {"evento_id": evento["id"], "codigos": [ingresso["codigo_hash"], "inexistente"]}),
+            ("PUT", f"/eventos/{outro['id']}/fila", empresa, {"admissoes_por_segundo": 10}),
+            ("POST", f"/eventos/{outro['id']}/fila/entrar", comprador, None),
+            ("GET", f"/eventos/{outro['id']}/fila", empresa, None),
+            ("DELETE", f"/eventos/{outro['id']}/fila", empresa, None),
+            ("DELETE", f"/eventos/{outro['id']}", empresa, None),
+        ]
+        for metodo, url, cabecalhos, corpo in requisicoes:
+            resposta = await cliente.request(metodo, url, headers=cabecalhos, json=corpo)
+            if resposta.status_code >= 400:
+                raise RuntimeError(f"{metodo} {url} -> {resposta.status_code}: {resposta.text}")
+
+
+def varreduras_completas(conexao: sqlite3.Connection, sql: str, parametros, tabelas: set) -> list:
+    """Tabelas do modelo lidas por inteiro no plano da consulta"""
+    plano = conexao.execute(f"EXPLAIN QUERY PLAN {sql}", parametros).fetchall()
+    encontradas = []
+    for *_, detalhe in plano:
+        casamento = _SCAN_TABELA.match(detalhe)
+        if casamento and casamento.group(1) in tabelas:
+            encontradas.append(casamento.group(1))
+    return encontradas
+
+
+async def capturar_consultas() -> dict:
+    """SQL de leitura/atualização executado ao percorrer os endpoints: {sql: parâmetros}"""
+    from sqlalchemy import event
+    from database.database import engine, engine_leitura
+
+    consultas = {}
+
+    def capturar(_conn, _cursor, sql, parametros, _contexto, _executemany):
+        if sql.lstrip().upper().startswith(("SELECT", "UPDATE", "DELETE", "WITH")):
+            consultas.setdefault(sql, parametros)
+
+    motores = {engine.sync_engine, engine_leitura.sync_engine}
+    for motor in motores:
+        event.listen(motor, "before_cursor_execute", capturar)
+    try:
+        await percorrer_endpoints()
+    finally:
+        for motor in motores:
+            event.remove(motor, "before_cursor_execute", capturar)
+    return consultas
+
+
+def test_consultas_dos_routers_sem_varredura_completa(rodar):
+    from database.database import DATABASE_URL
+    from database.models import Base
+
+    consultas = rodar(capturar_consultas)
+    assert consultas
+
+    tabelas = set(Base.metadata.tables)
+    conexao = sqlite3.connect(DATABASE_URL.split("///", 1)[1])
+    try:
+        falhas = []
+        for sql, parametros in consultas.items():
+            scans = [
+                tabela for tabela in varreduras_completas(conexao, sql, parametros, tabelas)
+                if not any(tabela == t and trecho in sql for t, trecho in SCANS_PERMITIDOS)
+            ]
+            if scans:
+                plano = [detalhe for *_, detalhe in conexao.execute(f"EXPLAIN QUERY PLAN {sql}", parametros)]
+                falhas.append(f"{', '.join(scans)} | {' '.join(sql.split())[:200]} | {'; '.join(plano)}")
+    finally:
+        conexao.close()
+
+    assert not falhas, f"{len(falhas)} de {len(consultas)} consultas com varredura completa:\n" + "\n".join(falhas)
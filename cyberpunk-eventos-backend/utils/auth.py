@@ -1,12 +1,21 @@
 from datetime import datetime, timedelta
-from typing import Optional
+from collections import OrderedDict
+from hashlib import sha256
+from typing import Dict, Optional, Tuple
 from jose import JWTError, jwt
 from argon2 import PasswordHasher
-from argon2.exceptions import VerifyMismatchError
+from argon2.exceptions import VerifyMismatchError, InvalidHashError
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from dotenv import load_dotenv
+from sqlalchemy import select, delete
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
 import os
+import time
+
+from database.estado_compartilhado import executar_no_estado, tokens_revogados
 
 load_dotenv()
 
@@ -14,23 +23,76 @@ SECRET_KEY = os.getenv("SECRET_KEY", "sua-chave-secreta-mude-isso")
 ALGORITHM = os.getenv("ALGORITHM", "HS256")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "43200"))
 
+# Cache LRU de tokens já validados, chaveado pelo SHA-256 do token (0 desativa)
+TOKEN_CACHE_TAMANHO = int(os.getenv("TOKEN_CACHE_TAMANHO", "10000"))
+TOKEN_CACHE_TTL = int(os.getenv("TOKEN_CACHE_TTL", "300"))  # Segundos
+_cache_tokens: "OrderedDict[bytes, Tuple[float, dict]]" = OrderedDict()
+# Revogações ficam no banco de estado compartilhado (valem em todos os workers e após reinícios);
+# cada processo mantém uma cópia, atualizada no máximo a cada TOKEN_REVOGACAO_SINCRONIA segundos
+TOKEN_REVOGACAO_SINCRONIA = float(os.getenv("TOKEN_REVOGACAO_SINCRONIA", "1"))
+_tokens_revogados: Dict[bytes, float] = {}  # digest -> exp
+_ultima_revogacao = 0  # Maior id de tokens_revogados já copiado
+_proxima_sincronia = 0.0
+
 # Usar Argon2 em vez de bcrypt (mais moderno e seguro)
-hash_senha = PasswordHasher()
+# Parâmetros configuráveis; hashes antigos são refeitos no próximo login
+hash_senha = PasswordHasher(
+    time_cost=int(os.getenv("ARGON2_TIME_COST", "3")),
+    memory_cost=int(os.getenv("ARGON2_MEMORY_COST", "65536")),
+    parallelism=int(os.getenv("ARGON2_PARALLELISM", "4"))
+)
 seguranca = HTTPBearer()
 
+# Argon2 leva dezenas de ms de CPU; roda em threads (a extensão libera o GIL)
+# para não bloquear o event loop. Acima do limite de pendentes, responde 503.
+SENHA_MAX_CONCORRENCIA = int(os.getenv("SENHA_MAX_CONCORRENCIA", str(min(4, os.cpu_count() or 1))))
+SENHA_MAX_PENDENTES = int(os.getenv("SENHA_MAX_PENDENTES", "128"))
+executor_senhas = ThreadPoolExecutor(max_workers=SENHA_MAX_CONCORRENCIA, thread_name_prefix="argon2")
+_operacoes_senha_pendentes = 0
 
-def verificar_senha(senha_plana: str, senha_hash: str) -> bool:
-    """Verificar uma senha contra um hash"""
+
+async def _executar_operacao_senha(funcao, *args):
+    """Executar hash/verificação no pool dedicado, com backpressure"""
+    global _operacoes_senha_pendentes
+    if _operacoes_senha_pendentes >= SENHA_MAX_PENDENTES:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Servidor ocupado. Tente novamente em instantes.",
+            headers={"Retry-After": "1"},
+        )
+    _operacoes_senha_pendentes += 1
+    try:
+        return await asyncio.get_running_loop().run_in_executor(executor_senhas, funcao, *args)
+    finally:
+        _operacoes_senha_pendentes -= 1
+
+
+def _verificar_senha_sincrono(senha_plana: str, senha_hash: str) -> bool:
     try:
         hash_senha.verify(senha_hash, senha_plana)
         return True
-    except VerifyMismatchError:
+    except (VerifyMismatchError, InvalidHashError):
         return False
 
 
-def obter_hash_senha(senha: str) -> str:
+async def verificar_senha(senha_plana: str, senha_hash: str) -> bool:
+    """Verificar uma senha contra um hash"""
+    return await _executar_operacao_senha(_verificar_senha_sincrono, senha_plana, senha_hash)
+
+
+async def obter_hash_senha(senha: str) -> str:
     """Fazer hash de uma senha"""
-    return hash_senha.hash(senha)
+    return await _executar_operacao_senha(hash_senha.hash, senha)
+
+
+def precisa_rehash(senha_hash: str) -> bool:
+    """Verificar se o hash foi gerado com parâmetros diferentes dos atuais"""
+    return hash_senha.check_needs_rehash(senha_hash)
+
+
+def encerrar_executor_senhas() -> None:
+    """Finalizar as threads do pool de senhas"""
+    executor_senhas.shutdown(wait=False, cancel_futures=True)
 
 
 def criar_token_acesso(data: dict, delta_expiracao: Optional[timedelta] = None) -> str:
@@ -46,8 +108,8 @@ def criar_token_acesso(data: dict, delta_expiracao: Optional[timedelta] = None)
     return jwt_codificado
 
 
-def decodificar_token(token: str) -> dict:
-    """Decodificar um token JWT"""
+def _validar_token(token: str) -> dict:
+    """Verificar assinatura e expiração de um token JWT"""
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         return payload
@@ -59,9 +121,102 @@ def decodificar_token(token: str) -> dict:
         )
 
 
+def _digest_token(token: str) -> bytes:
+    return sha256(token.encode()).digest()
+
+
+def decodificar_token(token: str) -> dict:
+    """Decodificar um token JWT, reaproveitando validações recentes do cache"""
+    chave = _digest_token(token)
+    agora = time.time()
+
+    if chave in _tokens_revogados:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Token revogado",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+    entrada = _cache_tokens.get(chave)
+    if entrada is not None:
+        valido_ate, payload = entrada
+        if agora < valido_ate:
+            _cache_tokens.move_to_end(chave)
+            return dict(payload)
+        del _cache_tokens[chave]
+
+    payload = _validar_token(token)
+    if TOKEN_CACHE_TAMANHO > 0:
+        # Nunca além do exp do token; o TTL força uma nova verificação periódica
+        valido_ate = agora + TOKEN_CACHE_TTL
+        if isinstance(payload.get("exp"), (int, float)):
+            valido_ate = min(valido_ate, payload["exp"])
+        _cache_tokens[chave] = (valido_ate, payload)
+        if len(_cache_tokens) > TOKEN_CACHE_TAMANHO:
+            _cache_tokens.popitem(last=False)
+    return dict(payload)
+
+
+def _gravar_revogacao(conn, chave: bytes, exp: float, agora: float) -> None:
+    conn.execute(sqlite_insert(tokens_revogados).values(digest=chave, exp=exp).on_conflict_do_nothing())
+    # Tokens já expirados seriam recusados de qualquer forma
+    conn.execute(delete(tokens_revogados).where(tokens_revogados.c.exp <= agora))
+
+
+def _ler_revogacoes(conn, desde_id: int) -> list:
+    return conn.execute(
+        select(tokens_revogados.c.id, tokens_revogados.c.digest, tokens_revogados.c.exp)
+        .where(tokens_revogados.c.id > desde_id)
+        .order_by(tokens_revogados.c.id)
+    ).all()
+
+
+def _descartar_revogacoes_expiradas(agora: float) -> None:
+    for expirado in [c for c, exp_revogado in _tokens_revogados.items() if exp_revogado <= agora]:
+        del _tokens_revogados[expirado]
+
+
+async def sincronizar_revogacoes() -> None:
+    """Copiar para este processo as revogações feitas por qualquer worker desde a última sincronia"""
+    global _ultima_revogacao, _proxima_sincronia
+    agora = time.time()
+    if agora < _proxima_sincronia:
+        return
+    _proxima_sincronia = agora + TOKEN_REVOGACAO_SINCRONIA
+
+    for id_revogacao, chave, exp in await executar_no_estado(_ler_revogacoes, _ultima_revogacao, leitura=True):
+        _tokens_revogados[chave] = exp
+        _cache_tokens.pop(chave, None)
+        _ultima_revogacao = max(_ultima_revogacao, id_revogacao)
+    _descartar_revogacoes_expiradas(agora)
+
+
+async def revogar_token(token: str) -> None:
+    """Revogar um token até a sua expiração em todos os workers e tirá-lo do cache"""
+    chave = _digest_token(token)
+    _cache_tokens.pop(chave, None)
+    try:
+        exp = jwt.get_unverified_claims(token).get("exp")
+    except JWTError:
+        return
+    exp = exp if isinstance(exp, (int, float)) else time.time() + ACCESS_TOKEN_EXPIRE_MINUTES * 60
+
+    # Vale neste processo na hora; nos demais, na próxima sincronia
+    _tokens_revogados[chave] = exp
+    agora = time.time()
+    await executar_no_estado(_gravar_revogacao, chave, exp, agora)
+    _descartar_revogacoes_expiradas(agora)
+
+
+def limpar_cache_tokens() -> None:
+    """Esvaziar o cache de tokens validados (ex.: após trocar a SECRET_KEY)"""
+    _cache_tokens.clear()
+
+
 async def obter_usuario_atual(credenciais: HTTPAuthorizationCredentials = Depends(seguranca)) -> dict:
     """Obter usuário atual do token"""
     token = credenciais.credentials
+    await sincronizar_revogacoes()
     payload = decodificar_token(token)
     
     usuario_id: int = payload.get("sub")
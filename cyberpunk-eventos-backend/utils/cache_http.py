@@ -0,0 +1,96 @@
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from hashlib import sha256
+from typing import Optional
+from pathlib import Path
+from fastapi import Request, Response, status
+from fastapi.staticfiles import StaticFiles
+from sqlalchemy import select, func
+from sqlalchemy.sql import Select
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse
+from starlette.staticfiles import NotModifiedResponse
+
+# Arquivos endereçados por conteúdo nunca mudam: cache de um ano sem revalidação
+CACHE_CONTROL_IMUTAVEL = "public, max-age=31536000, immutable"
+
+
+def gerar_etag(*partes) -> str:
+    """ETag forte a partir de marcadores de versão baratos (ids, contagens, atualizado_em)"""
+    return '"' + sha256(repr(partes).encode()).hexdigest()[:32] + '"'
+
+
+def _etag_confere(cabecalho: str, etag: str) -> bool:
+    """Comparação fraca do If-None-Match (RFC 9110), aceitando lista e '*'"""
+    for candidato in cabecalho.split(","):
+        candidato = candidato.strip()
+        if candidato == "*" or candidato.removeprefix("W/") == etag:
+            return True
+    return False
+
+
+def responder_condicional(
+    request: Request,
+    response: Response,
+    *marcadores,
+    ultima_modificacao: Optional[datetime] = None,
+    privado: bool = False
+) -> Optional[Response]:
+    """Definir ETag/Last-Modified e devolver um 304 se o cliente já tem a versão atual.
+
+    Deve ser chamado antes da consulta completa: se retornar uma resposta, o handler
+    a devolve diretamente sem consultar nem serializar o payload.
+    """
+    # A URL entra no ETag para que parâmetros diferentes gerem representações diferentes
+    etag = gerar_etag(request.url.path, request.url.query, *marcadores)
+    cabecalhos = {
+        "ETag": etag,
+        "Cache-Control": "private, no-cache" if privado else "no-cache",
+    }
+    if ultima_modificacao is not None:
+        if ultima_modificacao.tzinfo is None:
+            ultima_modificacao = ultima_modificacao.replace(tzinfo=timezone.utc)
+        cabecalhos["Last-Modified"] = format_datetime(ultima_modificacao.astimezone(timezone.utc), usegmt=True)
+
+    nao_modificado = False
+    if_none_match = request.headers.get("if-none-match")
+    if_modified_since = request.headers.get("if-modified-since")
+
+    if if_none_match is not None:
+        nao_modificado = _etag_confere(if_none_match, etag)
+    elif if_modified_since and ultima_modificacao is not None:
+        try:
+            nao_modificado = ultima_modificacao.replace(microsecond=0) <= parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            nao_modificado = False
+
+    if nao_modificado:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=cabecalhos)
+
+    response.headers.update(cabecalhos)
+    return None
+
+
+def consulta_marcador(subconsulta: Select) -> Select:
+    """Resumo (quantidade, soma dos ids, maior versão) das linhas que compõem uma resposta.
+
+    A subconsulta deve expor as colunas rotuladas "id" e "versao".
+    """
+    sub = subconsulta.subquery()
+    return select(func.count(), func.total(sub.c.id), func.max(sub.c.versao))
+
+
+class ArquivosImutaveis(StaticFiles):
+    """StaticFiles para mídia endereçada por conteúdo (o nome muda quando os bytes mudam).
+
+    O ETag é o próprio nome do arquivo, estável entre réplicas; Range e If-Range
+    continuam a cargo do FileResponse.
+    """
+
+    def file_response(self, full_path, stat_result, scope, status_code: int = 200) -> Response:
+        response = FileResponse(full_path, status_code=status_code, stat_result=stat_result)
+        response.headers["etag"] = f'"{Path(full_path).stem}"'
+        response.headers["cache-control"] = CACHE_CONTROL_IMUTAVEL
+        if self.is_not_modified(response.headers, Headers(scope=scope)):
+            return NotModifiedResponse(response.headers)
+        return response
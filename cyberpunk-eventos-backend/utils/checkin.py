@@ -0,0 +1,101 @@
+"""
+Check-in de ingressos na entrada dos eventos, em lotes.
+
+Cada processo guarda, por evento, os códigos que já sabe estarem utilizados:
+leituras repetidas (o portão escaneia de novo, dois leitores pegam o mesmo
+ingresso) são recusadas sem escrita no banco. O banco continua sendo a fonte da
+verdade: o UPDATE só marca ingressos ainda não utilizados, e um código usado em
+outro processo é descoberto por ele e entra no índice.
+"""
+import os
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, List, Tuple
+
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database.models import Ingresso
+from schemas import SituacaoCheckin
+
+# Eventos com índice em memória (os menos usados recentemente saem primeiro)
+CHECKIN_EVENTOS_EM_MEMORIA = int(os.getenv("CHECKIN_EVENTOS_EM_MEMORIA", "64"))
+
+# {evento_id: {codigo_hash: utilizado_em}}
+_utilizados_por_evento: "OrderedDict[int, Dict[str, datetime]]" = OrderedDict()
+
+
+async def _utilizados_do_evento(db: AsyncSession, evento_id: int) -> Dict[str, datetime]:
+    """Índice do evento, carregado do banco na primeira leitura do processo"""
+    utilizados = _utilizados_por_evento.get(evento_id)
+    if utilizados is not None:
+        _utilizados_por_evento.move_to_end(evento_id)
+        return utilizados
+
+    resultado = await db.execute(
+        select(Ingresso.codigo_hash, Ingresso.utilizado_em)
+        .where(Ingresso.evento_id == evento_id, Ingresso.utilizado_em.is_not(None))
+    )
+    # Outra requisição pode ter carregado o mesmo evento enquanto esta esperava o banco
+    utilizados = _utilizados_por_evento.setdefault(evento_id, dict(resultado.all()))
+    while len(_utilizados_por_evento) > CHECKIN_EVENTOS_EM_MEMORIA:
+        _utilizados_por_evento.popitem(last=False)
+    return utilizados
+
+
+async def fazer_checkin(db: AsyncSession, evento_id: int, codigos: List[str]) -> List[Tuple[str, SituacaoCheckin, datetime]]:
+    """Validar e marcar como utilizados os códigos de um lote, de forma atômica.
+
+    Retorna (código, situação, utilizado_em) na ordem recebida; um código repetido
+    no lote conta como utilizado a partir da segunda leitura.
+    """
+    utilizados = await _utilizados_do_evento(db, evento_id)
+    pendentes = [codigo for codigo in dict.fromkeys(codigos) if codigo not in utilizados]
+
+    confirmados: Dict[str, datetime] = {}
+    if pendentes:
+        agora = datetime.utcnow()
+        # Só ingressos ainda não utilizados: leitores concorrentes nunca liberam o mesmo código duas vezes
+        resultado = await db.execute(
+            update(Ingresso)
+            .where(
+                Ingresso.evento_id == evento_id,
+                Ingresso.codigo_hash.in_(pendentes),
+                Ingresso.utilizado_em.is_(None)
+            )
+            .values(utilizado_em=agora)
+            .returning(Ingresso.codigo_hash)
+            .execution_options(synchronize_session=False)
+        )
+        confirmados = {codigo: agora for codigo in resultado.scalars()}
+
+        # Os que sobraram são inválidos ou já foram utilizados (por outro processo)
+        restantes = [codigo for codigo in pendentes if codigo not in confirmados]
+        if restantes:
+            resultado = await db.execute(
+                select(Ingresso.codigo_hash, Ingresso.utilizado_em)
+                .where(
+                    Ingresso.evento_id == evento_id,
+                    Ingresso.codigo_hash.in_(restantes),
+                    Ingresso.utilizado_em.is_not(None)
+                )
+            )
+            utilizados.update(resultado.all())
+
+        await db.commit()
+
+    resultados = []
+    for codigo in codigos:
+        if codigo in confirmados:
+            resultados.append((codigo, SituacaoCheckin.CONFIRMADO, confirmados.pop(codigo)))
+            utilizados[codigo] = resultados[-1][2]
+        elif codigo in utilizados:
+            resultados.append((codigo, SituacaoCheckin.JA_UTILIZADO, utilizados[codigo]))
+        else:
+            resultados.append((codigo, SituacaoCheckin.INVALIDO, None))
+    return resultados
+
+
+def limpar_indice_checkin() -> None:
+    """Esvaziar o índice em memória (usado pelos benchmarks)"""
+    _utilizados_por_evento.clear()
@@ -0,0 +1,150 @@
+"""
+Snapshot binário dos códigos de ingresso de um evento para verificação offline no portão.
+
+Formato (inteiros big-endian):
+
+    cabeçalho (36 bytes)  ">4sBBBBIIIQQ"
+        magia "CPKO", formato (1), tipo (0 = completo, 1 = delta),
+        largura do código (11), k (funções do Bloom), evento_id,
+        m (bits do Bloom), quantidade de códigos, desde, versao
+    códigos               quantidade × largura bytes ASCII, em ordem crescente
+                          de bytes (busca binária direta)
+    Bloom                 m / 8 bytes; o bit i está em byte i // 8, máscara 1 << (i % 8)
+
+Posições no Bloom: h1, h2 = os dois primeiros uint32 big-endian do SHA-256 do
+código; posição j = (h1 + j × h2) mod m, para j em 0..k-1.
+
+A versão é o maior id de ingresso incluído. Um delta (?desde=versao) traz só os
+códigos vendidos depois dela e nenhum Bloom: o dispositivo intercala os arrays e
+insere os códigos novos no seu filtro. m e k vêm da capacidade do evento; se
+mudarem (capacidade alterada), o dispositivo baixa um snapshot completo.
+"""
+import math
+import struct
+from bisect import bisect_left
+from hashlib import sha256
+from typing import AsyncIterator, NamedTuple
+
+from sqlalchemy import select
+from starlette.concurrency import run_in_threadpool
+
+from database.models import Ingresso
+from utils.helpers import TAMANHO_HASH_INGRESSO
+
+FORMATO_SNAPSHOT = 1
+MAGIA_SNAPSHOT = b"CPKO"
+TIPO_COMPLETO, TIPO_DELTA = 0, 1
+CABECALHO_SNAPSHOT = struct.Struct(">4sBBBBIIIQQ")
+_DOIS_UINT32 = struct.Struct(">II")
+TIPO_CONTEUDO_SNAPSHOT = "application/octet-stream"
+
+# Falsos positivos do Bloom na capacidade máxima do evento
+TAXA_FALSO_POSITIVO = 0.01
+# Linhas por lote lido do banco (memória constante além do Bloom)
+LINHAS_POR_LOTE = 5000
+
+
+class ParametrosBloom(NamedTuple):
+    bits: int
+    funcoes: int
+
+
+class Snapshot(NamedTuple):
+    tipo: int
+    evento_id: int
+    bloom: ParametrosBloom
+    quantidade: int
+    desde: int
+    versao: int
+    codigos: bytes
+    filtro: bytes
+
+
+def parametros_bloom(capacidade: int) -> ParametrosBloom:
+    """Tamanho (múltiplo de 8) e número de funções do Bloom para a capacidade do evento"""
+    capacidade = max(capacidade, 1)
+    bits = math.ceil(-capacidade * math.log(TAXA_FALSO_POSITIVO) / math.log(2) ** 2)
+    bits = (bits + 7) // 8 * 8
+    return ParametrosBloom(bits, max(1, round(bits / capacidade * math.log(2))))
+
+
+def posicoes_bloom(codigo: bytes, bloom: ParametrosBloom):
+    h1, h2 = _DOIS_UINT32.unpack_from(sha256(codigo).digest())
+    return ((h1 + j * h2) % bloom.bits for j in range(bloom.funcoes))
+
+
+def _marcar_bloom(filtro: bytearray, bloco: bytes, bloom: ParametrosBloom) -> None:
+    """Inserir no filtro todos os códigos de um bloco (laço direto: ~200k códigos por snapshot)"""
+    bits, funcoes = bloom
+    for inicio in range(0, len(bloco), TAMANHO_HASH_INGRESSO):
+        h1, h2 = _DOIS_UINT32.unpack_from(sha256(bloco[inicio:inicio + TAMANHO_HASH_INGRESSO]).digest())
+        for j in range(funcoes):
+            posicao = (h1 + j * h2) % bits
+            filtro[posicao >> 3] |= 1 << (posicao & 7)
+
+
+def tamanho_snapshot(quantidade: int, bloom: ParametrosBloom, desde: int) -> int:
+    return CABECALHO_SNAPSHOT.size + quantidade * TAMANHO_HASH_INGRESSO + (0 if desde else bloom.bits // 8)
+
+
+async def gerar_snapshot(
+    sessao_fabrica, evento_id: int, bloom: ParametrosBloom, quantidade: int, desde: int, versao: int
+) -> AsyncIterator[bytes]:
+    """Gerar o snapshot em blocos, lendo os códigos em ordem direto do banco.
+
+    Os limites desde < id <= versao tornam o conteúdo estável mesmo com vendas
+    acontecendo durante o download (a quantidade no cabeçalho foi contada antes).
+    """
+    yield CABECALHO_SNAPSHOT.pack(
+        MAGIA_SNAPSHOT, FORMATO_SNAPSHOT, TIPO_DELTA if desde else TIPO_COMPLETO, TAMANHO_HASH_INGRESSO,
+        bloom.funcoes, evento_id, bloom.bits, quantidade, desde, versao
+    )
+
+    filtro = None if desde else bytearray(bloom.bits // 8)
+    async with sessao_fabrica() as sessao:
+        resultado = await sessao.stream(
+            select(Ingresso.codigo_hash)
+            .where(Ingresso.evento_id == evento_id, Ingresso.id > desde, Ingresso.id <= versao)
+            .order_by(Ingresso.codigo_hash)
+            .execution_options(yield_per=LINHAS_POR_LOTE)
+        )
+        async for lote in resultado.scalars().partitions():
+            bloco = "".join(lote).encode("ascii")
+            if filtro is not None:
+                # Em thread: o GIL é cedido a cada poucos ms e o event loop segue atendendo
+                await run_in_threadpool(_marcar_bloom, filtro, bloco, bloom)
+            yield bloco
+
+    if filtro is not None:
+        yield bytes(filtro)
+
+
+def ler_snapshot(dados: bytes) -> Snapshot:
+    """Decodificar um snapshot (implementação de referência para os dispositivos)"""
+    magia, formato, tipo, largura, funcoes, evento_id, bits, quantidade, desde, versao = (
+        CABECALHO_SNAPSHOT.unpack_from(dados)
+    )
+    if magia != MAGIA_SNAPSHOT or formato != FORMATO_SNAPSHOT or largura != TAMANHO_HASH_INGRESSO:
+        raise ValueError("Snapshot em formato desconhecido")
+    inicio = CABECALHO_SNAPSHOT.size
+    fim_codigos = inicio + quantidade * largura
+    filtro = dados[fim_codigos:fim_codigos + bits // 8] if tipo == TIPO_COMPLETO else b""
+    return Snapshot(
+        tipo, evento_id, ParametrosBloom(bits, funcoes), quantidade, desde, versao,
+        dados[inicio:fim_codigos], filtro
+    )
+
+
+def snapshot_contem(snapshot: Snapshot, codigo: str) -> bool:
+    """Bloom primeiro (descarta quase todo código inválido) e busca binária para confirmar"""
+    chave = codigo.encode("ascii")
+    if len(chave) != TAMANHO_HASH_INGRESSO:
+        return False
+    if snapshot.filtro and not all(snapshot.filtro[p >> 3] & (1 << (p & 7)) for p in posicoes_bloom(chave, snapshot.bloom)):
+        return False
+    largura = TAMANHO_HASH_INGRESSO
+    indice = bisect_left(
+        range(snapshot.quantidade), chave,
+        key=lambda i: snapshot.codigos[i * largura:(i + 1) * largura]
+    )
+    return indice < snapshot.quantidade and snapshot.codigos[indice * largura:(indice + 1) * largura] == chave
@@ -0,0 +1,97 @@
+"""
+Contagem de consultas SQL e tempo de banco por requisição.
+
+Os eventos de cursor das engines somam em um acumulador guardado em um
+ContextVar; o middleware cria um acumulador por requisição, devolve os totais no
+cabeçalho de depuração e registra no log as requisições acima do orçamento.
+"""
+import logging
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Optional
+
+from sqlalchemy import event
+from starlette.datastructures import MutableHeaders
+
+CABECALHO_CONSULTAS = "X-Consultas-SQL"
+
+logger = logging.getLogger(__name__)
+
+
+class AcumuladorConsultas:
+    __slots__ = ("quantidade", "tempo", "inicio")
+
+    def __init__(self):
+        self.quantidade = 0
+        self.tempo = 0.0  # Segundos
+        self.inicio = 0.0
+
+
+_acumulador_atual: ContextVar[Optional[AcumuladorConsultas]] = ContextVar("acumulador_consultas", default=None)
+
+
+def _antes_de_executar(conn, cursor, statement, parameters, context, executemany):
+    acumulador = _acumulador_atual.get()
+    if acumulador is not None:
+        acumulador.inicio = time.perf_counter()
+
+
+def _depois_de_executar(conn, cursor, statement, parameters, context, executemany):
+    acumulador = _acumulador_atual.get()
+    if acumulador is not None:
+        acumulador.quantidade += 1
+        acumulador.tempo += time.perf_counter() - acumulador.inicio
+
+
+def registrar_contagem_consultas(engine_sincrona) -> None:
+    """Ligar a contagem aos eventos de cursor de uma engine (use engine.sync_engine)"""
+    event.listen(engine_sincrona, "before_cursor_execute", _antes_de_executar)
+    event.listen(engine_sincrona, "after_cursor_execute", _depois_de_executar)
+
+
+@contextmanager
+def contar_consultas() -> Iterator[AcumuladorConsultas]:
+    """Contar as consultas executadas dentro do bloco (na mesma tarefa asyncio)"""
+    acumulador = AcumuladorConsultas()
+    token = _acumulador_atual.set(acumulador)
+    try:
+        yield acumulador
+    finally:
+        _acumulador_atual.reset(token)
+
+
+class MiddlewareConsultas:
+    """Middleware ASGI que conta as consultas de cada requisição.
+
+    Com cabecalho=True, a resposta traz X-Consultas-SQL e Server-Timing (db);
+    requisições com mais de `orcamento` consultas geram um aviso no log.
+    """
+
+    def __init__(self, app, orcamento: int, cabecalho: bool):
+        self.app = app
+        self.orcamento = orcamento
+        self.cabecalho = cabecalho
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        async def enviar(mensagem):
+            # Totais até o início da resposta (o corpo já foi montado nesse ponto)
+            if mensagem["type"] == "http.response.start" and self.cabecalho:
+                cabecalhos = MutableHeaders(scope=mensagem)
+                cabecalhos.append(CABECALHO_CONSULTAS, str(acumulador.quantidade))
+                cabecalhos.append("Server-Timing", f"db;dur={acumulador.tempo * 1000:.2f}")
+            await send(mensagem)
+
+        with contar_consultas() as acumulador:
+            await self.app(scope, receive, enviar)
+
+        if acumulador.quantidade > self.orcamento:
+            rota = getattr(scope.get("route"), "path_format", scope["path"])
+            logger.warning(
+                "%s %s executou %d consultas SQL (%.1f ms), acima do orçamento de %d",
+                scope["method"], rota, acumulador.quantidade, acumulador.tempo * 1000, self.orcamento
+            )
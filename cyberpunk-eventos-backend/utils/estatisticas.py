@@ -0,0 +1,147 @@
+from datetime import datetime, timedelta, timezone, tzinfo
+from typing import List, Tuple
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+from fastapi import HTTPException, status
+from sqlalchemy import func, case
+from sqlalchemy.sql.elements import ColumnElement
+from schemas import GranularidadeTempo
+
+# Limite de buckets por consulta (ex.: ~1 ano por hora)
+MAXIMO_BUCKETS = 10_000
+
+# Formato do rótulo de cada bucket (igual no SQL e no preenchimento em Python)
+FORMATOS_BUCKET = {
+    GranularidadeTempo.HORA: "%Y-%m-%d %H:00",
+    GranularidadeTempo.DIA: "%Y-%m-%d",
+    GranularidadeTempo.SEMANA: "%Y-%m-%d",  # Segunda-feira da semana
+    GranularidadeTempo.MES: "%Y-%m",
+}
+
+
+def obter_fuso_horario(nome: str) -> tzinfo:
+    """Converter nome IANA (ex.: America/Sao_Paulo) em fuso horário"""
+    try:
+        return ZoneInfo(nome)
+    except (ZoneInfoNotFoundError, ValueError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Fuso horário inválido: {nome}"
+        )
+
+
+def para_utc_ingenuo(data: datetime) -> datetime:
+    """Normalizar datetime para UTC sem tzinfo (formato gravado no banco)"""
+    if data.tzinfo is not None:
+        return data.astimezone(timezone.utc).replace(tzinfo=None)
+    return data
+
+
+def instante_sql(valor) -> ColumnElement:
+    """Instante comparável no SQLite (julianday): o texto do CURRENT_TIMESTAMP ('... 12:00:00')
+    e o dos parâmetros datetime ('... 12:00:00.000000') não ordenam como os instantes"""
+    return func.julianday(valor)
+
+
+def _deslocamento_minutos(instante_utc: datetime, fuso: tzinfo) -> int:
+    local = instante_utc.replace(tzinfo=timezone.utc).astimezone(fuso)
+    return int(local.utcoffset().total_seconds() // 60)
+
+
+def transicoes_fuso(inicio_utc: datetime, fim_utc: datetime, fuso: tzinfo) -> List[Tuple[datetime, int]]:
+    """Listar (instante UTC a partir do qual vale, deslocamento em minutos) no intervalo"""
+    transicoes = [(inicio_utc, _deslocamento_minutos(inicio_utc, fuso))]
+    anterior = inicio_utc
+    atual = inicio_utc + timedelta(days=1)
+
+    while anterior < fim_utc:
+        atual = min(atual, fim_utc)
+        deslocamento = _deslocamento_minutos(atual, fuso)
+        if deslocamento != transicoes[-1][1]:
+            # Busca binária até o minuto exato da mudança
+            baixo, alto = anterior, atual
+            while alto - baixo > timedelta(minutes=1):
+                meio = baixo + (alto - baixo) / 2
+                if _deslocamento_minutos(meio, fuso) == transicoes[-1][1]:
+                    baixo = meio
+                else:
+                    alto = meio
+            transicoes.append((alto.replace(second=0, microsecond=0), deslocamento))
+        anterior, atual = atual, atual + timedelta(days=1)
+
+    return transicoes
+
+
+def deslocamentos_em_horas_inteiras(transicoes: List[Tuple[datetime, int]]) -> bool:
+    """Se cada hora UTC cai inteira em um só bucket local (sem fusos como +05:30 ou +09:30)"""
+    return all(minutos % 60 == 0 for _, minutos in transicoes) and all(
+        instante.minute == 0 for instante, _ in transicoes[1:]
+    )
+
+
+def expressao_bucket(
+    coluna: ColumnElement,
+    granularidade: GranularidadeTempo,
+    inicio_utc: datetime,
+    fim_utc: datetime,
+    fuso: tzinfo
+) -> ColumnElement:
+    """Expressão SQL (SQLite) com o rótulo do bucket local de um timestamp UTC"""
+    transicoes = transicoes_fuso(inicio_utc, fim_utc, fuso)
+    modificadores = [f"{minutos:+d} minutes" for _, minutos in transicoes]
+
+    if len(transicoes) == 1:
+        modificador = modificadores[0]
+    else:
+        # Um ramo por mudança de horário de verão dentro do intervalo
+        modificador = case(
+            *[(instante_sql(coluna) < instante_sql(instante), mod) for (instante, _), mod in zip(transicoes[1:], modificadores)],
+            else_=modificadores[-1]
+        )
+    local = func.datetime(coluna, modificador)
+
+    if granularidade == GranularidadeTempo.SEMANA:
+        return func.date(local, "weekday 0", "-6 days")
+    return func.strftime(FORMATOS_BUCKET[granularidade], local)
+
+
+def rotulos_buckets(
+    granularidade: GranularidadeTempo,
+    inicio_utc: datetime,
+    fim_utc: datetime,
+    fuso: tzinfo
+) -> List[str]:
+    """Rótulos de todos os buckets do intervalo, em ordem, para preencher lacunas com 0"""
+    inicio = inicio_utc.replace(tzinfo=timezone.utc).astimezone(fuso)
+    fim = fim_utc.replace(tzinfo=timezone.utc).astimezone(fuso)
+    formato = FORMATOS_BUCKET[granularidade]
+    rotulos = []
+
+    if granularidade == GranularidadeTempo.HORA:
+        # Avançar em UTC para atravessar corretamente as mudanças de horário
+        atual = inicio_utc.replace(minute=0, second=0, microsecond=0, tzinfo=timezone.utc)
+        while atual <= fim_utc.replace(tzinfo=timezone.utc) and len(rotulos) <= MAXIMO_BUCKETS:
+            rotulo = atual.astimezone(fuso).strftime(formato)
+            if not rotulos or rotulos[-1] != rotulo:
+                rotulos.append(rotulo)
+            atual += timedelta(hours=1)
+    elif granularidade == GranularidadeTempo.MES:
+        ano, mes = inicio.year, inicio.month
+        while (ano, mes) <= (fim.year, fim.month) and len(rotulos) <= MAXIMO_BUCKETS:
+            rotulos.append(f"{ano:04d}-{mes:02d}")
+            ano, mes = (ano + 1, 1) if mes == 12 else (ano, mes + 1)
+    else:
+        passo = timedelta(days=7 if granularidade == GranularidadeTempo.SEMANA else 1)
+        atual = inicio.date()
+        if granularidade == GranularidadeTempo.SEMANA:
+            atual -= timedelta(days=atual.weekday())
+        while atual <= fim.date() and len(rotulos) <= MAXIMO_BUCKETS:
+            rotulos.append(atual.strftime(formato))
+            atual += passo
+
+    if len(rotulos) > MAXIMO_BUCKETS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Intervalo muito grande para a granularidade escolhida"
+        )
+
+    return rotulos
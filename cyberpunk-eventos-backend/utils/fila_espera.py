@@ -0,0 +1,376 @@
+"""
+Fila de espera virtual para aberturas de vendas concorridas.
+
+A organizadora liga a fila de um evento com uma taxa de admissão. Cada cliente
+que entra recebe um token com uma posição; as posições são admitidas à taxa
+configurada e só um token admitido (do mesmo cliente) pode chamar POST
+/ingressos. O token admitido vale por `validade` segundos e é consumido pela
+compra concluída. A checagem acontece antes de qualquer acesso ao banco, então
+compradores ainda na fila não disputam o escritor do SQLite.
+
+O estado fica em um backend plugável (FILA_BACKEND="pacote.modulo:Classe").
+O padrão, BackendFilaMemoria, vive no processo: com vários workers, cada um
+admitiria à taxa inteira e só aceitaria os próprios tokens, então a inicialização
+recusa o backend em memória quando WEB_CONCURRENCY indica mais de um worker.
+BackendFilaSQLite guarda as filas no banco de estado compartilhado
+(database/estado_compartilhado.py), visto por todos os workers da máquina.
+"""
+import importlib
+import math
+import os
+import secrets
+import time
+from abc import ABC, abstractmethod
+from collections import deque
+from typing import Deque, Dict, NamedTuple, Optional, Tuple
+
+from fastapi import HTTPException, status
+from sqlalchemy import select, insert, update, delete, func
+
+from database.estado_compartilhado import executar_no_estado, filas_espera, tokens_fila
+from utils.metricas import COMPRAS_FORA_DA_FILA
+
+FILA_BACKEND = os.getenv("FILA_BACKEND", "")
+
+# Limites do Retry-After sugerido a quem ainda está na fila (segundos)
+INTERVALO_CONSULTA_MINIMO = 1
+INTERVALO_CONSULTA_MAXIMO = 30
+
+
+class ConfiguracaoFila(NamedTuple):
+    taxa: float  # Admissões por segundo
+    rajada: int  # Admissões imediatas quando a fila está vazia
+    validade: int  # Segundos para comprar depois de admitido
+
+
+class SituacaoFila(NamedTuple):
+    token: str
+    cliente_id: int
+    posicao: int
+    a_frente: int  # Pessoas ainda não admitidas antes desta posição
+    admitido: bool
+    espera_estimada: float  # Segundos até a admissão (0 se admitido)
+    expira_em: Optional[float]  # Segundos restantes para comprar, se admitido
+
+
+class EstadoFila(NamedTuple):
+    configuracao: ConfiguracaoFila
+    aguardando: int
+    admitidos: int  # Admitidos que ainda não compraram nem expiraram
+
+
+class BackendFila(ABC):
+    """Interface dos backends de fila. Cada operação deve ser atômica por evento."""
+
+    @abstractmethod
+    async def configurar(self, evento_id: int, configuracao: ConfiguracaoFila) -> EstadoFila:
+        """Ligar a fila do evento ou trocar a taxa de uma fila já ligada"""
+
+    @abstractmethod
+    async def remover(self, evento_id: int) -> bool:
+        """Desligar a fila e descartar os tokens; False se não havia fila"""
+
+    @abstractmethod
+    async def ativa(self, evento_id: int) -> bool:
+        """Se o evento tem fila"""
+
+    @abstractmethod
+    async def estado(self, evento_id: int) -> Optional[EstadoFila]:
+        """Configuração e ocupação da fila; None se o evento não tem fila"""
+
+    @abstractmethod
+    async def entrar(self, evento_id: int, cliente_id: int) -> Optional[SituacaoFila]:
+        """Posição do cliente (a mesma se já estiver na fila); None se o evento não tem fila"""
+
+    @abstractmethod
+    async def consultar(self, evento_id: int, token: str) -> Optional[SituacaoFila]:
+        """Situação de um token; None se o evento não tem fila ou o token não existe (ou expirou)"""
+
+    @abstractmethod
+    async def concluir(self, evento_id: int, token: str) -> None:
+        """Consumir um token admitido após a compra"""
+
+
+def _novo_limite(configuracao: ConfiguracaoFila, limite: float, proxima: int, decorrido: float) -> float:
+    """Admissões liberadas depois de `decorrido` segundos (com a fila vazia, não acumula além da rajada)"""
+    return min(limite + decorrido * configuracao.taxa, proxima + configuracao.rajada)
+
+
+def _situacao(configuracao: ConfiguracaoFila, limite: float, token: str, posicao: int, cliente_id: int,
+              admitido_em: Optional[float], agora: float) -> SituacaoFila:
+    if admitido_em is not None:
+        expira_em = admitido_em + configuracao.validade - agora
+        return SituacaoFila(token, cliente_id, posicao, 0, True, 0.0, expira_em)
+    admitidas = math.floor(limite)
+    espera = (posicao + 1 - limite) / configuracao.taxa
+    return SituacaoFila(token, cliente_id, posicao, posicao - admitidas, False, espera, None)
+
+
+class _FilaEvento:
+    __slots__ = ("configuracao", "proxima", "limite", "atualizado", "tokens", "por_cliente", "pendentes", "admitidos")
+
+    def __init__(self, configuracao: ConfiguracaoFila, agora: float):
+        self.configuracao = configuracao
+        self.proxima = 0  # Próxima posição a distribuir
+        self.limite = float(configuracao.rajada)  # Admissões liberadas até agora (posição p entra com p + 1)
+        self.atualizado = agora
+        self.tokens: Dict[str, list] = {}  # token -> [posicao, cliente_id, admitido_em]
+        self.por_cliente: Dict[int, str] = {}
+        self.pendentes: Deque[str] = deque()  # Em ordem de posição
+        self.admitidos: Deque[str] = deque()  # Em ordem de admissão
+
+    def avancar(self, agora: float) -> None:
+        """Avançar o limite de admissão pelo tempo decorrido e expirar admissões vencidas"""
+        taxa, _, validade = self.configuracao
+        limite_anterior, anterior = self.limite, self.atualizado
+        self.limite = _novo_limite(self.configuracao, limite_anterior, self.proxima, agora - anterior)
+        self.atualizado = agora
+
+        while self.pendentes and self.tokens[self.pendentes[0]][0] + 1 <= self.limite:
+            token = self.pendentes.popleft()
+            entrada = self.tokens[token]
+            # Instante em que o limite passou pela posição, não o da consulta que percebeu
+            entrada[2] = min(agora, anterior + max(0.0, entrada[0] + 1 - limite_anterior) / taxa)
+            self.admitidos.append(token)
+
+        while self.admitidos:
+            entrada = self.tokens.get(self.admitidos[0])
+            if entrada is not None and entrada[2] + validade > agora:
+                break
+            token = self.admitidos.popleft()
+            if entrada is not None:
+                del self.tokens[token]
+                self.por_cliente.pop(entrada[1], None)
+
+    def situacao(self, token: str, agora: float) -> SituacaoFila:
+        return _situacao(self.configuracao, self.limite, token, *self.tokens[token], agora)
+
+    def estado(self) -> EstadoFila:
+        return EstadoFila(self.configuracao, len(self.pendentes), len(self.tokens) - len(self.pendentes))
+
+
+class BackendFilaMemoria(BackendFila):
+    """Filas no processo atual. Sem await entre leitura e escrita: cada operação é atômica no event loop."""
+
+    def __init__(self, relogio=time.monotonic):
+        self._relogio = relogio
+        self._filas: Dict[int, _FilaEvento] = {}
+
+    def _fila(self, evento_id: int) -> Optional[_FilaEvento]:
+        fila = self._filas.get(evento_id)
+        if fila is not None:
+            fila.avancar(self._relogio())
+        return fila
+
+    async def configurar(self, evento_id: int, configuracao: ConfiguracaoFila) -> EstadoFila:
+        fila = self._fila(evento_id)
+        if fila is None:
+            fila = self._filas[evento_id] = _FilaEvento(configuracao, self._relogio())
+        else:
+            # Posições e admissões já distribuídas são mantidas; só a taxa daqui em diante muda
+            fila.configuracao = configuracao
+        return fila.estado()
+
+    async def remover(self, evento_id: int) -> bool:
+        return self._filas.pop(evento_id, None) is not None
+
+    async def ativa(self, evento_id: int) -> bool:
+        return evento_id in self._filas
+
+    async def estado(self, evento_id: int) -> Optional[EstadoFila]:
+        fila = self._fila(evento_id)
+        return fila.estado() if fila is not None else None
+
+    async def entrar(self, evento_id: int, cliente_id: int) -> Optional[SituacaoFila]:
+        fila = self._fila(evento_id)
+        if fila is None:
+            return None
+        token = fila.por_cliente.get(cliente_id)
+        if token is None:
+            token = secrets.token_urlsafe(16)
+            fila.tokens[token] = [fila.proxima, cliente_id, None]
+            fila.por_cliente[cliente_id] = token
+            fila.pendentes.append(token)
+            fila.proxima += 1
+            fila.avancar(fila.atualizado)  # Admite na hora se houver folga da rajada
+        return fila.situacao(token, fila.atualizado)
+
+    async def consultar(self, evento_id: int, token: str) -> Optional[SituacaoFila]:
+        fila = self._fila(evento_id)
+        if fila is None or token not in fila.tokens:
+            return None
+        return fila.situacao(token, fila.atualizado)
+
+    async def concluir(self, evento_id: int, token: str) -> None:
+        fila = self._filas.get(evento_id)
+        entrada = fila.tokens.get(token) if fila is not None else None
+        if entrada is not None and entrada[2] is not None:
+            # Sai de admitidos na próxima expiração (entrada ausente é descartada lá)
+            del fila.tokens[token]
+            fila.por_cliente.pop(entrada[1], None)
+
+
+class BackendFilaSQLite(BackendFila):
+    """Filas no banco de estado compartilhado, vistas por todos os workers da máquina.
+
+    Mesma lógica de _FilaEvento, com cada operação em uma transação BEGIN IMMEDIATE
+    e time.time() como relógio comum aos processos.
+    """
+
+    def __init__(self, relogio=time.time):
+        self._relogio = relogio
+
+    def _avancar(self, conn, evento_id: int, agora: float) -> Optional[Tuple[ConfiguracaoFila, float, int]]:
+        """Avançar o limite, admitir e expirar como _FilaEvento.avancar; (configuração, limite, próxima)"""
+        fila = conn.execute(select(filas_espera).where(filas_espera.c.evento_id == evento_id)).one_or_none()
+        if fila is None:
+            return None
+        configuracao = ConfiguracaoFila(fila.taxa, fila.rajada, fila.validade)
+        agora = max(agora, fila.atualizado)  # Relógios de processos diferentes
+        limite = _novo_limite(configuracao, fila.limite, fila.proxima, agora - fila.atualizado)
+        conn.execute(
+            update(filas_espera).where(filas_espera.c.evento_id == evento_id).values(limite=limite, atualizado=agora)
+        )
+        token = tokens_fila.c
+        conn.execute(
+            update(tokens_fila)
+            .where(token.evento_id == evento_id, token.admitido_em.is_(None), token.posicao + 1 <= limite)
+            .values(admitido_em=func.min(agora, fila.atualizado + func.max(0.0, token.posicao + 1 - fila.limite) / fila.taxa))
+        )
+        conn.execute(
+            delete(tokens_fila)
+            .where(token.evento_id == evento_id, token.admitido_em.is_not(None), token.admitido_em + fila.validade <= agora)
+        )
+        return configuracao, limite, fila.proxima
+
+    def _situacao(self, conn, configuracao: ConfiguracaoFila, limite: float, condicao, agora: float) -> Optional[SituacaoFila]:
+        linha = conn.execute(select(tokens_fila).where(condicao)).one_or_none()
+        if linha is None:
+            return None
+        return _situacao(configuracao, limite, linha.token, linha.posicao, linha.cliente_id, linha.admitido_em, agora)
+
+    def _estado(self, conn, evento_id: int, configuracao: ConfiguracaoFila) -> EstadoFila:
+        total, admitidos = conn.execute(
+            select(func.count(), func.count(tokens_fila.c.admitido_em)).where(tokens_fila.c.evento_id == evento_id)
+        ).one()
+        return EstadoFila(configuracao, total - admitidos, admitidos)
+
+    def _configurar(self, conn, evento_id: int, configuracao: ConfiguracaoFila) -> EstadoFila:
+        agora = self._relogio()
+        if self._avancar(conn, evento_id, agora) is None:
+            conn.execute(insert(filas_espera).values(
+                evento_id=evento_id, taxa=configuracao.taxa, rajada=configuracao.rajada,
+                validade=configuracao.validade, proxima=0, limite=float(configuracao.rajada), atualizado=agora
+            ))
+        else:
+            # Posições e admissões já distribuídas são mantidas; só a taxa daqui em diante muda
+            conn.execute(
+                update(filas_espera).where(filas_espera.c.evento_id == evento_id)
+                .values(taxa=configuracao.taxa, rajada=configuracao.rajada, validade=configuracao.validade)
+            )
+        return self._estado(conn, evento_id, configuracao)
+
+    def _remover(self, conn, evento_id: int) -> bool:
+        conn.execute(delete(tokens_fila).where(tokens_fila.c.evento_id == evento_id))
+        return conn.execute(delete(filas_espera).where(filas_espera.c.evento_id == evento_id)).rowcount > 0
+
+    def _ativa(self, conn, evento_id: int) -> bool:
+        return conn.execute(
+            select(filas_espera.c.evento_id).where(filas_espera.c.evento_id == evento_id)
+        ).first() is not None
+
+    def _estado_atual(self, conn, evento_id: int) -> Optional[EstadoFila]:
+        avancado = self._avancar(conn, evento_id, self._relogio())
+        return self._estado(conn, evento_id, avancado[0]) if avancado is not None else None
+
+    def _entrar(self, conn, evento_id: int, cliente_id: int) -> Optional[SituacaoFila]:
+        agora = self._relogio()
+        avancado = self._avancar(conn, evento_id, agora)
+        if avancado is None:
+            return None
+        configuracao, limite, proxima = avancado
+        do_cliente = (tokens_fila.c.evento_id == evento_id) & (tokens_fila.c.cliente_id == cliente_id)
+        situacao = self._situacao(conn, configuracao, limite, do_cliente, agora)
+        if situacao is not None:
+            return situacao
+        conn.execute(insert(tokens_fila).values(
+            token=secrets.token_urlsafe(16), evento_id=evento_id, posicao=proxima, cliente_id=cliente_id
+        ))
+        conn.execute(update(filas_espera).where(filas_espera.c.evento_id == evento_id).values(proxima=proxima + 1))
+        # Admite na hora se houver folga da rajada
+        _, limite, _ = self._avancar(conn, evento_id, agora)
+        return self._situacao(conn, configuracao, limite, do_cliente, agora)
+
+    def _consultar(self, conn, evento_id: int, token: str) -> Optional[SituacaoFila]:
+        agora = self._relogio()
+        avancado = self._avancar(conn, evento_id, agora)
+        if avancado is None:
+            return None
+        condicao = (tokens_fila.c.evento_id == evento_id) & (tokens_fila.c.token == token)
+        return self._situacao(conn, *avancado[:2], condicao, agora)
+
+    def _concluir(self, conn, evento_id: int, token: str) -> None:
+        conn.execute(delete(tokens_fila).where(
+            tokens_fila.c.evento_id == evento_id, tokens_fila.c.token == token, tokens_fila.c.admitido_em.is_not(None)
+        ))
+
+    async def configurar(self, evento_id: int, configuracao: ConfiguracaoFila) -> EstadoFila:
+        return await executar_no_estado(self._configurar, evento_id, configuracao)
+
+    async def remover(self, evento_id: int) -> bool:
+        return await executar_no_estado(self._remover, evento_id)
+
+    async def ativa(self, evento_id: int) -> bool:
+        return await executar_no_estado(self._ativa, evento_id, leitura=True)
+
+    async def estado(self, evento_id: int) -> Optional[EstadoFila]:
+        return await executar_no_estado(self._estado_atual, evento_id)
+
+    async def entrar(self, evento_id: int, cliente_id: int) -> Optional[SituacaoFila]:
+        return await executar_no_estado(self._entrar, evento_id, cliente_id)
+
+    async def consultar(self, evento_id: int, token: str) -> Optional[SituacaoFila]:
+        return await executar_no_estado(self._consultar, evento_id, token)
+
+    async def concluir(self, evento_id: int, token: str) -> None:
+        await executar_no_estado(self._concluir, evento_id, token)
+
+
+def _carregar_backend() -> BackendFila:
+    if not FILA_BACKEND:
+        return BackendFilaMemoria()
+    modulo, _, classe = FILA_BACKEND.partition(":")
+    return getattr(importlib.import_module(modulo), classe)()
+
+
+backend_fila: BackendFila = _carregar_backend()
+
+
+def intervalo_consulta(situacao: SituacaoFila) -> int:
+    """Retry-After sugerido a quem ainda não foi admitido"""
+    return max(INTERVALO_CONSULTA_MINIMO, min(INTERVALO_CONSULTA_MAXIMO, math.ceil(situacao.espera_estimada)))
+
+
+async def exigir_admissao(evento_id: int, cliente_id: int, token: Optional[str]) -> Optional[str]:
+    """Barrar compras de eventos com fila sem um token admitido do próprio cliente.
+
+    Retorna o token a concluir depois da compra (None se o evento não tem fila).
+    """
+    if not await backend_fila.ativa(evento_id):
+        return None
+
+    situacao = await backend_fila.consultar(evento_id, token) if token else None
+    if situacao is None or situacao.cliente_id != cliente_id:
+        COMPRAS_FORA_DA_FILA.incrementar()
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Este evento está com fila de espera. Entre na fila para comprar."
+        )
+    if not situacao.admitido:
+        COMPRAS_FORA_DA_FILA.incrementar()
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=f"Aguarde sua vez na fila de espera ({situacao.a_frente} à frente)",
+            headers={"Retry-After": str(intervalo_consulta(situacao))}
+        )
+    return token
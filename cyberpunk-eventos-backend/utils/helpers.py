@@ -1,45 +1,146 @@
-import random
+import secrets
 import string
 import os
-from fastapi import UploadFile
+import tempfile
+from hashlib import sha256
+from fastapi import HTTPException, UploadFile, status
+from starlette.concurrency import run_in_threadpool
 from typing import Optional
 
+ALFABETO_HASH = string.ascii_letters + string.digits
+TAMANHO_HASH_INGRESSO = 11
+_ESPACO_HASH_INGRESSO = len(ALFABETO_HASH) ** TAMANHO_HASH_INGRESSO
+
+# Uploads de imagem: limite de tamanho e bloco de cópia (memória constante por upload)
+TAMANHO_MAXIMO_UPLOAD = int(os.getenv("UPLOAD_TAMANHO_MAXIMO", str(10 * 1024 * 1024)))
+TAMANHO_BLOCO_UPLOAD = 1024 * 1024
+TAMANHO_NOME_CONTEUDO = 20  # Caracteres hexadecimais do SHA-256 usados no nome do arquivo
+ASSINATURAS_IMAGEM = [
+    (b"\xff\xd8\xff", ".jpg"),
+    (b"\x89PNG\r\n\x1a\n", ".png"),
+    (b"GIF87a", ".gif"),
+    (b"GIF89a", ".gif"),
+]
+
 
 def gerar_hash_ingresso() -> str:
-    """Gerar um hash alfanumérico único de 11 caracteres para ingressos"""
-    caracteres = string.ascii_letters + string.digits
-    return ''.join(random.choices(caracteres, k=11))
+    """Gerar um hash alfanumérico aleatório de 11 caracteres para ingressos (~65 bits, CSPRNG)"""
+    # Um único inteiro uniforme em [0, 62^11) convertido para base 62, sem viés de módulo
+    numero = secrets.randbelow(_ESPACO_HASH_INGRESSO)
+    caracteres = []
+    for _ in range(TAMANHO_HASH_INGRESSO):
+        numero, resto = divmod(numero, 62)
+        caracteres.append(ALFABETO_HASH[resto])
+    return ''.join(caracteres)
+
+
+def gerar_codigo_pagamento() -> str:
+    """Gerar um código aleatório de pagamento com 16 caracteres hexadecimais (64 bits, CSPRNG)"""
+    return secrets.token_hex(8).upper()
+
+
+def _detectar_tipo_imagem(cabecalho: bytes) -> Optional[str]:
+    """Identificar o formato pelo conteúdo (magic bytes), sem confiar no nome ou no Content-Type"""
+    for assinatura, extensao in ASSINATURAS_IMAGEM:
+        if cabecalho.startswith(assinatura):
+            return extensao
+    if cabecalho[:4] == b"RIFF" and cabecalho[8:12] == b"WEBP":
+        return ".webp"
+    if cabecalho[4:8] == b"ftyp" and cabecalho[8:12] in (b"avif", b"avis"):
+        return ".avif"
+    return None
+
+
+def _erro_upload_grande() -> HTTPException:
+    return HTTPException(
+        status_code=413,  # Content Too Large
+        detail=f"Arquivo maior que o limite de {TAMANHO_MAXIMO_UPLOAD // (1024 * 1024)} MB"
+    )
+
+
+def _abrir_temporario(caminho_pasta: str) -> tuple:
+    descritor, caminho_temporario = tempfile.mkstemp(dir=caminho_pasta, prefix=".upload-", suffix=".tmp")
+    return os.fdopen(descritor, "wb"), caminho_temporario
+
+
+def _escrever_bloco(arquivo_destino, resumo, bloco: bytes) -> None:
+    resumo.update(bloco)
+    arquivo_destino.write(bloco)
+
+
+def _descartar_temporario(arquivo_destino, caminho_temporario: str) -> None:
+    arquivo_destino.close()
+    if os.path.exists(caminho_temporario):
+        os.remove(caminho_temporario)
+
+
+def _publicar_arquivo(arquivo_destino, caminho_temporario: str, caminho_final: str) -> None:
+    arquivo_destino.close()
+    os.replace(caminho_temporario, caminho_final)
 
 
 async def salvar_arquivo_upload(arquivo: UploadFile, pasta: str) -> str:
-    """Salvar um arquivo enviado e retornar o caminho do arquivo"""
+    """Salvar um arquivo enviado e retornar o caminho do arquivo.
+
+    O upload é copiado em blocos para um arquivo temporário na própria pasta (todo o
+    I/O de disco em threads) e só aparece com o nome final após um rename atômico. O
+    nome é o hash do conteúdo, então a URL de um arquivo nunca passa a servir outros bytes.
+
+    Quando esta função roda, o Starlette já recebeu o corpo inteiro e o guardou em
+    um arquivo temporário próprio: recusar um formato inválido ou um tamanho acima
+    do limite evita gravar na pasta final, mas não o recebimento. O limite do corpo
+    da requisição deve ficar no proxy (ex.: client_max_body_size do nginx).
+    """
+    if arquivo.size is not None and arquivo.size > TAMANHO_MAXIMO_UPLOAD:
+        raise _erro_upload_grande()
+
     # Salvar diretamente nas pastas perfis ou fundos
     caminho_pasta = f"./{pasta}"
-    
-    # Criar pasta se não existir
-    os.makedirs(caminho_pasta, exist_ok=True)
-    
-    # Gerar nome de arquivo único
-    extensao_arquivo = os.path.splitext(arquivo.filename)[1]
-    nome_arquivo = f"{gerar_hash_ingresso()}{extensao_arquivo}"
-    caminho_arquivo = os.path.join(caminho_pasta, nome_arquivo)
-    
-    # Salvar arquivo
-    with open(caminho_arquivo, "wb") as buffer:
-        conteudo = await arquivo.read()
-        buffer.write(conteudo)
-    
+    await run_in_threadpool(os.makedirs, caminho_pasta, exist_ok=True)
+
+    bloco = await arquivo.read(TAMANHO_BLOCO_UPLOAD)
+    extensao_arquivo = _detectar_tipo_imagem(bloco[:16])
+    if extensao_arquivo is None:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail="Formato de imagem não suportado. Use JPEG, PNG, GIF, WebP ou AVIF."
+        )
+
+    arquivo_destino, caminho_temporario = await run_in_threadpool(_abrir_temporario, caminho_pasta)
+    resumo = sha256()
+    try:
+        tamanho = 0
+        while bloco:
+            tamanho += len(bloco)
+            if tamanho > TAMANHO_MAXIMO_UPLOAD:
+                raise _erro_upload_grande()
+            await run_in_threadpool(_escrever_bloco, arquivo_destino, resumo, bloco)
+            bloco = await arquivo.read(TAMANHO_BLOCO_UPLOAD)
+
+        # Nome endereçado por conteúdo (uploads idênticos compartilham o arquivo)
+        nome_arquivo = f"{resumo.hexdigest()[:TAMANHO_NOME_CONTEUDO]}{extensao_arquivo}"
+        await run_in_threadpool(
+            _publicar_arquivo, arquivo_destino, caminho_temporario, os.path.join(caminho_pasta, nome_arquivo)
+        )
+    except BaseException:
+        await run_in_threadpool(_descartar_temporario, arquivo_destino, caminho_temporario)
+        raise
+
     # Retornar caminho relativo
     return f"/{pasta}/{nome_arquivo}"
 
 
+def _remover_se_existir(caminho: str) -> None:
+    try:
+        os.remove(caminho)
+    except FileNotFoundError:
+        pass
+
+
 async def deletar_arquivo(caminho_arquivo: Optional[str]) -> None:
     """Deletar um arquivo se ele existir"""
     if not caminho_arquivo:
         return
     
     # Deletar diretamente das pastas perfis ou fundos
-    caminho_completo = f".{caminho_arquivo}"
-    
-    if os.path.exists(caminho_completo):
-        os.remove(caminho_completo)
+    await run_in_threadpool(_remover_se_existir, f".{caminho_arquivo}")
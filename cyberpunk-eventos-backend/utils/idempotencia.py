@@ -0,0 +1,122 @@
+"""
+Idempotency-Key nas compras: repetições da mesma requisição não compram de novo.
+
+A resposta de uma compra com chave é gravada em chaves_idempotencia na mesma
+transação da compra, junto com o SHA-256 do corpo. Uma repetição com a mesma
+chave (por cliente) recebe a resposta gravada sem tocar no estoque; com outro
+corpo, 409. Repetições simultâneas no mesmo processo esperam a primeira terminar;
+entre processos, o índice único (cliente_id, chave) garante uma única compra.
+Compras recusadas não são gravadas (não alteraram nada) e podem ser repetidas.
+"""
+import asyncio
+import json
+import os
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
+from hashlib import sha256
+from typing import AsyncIterator, Dict, NamedTuple, Optional, Tuple
+
+from fastapi import HTTPException, Response, status
+from pydantic import BaseModel
+from sqlalchemy import select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database.database import AsyncSessionLeitura
+from database.models import ChaveIdempotencia
+
+CABECALHO_IDEMPOTENCIA = "Idempotency-Key"
+CABECALHO_REPETICAO = "Idempotent-Replayed"
+TAMANHO_MAXIMO_CHAVE = 255
+
+# Segundos em que uma chave devolve a resposta gravada
+IDEMPOTENCIA_TTL = int(os.getenv("IDEMPOTENCIA_TTL", "86400"))
+
+# {(cliente_id, chave): evento sinalizado quando a requisição em andamento termina}
+_em_andamento: Dict[Tuple[int, str], asyncio.Event] = {}
+
+
+class ChaveCompra(NamedTuple):
+    cliente_id: int
+    chave: str
+    impressao: str
+
+
+def chave_compra(cliente_id: int, chave: str, dados: BaseModel) -> ChaveCompra:
+    """Validar a chave e calcular a impressão do corpo (JSON canônico)"""
+    if not chave or len(chave) > TAMANHO_MAXIMO_CHAVE:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"{CABECALHO_IDEMPOTENCIA} deve ter de 1 a {TAMANHO_MAXIMO_CHAVE} caracteres"
+        )
+    corpo = json.dumps(dados.model_dump(mode="json"), sort_keys=True, separators=(",", ":"))
+    return ChaveCompra(cliente_id, chave, sha256(corpo.encode()).hexdigest())
+
+
+@asynccontextmanager
+async def execucao_exclusiva(chave: ChaveCompra) -> AsyncIterator[None]:
+    """Uma requisição por chave neste processo: as repetições esperam a atual terminar"""
+    identificador = chave[:2]
+    while (em_andamento := _em_andamento.get(identificador)) is not None:
+        await em_andamento.wait()
+    concluida = _em_andamento[identificador] = asyncio.Event()
+    try:
+        yield
+    finally:
+        del _em_andamento[identificador]
+        concluida.set()
+
+
+def _resposta_repetida(registro: ChaveIdempotencia, chave: ChaveCompra) -> Response:
+    if registro.impressao != chave.impressao:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"{CABECALHO_IDEMPOTENCIA} já utilizada com outra requisição"
+        )
+    return Response(
+        registro.resposta,
+        status_code=status.HTTP_201_CREATED,
+        media_type="application/json",
+        headers={CABECALHO_REPETICAO: "true"}
+    )
+
+
+async def resposta_armazenada(chave: ChaveCompra) -> Optional[Response]:
+    """Resposta gravada para a chave, se ainda válida (lida pelo pool de leitura)"""
+    async with AsyncSessionLeitura() as sessao:
+        registro = (await sessao.execute(
+            select(ChaveIdempotencia)
+            .where(
+                ChaveIdempotencia.cliente_id == chave.cliente_id,
+                ChaveIdempotencia.chave == chave.chave,
+                ChaveIdempotencia.expira_em > datetime.utcnow()
+            )
+        )).scalar_one_or_none()
+    return _resposta_repetida(registro, chave) if registro is not None else None
+
+
+async def registrar_resposta(db: AsyncSession, chave: ChaveCompra, resposta: str) -> bool:
+    """Gravar a resposta na transação da compra; False se outra compra já gravou a chave.
+
+    Uma linha expirada com a mesma chave é substituída.
+    """
+    agora = datetime.utcnow()
+    stmt = sqlite_insert(ChaveIdempotencia).values(
+        cliente_id=chave.cliente_id,
+        chave=chave.chave,
+        impressao=chave.impressao,
+        resposta=resposta,
+        criado_em=agora,
+        expira_em=agora + timedelta(seconds=IDEMPOTENCIA_TTL)
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["cliente_id", "chave"],
+        set_={
+            "impressao": stmt.excluded.impressao,
+            "resposta": stmt.excluded.resposta,
+            "criado_em": stmt.excluded.criado_em,
+            "expira_em": stmt.excluded.expira_em
+        },
+        where=ChaveIdempotencia.expira_em <= agora
+    ).returning(ChaveIdempotencia.id)
+    return (await db.execute(stmt)).scalar_one_or_none() is not None
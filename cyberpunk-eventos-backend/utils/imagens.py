@@ -0,0 +1,210 @@
+"""
+Variantes redimensionadas (WebP/AVIF) das imagens de perfil e fundo das empresas.
+
+A codificação roda em um pool de processos, disparada em segundo plano após o
+upload; até ficar pronta, as URLs caem na imagem original.
+
+Regerar as variantes de todas as empresas (a partir de cyberpunk-eventos-backend/):
+    python -m utils.imagens
+"""
+import asyncio
+import io
+import json
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from hashlib import sha256
+from typing import Dict, List, Optional
+
+# Largura máxima de cada tamanho (a proporção é mantida e nunca há ampliação)
+TAMANHOS_IMAGEM = {
+    "miniatura": 160,
+    "cartao": 640,
+    "completa": 1920,
+}
+FORMATOS_IMAGEM = [f.strip() for f in os.getenv("IMAGEM_FORMATOS", "webp,avif").split(",") if f.strip()]
+QUALIDADE_IMAGEM = {"webp": 80, "avif": 60}
+PROCESSOS_IMAGEM = int(os.getenv("IMAGEM_PROCESSOS", "2"))
+
+# Campo do modelo Empresa para cada tipo de imagem
+CAMPOS_IMAGEM = {"perfil": "imagem_perfil", "fundo": "imagem_fundo"}
+
+logger = logging.getLogger(__name__)
+_executor_imagens: Optional[ProcessPoolExecutor] = None
+
+
+@lru_cache(maxsize=None)
+def formatos_disponiveis() -> List[str]:
+    """Formatos de FORMATOS_IMAGEM com codificador nesta instalação do Pillow (ex.: sem libavif, só webp)"""
+    from PIL import features
+
+    disponiveis = []
+    for formato in FORMATOS_IMAGEM:
+        if formato in ("webp", "avif") and not features.check(formato):
+            logger.warning("Pillow sem suporte a %s: variantes nesse formato não serão geradas", formato)
+            continue
+        disponiveis.append(formato)
+    return disponiveis
+
+
+def gerar_variantes(caminho_original: str) -> Dict[str, Dict[str, str]]:
+    """Codificar as variantes de uma imagem (executa no processo filho).
+
+    Recebe e devolve caminhos públicos ("/perfis/abc.png"); retorna
+    {tamanho: {formato: caminho}}. Cada variante leva no nome o hash dos próprios
+    bytes, então mudar a qualidade ou os tamanhos gera URLs novas.
+    """
+    from PIL import Image, ImageOps
+
+    base, _ = os.path.splitext(caminho_original)
+    variantes: Dict[str, Dict[str, str]] = {}
+
+    with Image.open(f".{caminho_original}") as imagem:
+        imagem = ImageOps.exif_transpose(imagem)
+        if imagem.mode not in ("RGB", "RGBA"):
+            imagem = imagem.convert("RGBA" if imagem.has_transparency_data else "RGB")
+
+        for tamanho, largura in TAMANHOS_IMAGEM.items():
+            copia = imagem.copy()
+            copia.thumbnail((largura, largura * 4))
+            # Cada formato à parte: falhar em um não descarta as variantes dos outros
+            for formato in formatos_disponiveis():
+                conteudo = io.BytesIO()
+                try:
+                    copia.save(conteudo, format=formato.upper(), quality=QUALIDADE_IMAGEM.get(formato, 80))
+                except (OSError, KeyError, ValueError):
+                    logger.exception("Falha ao codificar %s em %s", caminho_original, formato)
+                    continue
+                resumo = sha256(conteudo.getvalue()).hexdigest()[:8]
+                caminho = f"{base}-{tamanho}-{resumo}.{formato}"
+                with open(f".{caminho}.tmp", "wb") as destino:
+                    destino.write(conteudo.getvalue())
+                os.replace(f".{caminho}.tmp", f".{caminho}")
+                variantes.setdefault(tamanho, {})[formato] = caminho
+
+    return variantes
+
+
+def caminhos_variantes(variantes: Optional[dict]) -> list:
+    """Todos os caminhos de arquivo de um dicionário de variantes"""
+    return [caminho for formatos in (variantes or {}).values() for caminho in formatos.values()]
+
+
+def url_variante(empresa, tipo: str, tamanho: str, formatos_aceitos: Optional[list] = None) -> Optional[str]:
+    """Melhor URL disponível para a imagem da empresa no tamanho pedido.
+
+    Prefere os formatos na ordem de formatos_aceitos (padrão: webp); sem variante
+    pronta, devolve a imagem original.
+    """
+    original = getattr(empresa, CAMPOS_IMAGEM[tipo])
+    if not original:
+        return None
+    formatos = (empresa.imagens_variantes or {}).get(tipo, {}).get(tamanho, {})
+    for formato in formatos_aceitos if formatos_aceitos is not None else ["webp"]:
+        if formato in formatos:
+            return formatos[formato]
+    return original
+
+
+async def arquivo_em_uso(db, caminho_original: str, exceto_empresa_id: int) -> bool:
+    """Verificar se outra empresa usa o mesmo arquivo (uploads idênticos compartilham o nome)"""
+    from sqlalchemy import select, or_
+    from database.models import Empresa
+
+    resultado = await db.execute(
+        select(Empresa.id).where(
+            Empresa.id != exceto_empresa_id,
+            or_(Empresa.imagem_perfil == caminho_original, Empresa.imagem_fundo == caminho_original)
+        ).limit(1)
+    )
+    return resultado.first() is not None
+
+
+def _variantes_atuais():
+    from sqlalchemy import func, literal_column
+    from database.models import Empresa
+
+    return func.coalesce(Empresa.imagens_variantes, literal_column("'{}'"))
+
+
+def definir_variantes(tipo: str, variantes: dict):
+    """Expressão SQL que grava as variantes de um tipo no JSON da empresa"""
+    from sqlalchemy import func
+
+    return func.json_set(_variantes_atuais(), f"$.{tipo}", func.json(json.dumps(variantes)))
+
+
+def remover_variantes(*tipos: str):
+    """Expressão SQL que remove as variantes dos tipos indicados do JSON da empresa"""
+    from sqlalchemy import func
+
+    return func.json_remove(_variantes_atuais(), *[f"$.{tipo}" for tipo in tipos])
+
+
+def _obter_executor() -> ProcessPoolExecutor:
+    global _executor_imagens
+    if _executor_imagens is None:
+        # spawn: o processo do servidor tem threads (aiosqlite, Argon2) e fork não é seguro
+        _executor_imagens = ProcessPoolExecutor(
+            max_workers=PROCESSOS_IMAGEM, mp_context=multiprocessing.get_context("spawn")
+        )
+    return _executor_imagens
+
+
+async def processar_imagem_empresa(empresa_id: int, tipo: str, caminho_original: str) -> None:
+    """Gerar as variantes de um upload e gravá-las na empresa (tarefa em segundo plano)"""
+    from sqlalchemy import update
+    from database.database import AsyncSessionLocal
+    from database.models import Empresa
+    from utils.helpers import deletar_arquivo
+
+    try:
+        loop = asyncio.get_running_loop()
+        variantes = await loop.run_in_executor(_obter_executor(), gerar_variantes, caminho_original)
+    except Exception:
+        logger.exception("Falha ao gerar variantes de %s", caminho_original)
+        return
+
+    async with AsyncSessionLocal() as sessao:
+        # json_set atômico: perfil e fundo podem terminar ao mesmo tempo
+        resultado = await sessao.execute(
+            update(Empresa)
+            .where(Empresa.id == empresa_id, getattr(Empresa, CAMPOS_IMAGEM[tipo]) == caminho_original)
+            .values(imagens_variantes=definir_variantes(tipo, variantes))
+        )
+        await sessao.commit()
+
+        # A imagem foi trocada enquanto codificava: as variantes já são órfãs
+        if resultado.rowcount == 0 and not await arquivo_em_uso(sessao, caminho_original, empresa_id):
+            for caminho in caminhos_variantes(variantes):
+                await deletar_arquivo(caminho)
+
+
+def encerrar_executor_imagens() -> None:
+    """Finalizar os processos de codificação"""
+    if _executor_imagens is not None:
+        _executor_imagens.shutdown(wait=False, cancel_futures=True)
+
+
+async def _main() -> None:
+    from sqlalchemy import select
+    from database.database import AsyncSessionLocal, encerrar_engines
+    from database.models import Empresa
+
+    async with AsyncSessionLocal() as sessao:
+        empresas = (await sessao.execute(select(Empresa))).scalars().all()
+        pendentes = [
+            (empresa.id, tipo, getattr(empresa, campo))
+            for empresa in empresas
+            for tipo, campo in CAMPOS_IMAGEM.items()
+            if getattr(empresa, campo) and os.path.exists(f".{getattr(empresa, campo)}")
+        ]
+    await asyncio.gather(*(processar_imagem_empresa(*pendente) for pendente in pendentes))
+    encerrar_executor_imagens()
+    await encerrar_engines()
+
+
+if __name__ == "__main__":
+    asyncio.run(_main())
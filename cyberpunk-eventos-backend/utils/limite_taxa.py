@@ -0,0 +1,236 @@
+"""
+Limite de requisições por rota, por usuário autenticado ou por IP.
+
+Cada política vale para um método + modelo de rota e conta requisições em janela
+deslizante aproximada: por chave guardamos só a janela fixa atual e a anterior,
+e a estimativa é anterior × (fração da janela anterior ainda coberta) + atual.
+A chave é o principal do JWT (o mesmo que obter_usuario_atual devolveria, via o
+cache de tokens) ou, sem token válido, o IP do cliente. Acima do limite, a
+resposta é 429 com Retry-After, sem chegar à rota (contada em
+requisicoes_limitadas_total).
+
+O IP é o do scope ASGI: atrás de um proxy, rode o uvicorn com --proxy-headers e
+--forwarded-allow-ips para que seja o do cliente. O backend padrão guarda os
+contadores no processo: com N workers cada um contaria os seus (limite efetivo
+N vezes maior), então a inicialização o recusa quando WEB_CONCURRENCY indica mais
+de um worker. Nesse caso use LIMITE_TAXA_BACKEND="utils.limite_taxa:BackendLimiteSQLite",
+que soma os contadores no banco de estado compartilhado.
+"""
+import importlib
+import math
+import os
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy import select, delete, bindparam
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from starlette.responses import JSONResponse
+from starlette.routing import compile_path
+
+from database.estado_compartilhado import executar_no_estado, contadores_limite
+from utils.auth import decodificar_token
+from utils.metricas import REQUISICOES_LIMITADAS
+
+LIMITE_TAXA_ATIVO = os.getenv("LIMITE_TAXA_ATIVO", "true").lower() == "true"
+LIMITE_TAXA_BACKEND = os.getenv("LIMITE_TAXA_BACKEND", "")
+# Chaves mantidas pelo backend em memória (as ociosas há mais tempo saem primeiro)
+LIMITE_TAXA_CHAVES = int(os.getenv("LIMITE_TAXA_CHAVES", "100000"))
+# Segundos entre as limpezas das chaves ociosas no backend SQLite
+LIMITE_TAXA_INTERVALO_LIMPEZA = int(os.getenv("LIMITE_TAXA_INTERVALO_LIMPEZA", "60"))
+
+
+class Politica(NamedTuple):
+    nome: str
+    limite: int  # Requisições por janela
+    janela: float  # Segundos
+
+
+# {(método, modelo da rota): política}
+POLITICAS: Dict[Tuple[str, str], Politica] = {
+    ("GET", "/eventos"): Politica("catalogo", 300, 60),
+    ("POST", "/auth/login"): Politica("login", 10, 60),
+    # Pública e sujeita a força bruta de códigos
+    ("GET", "/ingressos/verificar/{codigo_hash}"): Politica("verificacao", 30, 60),
+}
+
+
+class BackendLimite(ABC):
+    """Interface dos backends de contadores. registrar() deve ser atômico por chave."""
+
+    @abstractmethod
+    async def registrar(self, chave: str, limite: int, janela: float) -> float:
+        """Contar uma requisição; 0 se permitida, senão os segundos até haver vaga"""
+
+
+def _contar(contador: list, agora: float, limite: int, janela: float) -> float:
+    """Avançar [início, atual, anterior] até `agora` e contar a requisição se couber; devolve a espera"""
+    decorridas = int((agora - contador[0]) // janela)
+    if decorridas > 0:
+        contador[2] = contador[1] if decorridas == 1 else 0
+        contador[1] = 0
+        contador[0] += decorridas * janela
+
+    inicio, atual, anterior = contador[:3]
+    if anterior * (1 - (agora - inicio) / janela) + atual + 1 <= limite:
+        contador[1] += 1
+        return 0.0
+
+    # Quando a parte ainda coberta da janela anterior deixa caber mais uma
+    if atual + 1 <= limite:
+        return inicio + janela * (1 - (limite - 1 - atual) / anterior) - agora
+    return inicio + janela + janela * (1 - (limite - 1) / atual) - agora
+
+
+class BackendLimiteMemoria(BackendLimite):
+    """Contadores no processo atual, em ordem de último uso para despejar as chaves ociosas"""
+
+    def __init__(self, maximo_chaves: int = LIMITE_TAXA_CHAVES, relogio=time.monotonic):
+        self._maximo_chaves = maximo_chaves
+        self._relogio = relogio
+        # chave -> [início da janela atual, contagem atual, contagem anterior, janela]
+        self._contadores: "OrderedDict[str, list]" = OrderedDict()
+
+    async def registrar(self, chave: str, limite: int, janela: float) -> float:
+        agora = self._relogio()
+        contador = self._contadores.get(chave)
+        if contador is None:
+            contador = self._contadores[chave] = [agora - agora % janela, 0, 0, janela]
+            self._despejar(agora)
+        else:
+            self._contadores.move_to_end(chave)
+        return _contar(contador, agora, limite, janela)
+
+    def _despejar(self, agora: float) -> None:
+        """Tirar as chaves ociosas (duas janelas sem uso contam zero) e as excedentes"""
+        while self._contadores:
+            inicio, _, _, janela = next(iter(self._contadores.values()))
+            if inicio + 2 * janela > agora and len(self._contadores) <= self._maximo_chaves:
+                break
+            self._contadores.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._contadores)
+
+
+# Montadas uma vez: no caminho de cada requisição limitada, construir as consultas custaria mais que executá-las
+_LER_CONTADOR = select(
+    contadores_limite.c.inicio, contadores_limite.c.atual, contadores_limite.c.anterior
+).where(contadores_limite.c.chave == bindparam("chave"))
+_GRAVAR_CONTADOR = sqlite_insert(contadores_limite).values(
+    chave=bindparam("chave"), inicio=bindparam("inicio"), atual=bindparam("atual"),
+    anterior=bindparam("anterior"), janela=bindparam("janela")
+)
+_GRAVAR_CONTADOR = _GRAVAR_CONTADOR.on_conflict_do_update(
+    index_elements=["chave"],
+    set_={coluna: _GRAVAR_CONTADOR.excluded[coluna] for coluna in ("inicio", "atual", "anterior", "janela")}
+)
+# Duas janelas sem uso contam zero
+_LIMPAR_CONTADORES = delete(contadores_limite).where(
+    contadores_limite.c.inicio + 2 * contadores_limite.c.janela <= bindparam("agora")
+)
+
+
+class BackendLimiteSQLite(BackendLimite):
+    """Contadores no banco de estado compartilhado, somados entre todos os workers da máquina.
+
+    Cada registro é uma transação BEGIN IMMEDIATE (ler, contar, gravar) na thread
+    do estado, com time.time() como relógio comum; as chaves ociosas são apagadas
+    a cada LIMITE_TAXA_INTERVALO_LIMPEZA segundos.
+    """
+
+    def __init__(self, relogio=time.time):
+        self._relogio = relogio
+        self._proxima_limpeza = 0.0
+
+    def _registrar(self, conn, chave: str, limite: int, janela: float) -> float:
+        agora = self._relogio()
+        linha = conn.execute(_LER_CONTADOR, {"chave": chave}).first()
+        contador = list(linha) if linha is not None else [agora - agora % janela, 0, 0]
+        espera = _contar(contador, max(agora, contador[0]), limite, janela)
+        if espera == 0:
+            inicio, atual, anterior = contador
+            conn.execute(_GRAVAR_CONTADOR, {
+                "chave": chave, "inicio": inicio, "atual": atual, "anterior": anterior, "janela": janela
+            })
+        if agora >= self._proxima_limpeza:
+            self._proxima_limpeza = agora + LIMITE_TAXA_INTERVALO_LIMPEZA
+            conn.execute(_LIMPAR_CONTADORES, {"agora": agora})
+        return espera
+
+    async def registrar(self, chave: str, limite: int, janela: float) -> float:
+        return await executar_no_estado(self._registrar, chave, limite, janela)
+
+
+def _carregar_backend() -> BackendLimite:
+    if not LIMITE_TAXA_BACKEND:
+        return BackendLimiteMemoria()
+    modulo, _, classe = LIMITE_TAXA_BACKEND.partition(":")
+    return getattr(importlib.import_module(modulo), classe)()
+
+
+backend_limite: BackendLimite = _carregar_backend()
+
+
+def identidade(scope) -> str:
+    """Principal do JWT do cabeçalho Authorization ou, sem token válido, o IP do cliente"""
+    for nome, valor in scope["headers"]:
+        if nome == b"authorization":
+            esquema, _, token = valor.decode("latin-1").partition(" ")
+            if esquema.lower() == "bearer" and token:
+                try:
+                    payload = decodificar_token(token)
+                    return f"{payload.get('tipo_usuario')}:{payload.get('sub')}"
+                except HTTPException:
+                    pass  # A rota recusa o token; aqui conta pelo IP
+            break
+    cliente = scope.get("client")
+    return f"ip:{cliente[0] if cliente else '-'}"
+
+
+class MiddlewareLimiteTaxa:
+    """Middleware ASGI que aplica as políticas de limite antes do roteamento"""
+
+    def __init__(self, app, politicas: Dict[Tuple[str, str], Politica] = POLITICAS, backend: Optional[BackendLimite] = None):
+        self.app = app
+        self.backend = backend if backend is not None else backend_limite
+        # Rotas sem parâmetros por busca direta; as demais pela regex do modelo
+        self._fixas: Dict[Tuple[str, str], Politica] = {}
+        self._com_parametros: List[Tuple[str, object, Politica]] = []
+        for (metodo, modelo), politica in politicas.items():
+            if "{" in modelo:
+                self._com_parametros.append((metodo, compile_path(modelo)[0], politica))
+            else:
+                self._fixas[(metodo, modelo)] = politica
+
+    def _politica(self, scope) -> Optional[Politica]:
+        metodo, caminho = scope["method"], scope["path"]
+        politica = self._fixas.get((metodo, caminho))
+        if politica is None:
+            for metodo_politica, regex, candidata in self._com_parametros:
+                if metodo_politica == metodo and regex.match(caminho):
+                    return candidata
+        return politica
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        politica = self._politica(scope)
+        if politica is not None:
+            espera = await self.backend.registrar(f"{politica.nome}|{identidade(scope)}", politica.limite, politica.janela)
+            if espera > 0:
+                # Recusada antes do roteamento: nas métricas por rota aparece como sem_rota
+                REQUISICOES_LIMITADAS.incrementar()
+                resposta = JSONResponse(
+                    {"detail": "Muitas requisições. Tente novamente mais tarde."},
+                    status_code=429,
+                    headers={"Retry-After": str(max(1, math.ceil(espera)))}
+                )
+                await resposta(scope, receive, send)
+                return
+
+        await self.app(scope, receive, send)
@@ -0,0 +1,203 @@
+"""
+Métricas em processo no formato de texto do Prometheus (GET /metrics).
+
+Contadores e histogramas são objetos pré-alocados com listas de inteiros; uma
+requisição só incrementa posições existentes. As séries de cada rota são criadas
+na primeira requisição e reutilizadas, com rótulos pelo modelo da rota
+("/eventos/{evento_id}"), nunca pelo caminho bruto.
+"""
+import time
+from bisect import bisect_left
+from typing import Dict, Tuple
+
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+TIPO_CONTEUDO_METRICAS = "text/plain; version=0.0.4; charset=utf-8"
+PREFIXO = "cyberpunk"
+
+# Limites (segundos) dos buckets de latência das requisições e da espera por conexão
+LIMITES_LATENCIA = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+LIMITES_ESPERA_POOL = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+
+# Rótulo das requisições sem rota da API (arquivos estáticos e 404)
+ROTA_DESCONHECIDA = "sem_rota"
+
+
+class Histograma:
+    """Histograma cumulativo só na exposição; observar() incrementa um único bucket"""
+    __slots__ = ("limites", "contagens", "soma")
+
+    def __init__(self, limites: Tuple[float, ...]):
+        self.limites = limites
+        self.contagens = [0] * (len(limites) + 1)  # Último = +Inf
+        self.soma = 0.0
+
+    def observar(self, valor: float) -> None:
+        self.contagens[bisect_left(self.limites, valor)] += 1
+        self.soma += valor
+
+
+class Contador:
+    __slots__ = ("nome", "ajuda", "valor")
+
+    def __init__(self, nome: str, ajuda: str):
+        self.nome = f"{PREFIXO}_{nome}"
+        self.ajuda = ajuda
+        self.valor = 0
+
+    def incrementar(self, quantidade: int = 1) -> None:
+        self.valor += quantidade
+
+
+class MetricasRota:
+    """Séries de uma combinação método + rota"""
+    __slots__ = ("rotulos", "respostas", "latencia")
+
+    def __init__(self, metodo: str, rota: str):
+        self.rotulos = f'metodo="{_escapar(metodo)}",rota="{_escapar(rota)}"'
+        self.respostas: Dict[int, int] = {}
+        self.latencia = Histograma(LIMITES_LATENCIA)
+
+
+# Contadores de negócio
+INGRESSOS_VENDIDOS = Contador("ingressos_vendidos_total", "Ingressos vendidos")
+COMPRAS_SEM_ESTOQUE = Contador("compras_sem_estoque_total", "Compras recusadas por falta de ingressos")
+LOGINS_FALHOS = Contador("logins_falhos_total", "Logins recusados por email ou senha incorretos")
+COMPRAS_FORA_DA_FILA = Contador("compras_fora_da_fila_total", "Compras recusadas por falta de admissão na fila de espera")
+REQUISICOES_LIMITADAS = Contador("requisicoes_limitadas_total", "Requisições recusadas pelo limite de requisições")
+CONTADORES = (INGRESSOS_VENDIDOS, COMPRAS_SEM_ESTOQUE, LOGINS_FALHOS, COMPRAS_FORA_DA_FILA, REQUISICOES_LIMITADAS)
+
+# {modelo da rota: {método: métricas}}
+_metricas_rotas: Dict[str, Dict[str, MetricasRota]] = {}
+# {id do scope: scope} das requisições em andamento; a rota é lida só na coleta,
+# quando o roteamento já preencheu scope["route"]
+_requisicoes_em_andamento: Dict[int, dict] = {}
+# {nome do pool: histograma da espera por conexão}
+_espera_pools: Dict[str, Histograma] = {}
+
+
+def _escapar(valor: str) -> str:
+    return valor.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def metricas_rota(scope) -> MetricasRota:
+    """Séries da rota já resolvida no scope (criadas na primeira requisição)"""
+    modelo = getattr(scope.get("route"), "path_format", None) or ROTA_DESCONHECIDA
+    metodo = scope["method"]
+    por_metodo = _metricas_rotas.get(modelo)
+    if por_metodo is None:
+        por_metodo = _metricas_rotas[modelo] = {}
+    metricas = por_metodo.get(metodo)
+    if metricas is None:
+        metricas = por_metodo[metodo] = MetricasRota(metodo, modelo)
+    return metricas
+
+
+class MiddlewareMetricas:
+    """Middleware ASGI que conta respostas por código e mede a latência de cada rota"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        inicio = time.perf_counter()
+        codigo = 500  # Exceção sem resposta vira 500 no servidor
+
+        async def enviar(mensagem):
+            nonlocal codigo
+            if mensagem["type"] == "http.response.start":
+                codigo = mensagem["status"]
+            await send(mensagem)
+
+        chave = id(scope)
+        _requisicoes_em_andamento[chave] = scope
+        try:
+            await self.app(scope, receive, enviar)
+        finally:
+            del _requisicoes_em_andamento[chave]
+            # A rota só é conhecida depois do roteamento, que preenche scope["route"]
+            metricas = metricas_rota(scope)
+            metricas.latencia.observar(time.perf_counter() - inicio)
+            metricas.respostas[codigo] = metricas.respostas.get(codigo, 0) + 1
+
+
+def pool_medido(nome: str):
+    """Classe de pool que registra quanto cada checkout esperou por uma conexão livre"""
+    espera = _espera_pools.setdefault(nome, Histograma(LIMITES_ESPERA_POOL))
+
+    class PoolMedido(AsyncAdaptedQueuePool):
+        # _do_get é o ponto em que o QueuePool bloqueia até liberar uma conexão
+        def _do_get(self):
+            inicio = time.perf_counter()
+            try:
+                return super()._do_get()
+            finally:
+                espera.observar(time.perf_counter() - inicio)
+
+    return PoolMedido
+
+
+def _linhas_histograma(linhas: list, nome: str, rotulos: str, histograma: Histograma) -> None:
+    separador = "," if rotulos else ""
+    acumulado = 0
+    for limite, contagem in zip(histograma.limites, histograma.contagens):
+        acumulado += contagem
+        linhas.append(f'{nome}_bucket{{{rotulos}{separador}le="{limite}"}} {acumulado}')
+    acumulado += histograma.contagens[-1]
+    linhas.append(f'{nome}_bucket{{{rotulos}{separador}le="+Inf"}} {acumulado}')
+    linhas.append(f"{nome}_sum{{{rotulos}}} {histograma.soma}")
+    linhas.append(f"{nome}_count{{{rotulos}}} {acumulado}")
+
+
+def gerar_texto() -> str:
+    """Exposição no formato de texto do Prometheus"""
+    em_andamento: Dict[str, int] = {}
+    for scope in list(_requisicoes_em_andamento.values()):
+        rotulos = metricas_rota(scope).rotulos
+        em_andamento[rotulos] = em_andamento.get(rotulos, 0) + 1
+    rotas = [m for por_metodo in list(_metricas_rotas.values()) for m in list(por_metodo.values())]
+    linhas = []
+
+    nome = f"{PREFIXO}_requisicoes_total"
+    linhas += [f"# HELP {nome} Respostas HTTP por rota e código", f"# TYPE {nome} counter"]
+    for metricas in rotas:
+        for codigo, contagem in sorted(metricas.respostas.items()):
+            linhas.append(f'{nome}{{{metricas.rotulos},codigo="{codigo}"}} {contagem}')
+
+    nome = f"{PREFIXO}_requisicao_duracao_segundos"
+    linhas += [f"# HELP {nome} Latência das requisições por rota", f"# TYPE {nome} histogram"]
+    for metricas in rotas:
+        _linhas_histograma(linhas, nome, metricas.rotulos, metricas.latencia)
+
+    nome = f"{PREFIXO}_requisicoes_em_andamento"
+    linhas += [f"# HELP {nome} Requisições sendo processadas por rota", f"# TYPE {nome} gauge"]
+    for metricas in rotas:
+        linhas.append(f"{nome}{{{metricas.rotulos}}} {em_andamento.get(metricas.rotulos, 0)}")
+
+    nome = f"{PREFIXO}_pool_espera_segundos"
+    linhas += [f"# HELP {nome} Espera por uma conexão livre no pool do banco", f"# TYPE {nome} histogram"]
+    for pool, histograma in list(_espera_pools.items()):
+        _linhas_histograma(linhas, nome, f'pool="{pool}"', histograma)
+
+    for contador in CONTADORES:
+        linhas += [
+            f"# HELP {contador.nome} {contador.ajuda}",
+            f"# TYPE {contador.nome} counter",
+            f"{contador.nome} {contador.valor}",
+        ]
+
+    return "\n".join(linhas) + "\n"
+
+
+def limpar_metricas() -> None:
+    """Zerar todas as séries (usado pelos benchmarks)"""
+    _metricas_rotas.clear()
+    for histograma in _espera_pools.values():
+        histograma.contagens = [0] * len(histograma.contagens)
+        histograma.soma = 0.0
+    for contador in CONTADORES:
+        contador.valor = 0
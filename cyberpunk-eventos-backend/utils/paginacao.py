@@ -0,0 +1,81 @@
+import base64
+import json
+from datetime import datetime
+from typing import Callable, Optional, Tuple
+from fastapi import HTTPException, Response, status
+from sqlalchemy import tuple_
+from sqlalchemy.sql import Select
+from database.models import Evento
+from database.busca import eventos_busca
+
+# Cabeçalho com o token de continuação (o corpo continua sendo a lista de eventos)
+CABECALHO_PROXIMO_CURSOR = "X-Proximo-Cursor"
+
+
+def _cursor_invalido() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail="Cursor de paginação inválido"
+    )
+
+
+def codificar_cursor(*valores) -> str:
+    """Gerar token opaco de continuação a partir da chave da última linha"""
+    valores = [v.isoformat() if isinstance(v, datetime) else v for v in valores]
+    bruto = json.dumps(valores, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(bruto).decode().rstrip("=")
+
+
+def decodificar_cursor(cursor: str) -> list:
+    """Ler os valores de um token de continuação"""
+    try:
+        valores = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except ValueError:
+        raise _cursor_invalido()
+    if not isinstance(valores, list) or len(valores) != 2:
+        raise _cursor_invalido()
+    return valores
+
+
+def paginar_eventos(query: Select, cursor: Optional[str], limite: int, pular: int = 0) -> Select:
+    """Aplicar paginação por keyset em (criado_em, id), do mais recente para o mais antigo.
+    
+    Busca limite + 1 linhas para saber se existe uma próxima página. `pular` é o
+    deslocamento legado (OFFSET), aceito só na primeira página, sem cursor.
+    """
+    if cursor:
+        criado_em, id = decodificar_cursor(cursor)
+        try:
+            chave = (datetime.fromisoformat(criado_em), int(id))
+        except (TypeError, ValueError):
+            raise _cursor_invalido()
+        query = query.where(tuple_(Evento.criado_em, Evento.id) < tuple_(*chave))
+    query = query.order_by(Evento.criado_em.desc(), Evento.id.desc()).limit(limite + 1)
+    if pular and not cursor:
+        query = query.offset(pular)
+    return query
+
+
+def paginar_busca(query: Select, cursor: Optional[str], limite: int) -> Select:
+    """Paginação por keyset em (rank BM25, id), do mais relevante para o menos relevante"""
+    if cursor:
+        rank, id = decodificar_cursor(cursor)
+        try:
+            chave = (float(rank), int(id))
+        except (TypeError, ValueError):
+            raise _cursor_invalido()
+        query = query.where(tuple_(eventos_busca.c.rank, eventos_busca.c.rowid) > tuple_(*chave))
+    return query.order_by(eventos_busca.c.rank, eventos_busca.c.rowid).limit(limite + 1)
+
+
+def finalizar_pagina(
+    linhas: list,
+    limite: int,
+    response: Response,
+    chave: Callable[[object], Tuple] = lambda evento: (evento.criado_em, evento.id)
+) -> list:
+    """Cortar a linha extra e publicar o cursor da próxima página no cabeçalho"""
+    if len(linhas) > limite:
+        linhas = linhas[:limite]
+        response.headers[CABECALHO_PROXIMO_CURSOR] = codificar_cursor(*chave(linhas[-1]))
+    return linhas
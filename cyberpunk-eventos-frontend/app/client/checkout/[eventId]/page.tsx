@@ -67,17 +67,11 @@ export default function CheckoutPage() {
   useEffect(() => {
     const fetchEvent = async () => {
       // Buscar evento através do endpoint público que não requer autenticação
-      const response = await clienteApi.obter<EventoDetalhes[]>('/eventos', false);
+      const response = await clienteApi.obter<EventoDetalhes>(`/eventos/${eventId}/publico`, false);
       if (response.dados) {
-        const foundEvent = response.dados.find((e) => e.id === eventId);
-        if (foundEvent) {
-          setEvent(foundEvent);
-        } else {
-          toast.error('Evento não encontrado');
-          router.push('/client/dashboard');
-        }
+        setEvent(response.dados);
       } else {
-        toast.error('Erro ao carregar evento');
+        toast.error(response.erro || 'Erro ao carregar evento');
         router.push('/client/dashboard');
       }
       setLoading(false);
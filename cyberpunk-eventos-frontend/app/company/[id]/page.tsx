@@ -34,7 +34,7 @@ export default function CompanyPublicProfile() {
       }
 
       // Buscar eventos ativos da empresa
-      const eventsResponse = await clienteApi.obter<Evento[]>(
+      const eventsResponse = await clienteApi.obterTodasPaginas<Evento>(
         `/empresas/${companyId}/eventos`,
         false
       );
@@ -1,5 +1,8 @@
 const URL_BASE_API = process.env.NEXT_PUBLIC_API_URL || 'http://localhost:8000';
 
+// Cabeçalho com o token da próxima página nas listagens paginadas por cursor
+const CABECALHO_PROXIMO_CURSOR = 'X-Proximo-Cursor';
+
 export interface RespostaApi<T> {
   dados?: T;
   erro?: string;
@@ -78,6 +81,44 @@ export class ClienteApi {
     return this.requisicao<T>(endpoint, { method: 'GET' }, incluirAuth);
   }
 
+  // Percorrer uma listagem paginada por cursor e juntar as páginas (só para listas limitadas,
+  // como os eventos de uma empresa; um item isolado tem endpoint próprio)
+  async obterTodasPaginas<T>(
+    endpoint: string,
+    incluirAuth: boolean = false
+  ): Promise<RespostaApi<T[]>> {
+    const itens: T[] = [];
+    const separador = endpoint.includes('?') ? '&' : '?';
+    let cursor: string | null = null;
+
+    try {
+      do {
+        const url: string = cursor
+          ? `${endpoint}${separador}cursor=${encodeURIComponent(cursor)}`
+          : endpoint;
+        const resposta: Response = await fetch(`${this.urlBase}${url}`, {
+          method: 'GET',
+          headers: this.obterCabecalhos(incluirAuth),
+        });
+
+        if (!resposta.ok) {
+          const erro = await resposta.json();
+          if (Array.isArray(erro.detail)) {
+            return { erro: erro.detail[0]?.msg || 'Erro de validação' };
+          }
+          return { erro: erro.detail || 'Ocorreu um erro' };
+        }
+
+        itens.push(...((await resposta.json()) as T[]));
+        cursor = resposta.headers.get(CABECALHO_PROXIMO_CURSOR);
+      } while (cursor);
+
+      return { dados: itens };
+    } catch {
+      return { erro: 'Erro de rede. Por favor, tente novamente.' };
+    }
+  }
+
   async postar<T>(
     endpoint: string,
     corpo: unknown,